@@ -1 +1,17 @@
 #! /usr/bin/python
+import importlib
+
+# The API is only imported when used, so the command line does not pay for it (see cli.py)
+_apiModules = {
+    "Mirror": "pypickup.mirror",
+    "InvalidInputError": "pypickup.utils.invalidInputError",
+    "MirrorResult": "pypickup.utils.results",
+    "PackageResult": "pypickup.utils.results",
+}
+
+
+def __getattr__(name: str):
+    if name not in _apiModules:
+        raise AttributeError("module '" + __name__ + "' has no attribute '" + name + "'")
+
+    return getattr(importlib.import_module(_apiModules[name]), name)
@@ -1,6 +1,9 @@
 import argparse
+import sys
 from importlib.metadata import entry_points
 
+from pypickup.utils.invalidInputError import InvalidInputError
+
 
 def cli():
     entrypoints = entry_points()["pypickup.cmd"]
@@ -8,15 +11,17 @@ def cli():
     parser = argparse.ArgumentParser(prog="pypickup", description="Manage a local offline PyPi mirror")
     subparsers = parser.add_subparsers(help="available commands", dest="cmd")
 
-    plugins = {}
-    for name, entrypoint in entrypoints:
-        # load plugin
-        plugin = entrypoint.load()
-        plugins[name] = plugin
+    # Only the command being run is loaded (along with the modules it needs); the rest are just listed
+    commandName: str = next((arg for arg in sys.argv[1:] if not arg.startswith("-")), None)
 
-        # load command subparser
+    plugin = None
+    for name, entrypoint in entrypoints:
         subparser = subparsers.add_parser(name)
-        plugin.init_subparser(subparser)
+
+        if name == commandName:
+            # load plugin and its command subparser
+            plugin = entrypoint.load()
+            plugin.init_subparser(subparser)
 
     args = parser.parse_args()
 
@@ -24,5 +29,9 @@ def cli():
         parser.print_help()
         return
 
-    _, plugin = next(filter(lambda x: x[0] == args.cmd, plugins.items()))
-    plugin.run(args)
+    # Incorrect inputs (e.g. a malformed version) are reported without a traceback
+    try:
+        plugin.run(args)
+    except InvalidInputError as error:
+        print(error)
+        sys.exit(1)
@@ -1,5 +1,18 @@
-from .add import AddEP
-from .remove import RemoveEP
-from .list import ListEP
-from .config import ConfigEP
-from .rebuildIndexEP import RebuildIndexEP
\ No newline at end of file
+import importlib
+
+# The entry point of each command is only imported when it is used (see cli.py)
+_entryPointModules = {
+    "AddEP": ".add",
+    "RemoveEP": ".remove",
+    "ListEP": ".list",
+    "ConfigEP": ".config",
+    "RebuildIndexEP": ".rebuildIndexEP",
+    "ServeEP": ".serve",
+}
+
+
+def __getattr__(name: str):
+    if name not in _entryPointModules:
+        raise AttributeError("module '" + __name__ + "' has no attribute '" + name + "'")
+
+    return getattr(importlib.import_module(_entryPointModules[name], __name__), name)
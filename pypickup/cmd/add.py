@@ -7,24 +7,53 @@ from pypickup.controller import Add
 
 
 class AddEP:
+    @staticmethod
+    def positiveInteger(value: str) -> int:
+        """Argument type for the options that must be greater than 0 (e.g. --jobs), so an incorrect value is reported as a usage error."""
+
+        try:
+            number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError("invalid int value: '" + value + "'")
+
+        if number < 1:
+            raise argparse.ArgumentTypeError("must be greater than 0, got " + value)
+
+        return number
+
     @staticmethod
     def init_subparser(parser: argparse.ArgumentParser):
         parser.add_argument("packageNameList", type=str, nargs="+", default="", help="Python packages list to add to the local repository. E.g. 'numpy', 'scipy pandas', 'numpy==1.8 tensorflow=1.12.2'.")
         parser.add_argument("-p", "--index-path", dest="pypiLocalPath", type=str, default=os.getenv("PYPICKUP_INDEX_PATH", default="./.pypickup/"), help="Local root path in which the package from the PyPI repository will be downloaded.")
 
+        parser.add_argument("-u", "--upstreams", dest="upstreams", type=str, default=os.getenv("PYPICKUP_UPSTREAMS", default="https://pypi.org/simple/"), help="Comma-separated list of remote simple indices (e.g. PyPI, a devpi instance or another pypickup mirror served over HTTP), in order of preference. The healthiest one is used, failing over to the others if it does not respond. Defaults to https://pypi.org/simple/.")
+        parser.add_argument("--blob-store", dest="blobStorePath", type=str, default=os.getenv("PYPICKUP_BLOB_STORE", default=""), help="Content-addressed store (by sha256) shared by several index paths. Files are kept there only once and hard-linked into each index path; the ones already in the store are not downloaded again. Disabled by default.")
+
         parser.add_argument("-r", "--requirements", dest="packageIsRequirementsFile", default=False, action="store_true", help="Used to indicate that the input is a requirements file instead of a package or list of packages.")
 
+        parser.add_argument("--pipeline", dest="pipeline", default=False, action="store_true", help="Retrieves and filters the remote indices of all the packages concurrently before downloading anything, and then downloads the files of all of them through a single pool of --jobs workers. Useful for long lists or requirements files.")
+
         parser.add_argument("--df", "--print-default-config", dest="printDefaultConfig", default=False, action="store_true", help="Prints the default settings.")
         parser.add_argument("-a", "--print-all-file-names", dest="printAllFileNames", default=False, action="store_true", help="Prints all the package files before being filtered whatsoever, prints the ones being filtered and finally prints the resulting subset that will be actually downloaded.")
         parser.add_argument("-v", "--verbose", dest="printVerbose", default=False, action="store_true", help="Prints the downloads in a more verbose fashion. WARNING! It slows down the execution.")
+        parser.add_argument("--page-ttl", dest="pageTTL", type=float, default=float(os.getenv("PYPICKUP_PAGE_TTL", default="0")), help="Seconds during which the remote project pages cached in the local repository are reused without asking the upstream again. Pages are always requested at most once per run. Defaults to 0 (always revalidate them).")
+        parser.add_argument("-j", "--jobs", dest="jobs", type=AddEP.positiveInteger, default=1, help="Number of files to download in parallel. Defaults to 1, i.e. one file at a time.")
+        parser.add_argument("--limit-rate", dest="limitRate", type=str, default=os.getenv("PYPICKUP_LIMIT_RATE", default=""), help="Maximum download bandwidth, shared by all the parallel downloads, in bytes per second. K, M and G suffixes are accepted (e.g. 500K, 10M). Unlimited by default.")
+        parser.add_argument("--max-requests-per-second", dest="maxRequestsPerSecond", type=float, default=float(os.getenv("PYPICKUP_MAX_REQUESTS_PER_SECOND", default="0")), help="Maximum number of requests per second made to the remote, shared by all the parallel downloads. Unlimited by default.")
+        parser.add_argument("--pool-size", dest="poolSize", type=AddEP.positiveInteger, default=int(os.getenv("PYPICKUP_POOL_SIZE", default="10")), help="Maximum number of keep-alive connections reused per host. It is raised to the number of jobs plus the number of segments if lower. Defaults to 10.")
+        parser.add_argument("--segments", dest="segments", type=AddEP.positiveInteger, default=int(os.getenv("PYPICKUP_SEGMENTS", default="4")), help="Number of concurrent byte ranges the files larger than --segment-threshold are downloaded in, if the server supports them. 1 disables it. Defaults to 4.")
+        parser.add_argument("--segment-threshold", dest="segmentThreshold", type=str, default=os.getenv("PYPICKUP_SEGMENT_THRESHOLD", default="100M"), help="Minimum size of the files downloaded in segments. K, M and G suffixes are accepted. Defaults to 100M.")
         parser.add_argument("--show-retries", dest="showRetries", default=False, action="store_true", help="Shows the retries in case there are any (e.g. due to a faulty network connection.")
+        parser.add_argument("--retries", dest="retries", type=AddEP.positiveInteger, default=10, help="Maximum number of attempts for each request. Only connection errors, timeouts and transient HTTP errors (e.g. 429, 503) are retried. Defaults to 10.")
+        parser.add_argument("--backoff", dest="backoff", type=float, default=0.5, help="Base time, in seconds, of the exponential backoff between retries (a random time up to backoff * 2^attempt is waited, unless the server sends 'Retry-After'). Defaults to 0.5.")
+        parser.add_argument("--max-backoff", dest="maxBackoff", type=float, default=30.0, help="Maximum time, in seconds, to wait between retries. Defaults to 30.")
 
         parser.add_argument("-s", "--only-src", dest="onlySources", default=False, action="store_true", help="Download only the source files (.zip and .tar.gz). Disabled by default.")
         parser.add_argument("--dev", dest="includeDevs", default=False, action="store_true", help="Download also the new development releases (alpha, betas), which are not included by default.")
         parser.add_argument("--rc", dest="includeRCs", default=False, action="store_true", help="Download also the release candidates (rc), which are not included by default.")
         parser.add_argument("--ps", "--platform-specific", dest="includePlatformSpecific", default=False, action="store_true", help="Download also the platform-specific wheels, which are not included by default. If this flag is not set, only platform-agnostic files are considered (-any.whl).")
         
-        parser.add_argument("-d", "--dry-run", dest="dryRun", default=False, action="store_true", help="Display the changes that would be performed without actually making them. Can be combined with the printing options in order to know what is the exact behaviour. E.g. pypickup add -d --nf numpy.")
+        parser.add_argument("-d", "--dry-run", dest="dryRun", default=False, action="store_true", help="Display the changes that would be performed (index entries to add, and files to download with their sizes) without actually making them, nor touching the local repository. Can be combined with the printing options in order to know what is the exact behaviour. E.g. pypickup add -d --nf numpy.")
 
     @staticmethod
     def run(args: argparse.Namespace):
@@ -36,25 +65,54 @@ class AddEP:
             with open(requirementsFile, "r") as reqsFile:
                 listOfPackages.extend(package.strip("\r\n") for package in reqsFile.readlines())
 
-        for packageName in listOfPackages:
+        if args.pipeline:
+            AddEP.runPipelined(args, listOfPackages)
+            return
+
+        for index, packageName in enumerate(listOfPackages):
 
             args.packageName = packageName
 
             controllerInstance = Add()
             controllerInstance.parseScriptArguments(args)
 
+            # The network options are the same for all the packages
+            if index == 0:
+                controllerInstance.configureNetworkManager()
+
             controllerInstance.printDefaultConfigIfRequired()
 
             print("Adding '" + packageName + "' to the local index (" + os.path.abspath(args.pypiLocalPath) + "/" + "):")
             if controllerInstance.validPackageName():
-                controllerInstance.initLocalRepo()
-
-                if not controllerInstance.packageExists():
-                    controllerInstance.addNewPackageToIndex()
-                    controllerInstance.getPackage()
+                if args.dryRun:
+                    controllerInstance.planPackage()
                 else:
-                    controllerInstance.getPackageDiff()
+                    controllerInstance.initLocalRepo()
+
+                    if not controllerInstance.packageExists():
+                        controllerInstance.addNewPackageToIndex()
+                        controllerInstance.getPackage()
+                    else:
+                        controllerInstance.getPackageDiff()
             else:
                 print("Package " + controllerInstance.packageName + " does not exist in the remote repository (" + controllerInstance.remotePyPIRepository + ")")
 
             print()
+
+    @staticmethod
+    def runPipelined(args: argparse.Namespace, listOfPackages: List[str]):
+        """Same as 'run', but the remote indices of all the packages are retrieved upfront, concurrently, and all their files are downloaded at the end through a single pool of workers."""
+
+        controllers: List[Add] = list()
+        for packageName in listOfPackages:
+            args.packageName = packageName
+
+            controllerInstance = Add()
+            controllerInstance.parseScriptArguments(args)
+            controllers.append(controllerInstance)
+
+        if len(controllers) == 0:
+            return
+
+        controllers[0].printDefaultConfigIfRequired()
+        Add.addPackages(controllers)
@@ -10,6 +10,8 @@ class ListEP:
         parser.add_argument("packageName", type=str, nargs="?", default="", help="Python package for which the list of downloaded files will be shown.")
         parser.add_argument("-p", "--index-path", dest="pypiLocalPath", type=str, default=os.getenv("PYPICKUP_INDEX_PATH", default="./.pypickup/"), help="Local root path in which the specified package is expected to be.")
 
+        parser.add_argument("-u", "--upstreams", dest="upstreams", type=str, default=os.getenv("PYPICKUP_UPSTREAMS", default="https://pypi.org/simple/"), help="Comma-separated list of remote simple indices (e.g. PyPI, a devpi instance or another pypickup mirror served over HTTP), in order of preference. The healthiest one is used, failing over to the others if it does not respond. Defaults to https://pypi.org/simple/.")
+        parser.add_argument("--page-ttl", dest="pageTTL", type=float, default=float(os.getenv("PYPICKUP_PAGE_TTL", default="0")), help="Seconds during which the remote project pages cached in the local repository are reused without asking the upstream again. Pages are always requested at most once per run. Defaults to 0 (always revalidate them).")
         parser.add_argument("-r", "--remote", dest="remote", default=False, action="store_true", help="List all packages available in the remote repository.")
 
     @staticmethod
@@ -11,6 +11,8 @@ class RebuildIndexEP:
         parser.add_argument("-p", "--index-path", dest="pypiLocalPath", type=str, default=os.getenv("PYPICKUP_INDEX_PATH", default="./.pypickup/"), help="Local root path in which the specified package is expected to be.")
 
         parser.add_argument("-a", "--all", dest="rebuildAllIndices", default=False, action="store_true", help="Rebuild all indices for all the available packages, besides the main one.")
+        parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=None, help="Number of processes rebuilding package indices in parallel with -a. Defaults to the number of CPUs.")
+        parser.add_argument("--force", dest="force", default=False, action="store_true", help="With -a, rebuild the indices of all the packages, even the ones whose directory has not changed since their last rebuild.")
 
     @staticmethod
     def run(args: argparse.Namespace):
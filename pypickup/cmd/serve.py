@@ -0,0 +1,44 @@
+import argparse
+import os
+import shlex
+
+from pypickup.cmd.add import AddEP
+from pypickup.controller import Serve
+
+
+class ServeEP:
+    @staticmethod
+    def init_subparser(parser: argparse.ArgumentParser):
+        parser.add_argument("-p", "--index-path", dest="pypiLocalPath", type=str, default=os.getenv("PYPICKUP_INDEX_PATH", default="./.pypickup/"), help="Local root path of the repository to be served.")
+
+        parser.add_argument("--host", dest="host", type=str, default=os.getenv("PYPICKUP_HOST", default="127.0.0.1"), help="Address to listen on. Use 0.0.0.0 to listen on all the interfaces. Defaults to 127.0.0.1.")
+        parser.add_argument("--port", dest="port", type=int, default=int(os.getenv("PYPICKUP_PORT", default="8080")), help="Port to listen on. Defaults to 8080.")
+        parser.add_argument("--cache-size", dest="cacheSize", type=int, default=4096, help="Maximum number of index pages kept in memory, and of proxied projects kept track of. Defaults to 4096.")
+        parser.add_argument("-v", "--verbose", dest="printVerbose", default=False, action="store_true", help="Prints every request served.")
+
+        parser.add_argument("--proxy", dest="proxy", default=False, action="store_true", help="Serves as a pull-through cache of the upstreams: projects and files not in the local repository yet are fetched from them on demand (filtered as 'add' would), stored in the local repository and added to its indices.")
+        parser.add_argument("--add-options", dest="addOptions", type=str, default=os.getenv("PYPICKUP_ADD_OPTIONS", default=""), help="Options of the 'add' command the proxied files are filtered and downloaded with, quoted as a single argument. E.g. --add-options=\"--ps -u https://pypi.org/simple/\" (with '=', since they start with a dash). Only used with --proxy.")
+        parser.add_argument("--proxy-ttl", dest="proxyTTL", type=float, default=float(os.getenv("PYPICKUP_PROXY_TTL", default="600")), help="Seconds during which the upstream files of a proxied project are not asked for again. Defaults to 600.")
+
+    @staticmethod
+    def getProxyArguments(args: argparse.Namespace) -> argparse.Namespace:
+        """Parses --add-options as the arguments of the 'add' command. The package name is set for each proxied project."""
+
+        addParser = argparse.ArgumentParser(prog="pypickup serve --add-options")
+        AddEP.init_subparser(addParser)
+
+        return addParser.parse_args(shlex.split(args.addOptions) + ["-p", args.pypiLocalPath, "--", "-"])
+
+    @staticmethod
+    def run(args: argparse.Namespace):
+        args.packageName = ""
+        args.proxyArguments = ServeEP.getProxyArguments(args) if args.proxy else None
+
+        controllerInstance = Serve()
+        controllerInstance.parseScriptArguments(args)
+
+        if not args.proxy and not controllerInstance.repositoryExists():
+            print("No local repository has been initialized yet.\n" + \
+                  "    - Download at least one package running the 'add' command.")
+        else:
+            controllerInstance.serve()
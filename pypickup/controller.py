@@ -1,15 +1,37 @@
 #! /usr/bin/python
-from io import TextIOWrapper
 import os
 import re
 import argparse
+import hashlib
 import shutil
-from typing import Dict, List
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Dict, List, TextIO, Tuple
+from urllib.parse import urldefrag
+
+from pypickup.utils.blobStore import BlobStore
+from pypickup.utils.catalog import Catalog
+from pypickup.utils.htmlManager import HTMLManager
+from pypickup.utils.httpCache import HTTPCache
+from pypickup.utils.indexWriter import IndexWriter
+from pypickup.utils.invalidInputError import InvalidInputError
+from pypickup.utils.jsonManager import JSONManager
+from pypickup.utils.fileRecord import FileRecord
+from pypickup.utils.results import PackageResult
+from pypickup.utils.sharedOnFirstUse import SharedOnFirstUse
 
-from tqdm import tqdm
+if TYPE_CHECKING:
+    from pypickup.utils.indexServer import IndexPage, IndexServer
+    from pypickup.utils.networkManager import NetworkManager
 
-from pypickup.utils.htmlManager import HTMLManager
-from pypickup.utils.networkManager import NetworkManager
+
+def _createNetworkManager():
+    from pypickup.utils.networkManager import NetworkManager
+
+    return NetworkManager()
 
 
 class LocalPyPIController:
@@ -19,17 +41,20 @@ class LocalPyPIController:
     """
 
     _htmlManager = HTMLManager()
-    _networkManager = NetworkManager()
+    _jsonManager = JSONManager()
+    # Created on first use, since it imports requests and tqdm, which the commands working only on the local repository do not need
+    _networkManager = SharedOnFirstUse(_createNetworkManager)
 
     _baseHTMLFileName: str = "index.html"
     _packageHTMLFileName: str = "index.html"
-    _remotePypiBaseDir: str = "https://pypi.org/simple/"
+    _httpCacheDir: str = ".cache/simple/"
+    _catalogFileName: str = ".catalog.sqlite3"
 
     _regexZIPAndTars = r"^(.*)\.(zip|tar.gz|tar.bz2|tar.xz|tar.Z|tar)$"
     _regexVersion = r"^(.*)==(\d+(?:\.\d+)*)$"
     # _regexVersion = r"^(.*)==(\d+\.\d+(?:\.\d+)?)$"
+    _regexByteRate = r"^(\d+(?:\.\d+)?)([kKmMgG]?)$"
 
-    _dryRunsTmpDir = "./.pypickup_tmp/"
 
     def __init__(self):
         self._packageName: str = None
@@ -39,6 +64,14 @@ class LocalPyPIController:
         self._packageHTMLFileFullName: str = None
         self._packageLocalPath: str = None
 
+        # Each controller has its own, since the filtering flags it holds are per package (e.g. the version)
+        self._htmlManager: HTMLManager = HTMLManager()
+        self._output: TextIO = None
+
+        self._catalog: Catalog = None
+        self._remoteFileRecords: Dict[str, FileRecord] = dict()
+        self._results: Dict[str, PackageResult] = dict()
+
         self._printDefaultConfig: bool = None
         self._printAllFileNames: bool = None
         self._printVerbose: bool = None
@@ -51,10 +84,26 @@ class LocalPyPIController:
         
         self._packageVersion: str = ""
 
-        self._dryRun: bool = None
+        self._upstreams: List[str] = None
+        self._remotePackageURL: str = None
+        self._pageTTL: float = 0
+
+        self._jobs: int = 1
+        self._poolSize: int = 10
+
+        self._segments: int = 4
+        self._segmentThreshold: float = 100 * 1024 * 1024
+
+        self._retries: int = 10
+        self._backoff: float = 0.5
+        self._maxBackoff: float = 30.0
+
+        self._blobStore: BlobStore = None
 
-    def __del__(self):
-        self._removeDir(self._dryRunsTmpDir, True)
+        self._limitRate: float = None
+        self._maxRequestsPerSecond: float = None
+
+        self._dryRun: bool = None
 
     @property
     def packageName(self):
@@ -76,9 +125,87 @@ class LocalPyPIController:
     def packageLocalPath(self):
         return self._packageLocalPath
 
+    @property
+    def upstreams(self):
+        return self._upstreams
+
     @property
     def remotePyPIRepository(self):
-        return self._remotePypiBaseDir
+        if self.upstreams is not None:
+            return ", ".join(self.upstreams)
+
+        return ", ".join(upstream.baseURL for upstream in self._networkManager.upstreams)
+
+    @property
+    def remotePackageURL(self):
+        """The URL the remote package page was last retrieved from (or would be, from the preferred upstream)."""
+
+        if self._remotePackageURL is not None:
+            return self._remotePackageURL
+
+        return self._networkManager.getSortedUpstreams()[0].getProjectURL(self.packageName)
+
+    @property
+    def pageTTL(self):
+        return self._pageTTL
+
+    @property
+    def httpCache(self):
+        return HTTPCache(os.path.join(self.pypiLocalPath, self._httpCacheDir))
+
+    @property
+    def catalog(self):
+        """The catalog of the local repository, opened on first use. Repositories created before there was a catalog are imported from their HTML indices.
+
+        In dry runs, nothing is written: an existing catalog is opened read-only, and the indices of repositories without one are imported in memory."""
+
+        if self._catalog is None:
+            catalogFileFullName: str = os.path.join(self.pypiLocalPath, self._catalogFileName)
+            isNewCatalog: bool = not os.path.exists(catalogFileFullName)
+
+            if not self.dryRun:
+                self._catalog = Catalog(catalogFileFullName)
+            else:
+                self._catalog = Catalog(catalogFileFullName, readOnly=True) if not isNewCatalog else Catalog(":memory:")
+            if isNewCatalog and os.path.exists(self.baseHTMLFileFullName):
+                self.__importIndicesIntoCatalog(self._catalog)
+
+        return self._catalog
+
+    @catalog.setter
+    def catalog(self, new_catalog: Catalog):
+        """Shares an already opened catalog of the local repository (e.g. the one of a long-running Mirror), instead of opening a new one."""
+
+        self._catalog = new_catalog
+
+    @property
+    def results(self) -> List[PackageResult]:
+        """The results of the operations run so far, one per package."""
+
+        return list(self._results.values())
+
+    @property
+    def networkManager(self) -> "NetworkManager":
+        """The network manager the remotes are accessed through, shared by all the controllers of the process unless set otherwise."""
+
+        return self._networkManager
+
+    @networkManager.setter
+    def networkManager(self, new_networkManager: "NetworkManager"):
+        """Uses another network manager (e.g. the one of a Mirror, configured with its own options), instead of the one shared by the process."""
+
+        self._networkManager = new_networkManager
+
+    @property
+    def output(self) -> TextIO:
+        """The text stream the controller prints to (e.g. an io.StringIO to capture it). None means the standard output, the only one download progress bars are shown on."""
+
+        return self._output
+
+    @output.setter
+    def output(self, new_output: TextIO):
+        self._output = new_output
+        self._htmlManager.output = new_output
 
     @property
     def printDefaultConfig(self):
@@ -116,6 +243,46 @@ class LocalPyPIController:
     def packageVersion(self):
         return self._packageVersion
 
+    @property
+    def jobs(self):
+        return self._jobs
+
+    @property
+    def poolSize(self):
+        return self._poolSize
+
+    @property
+    def segments(self):
+        return self._segments
+
+    @property
+    def segmentThreshold(self):
+        return self._segmentThreshold
+
+    @property
+    def retries(self):
+        return self._retries
+
+    @property
+    def backoff(self):
+        return self._backoff
+
+    @property
+    def maxBackoff(self):
+        return self._maxBackoff
+
+    @property
+    def limitRate(self):
+        return self._limitRate
+
+    @property
+    def maxRequestsPerSecond(self):
+        return self._maxRequestsPerSecond
+
+    @property
+    def blobStore(self):
+        return self._blobStore
+
     @property
     def dryRun(self):
         return self._dryRun
@@ -141,6 +308,7 @@ class LocalPyPIController:
             self._pypiLocalPath = self.pypiLocalPath + "/"
 
         # Propagate changes
+        self._catalog = None
         self.baseHTMLFileFullName = os.path.join(self._pypiLocalPath, self._baseHTMLFileName)
 
         self.packageLocalPath = os.path.join(self._pypiLocalPath, self.packageName) + "/"
@@ -190,14 +358,129 @@ class LocalPyPIController:
     def includePlatformSpecific(self, new_includePlatformSpecific: bool):
         self._includePlatformSpecific = new_includePlatformSpecific
 
+    @upstreams.setter
+    def upstreams(self, new_upstreams: str):
+        """Sets the comma-separated list of upstreams (remote simple indices), in order of preference."""
+
+        self._upstreams = [upstream.strip() for upstream in new_upstreams.split(",") if upstream.strip()]
+
+    @pageTTL.setter
+    def pageTTL(self, new_pageTTL: float):
+        if new_pageTTL < 0:
+            raise InvalidInputError("LocalPyPIController::pageTTL - The time to live of the cached pages cannot be negative.")
+        self._pageTTL = new_pageTTL
+
     @packageVersion.setter
     def packageVersion(self, new_packageVersion: bool):
         self._packageVersion = new_packageVersion
 
+    @jobs.setter
+    def jobs(self, new_jobs: int):
+        if new_jobs < 1:
+            raise InvalidInputError("LocalPyPIController::jobs - The number of jobs must be greater than 0.")
+        self._jobs = new_jobs
+
+    @poolSize.setter
+    def poolSize(self, new_poolSize: int):
+        if new_poolSize < 1:
+            raise InvalidInputError("LocalPyPIController::poolSize - The connection pool size must be greater than 0.")
+        self._poolSize = new_poolSize
+
+    @segments.setter
+    def segments(self, new_segments: int):
+        if new_segments < 1:
+            raise InvalidInputError("LocalPyPIController::segments - The number of segments must be greater than 0.")
+        self._segments = new_segments
+
+    @segmentThreshold.setter
+    def segmentThreshold(self, new_segmentThreshold: str):
+        """Accepts a number of bytes, with an optional K, M or G (powers of 1024) suffix. E.g. '100M'."""
+
+        segmentThreshold: float = self._parseByteSize(new_segmentThreshold)
+        if segmentThreshold is None:
+            raise InvalidInputError("LocalPyPIController::segmentThreshold - Incorrect size format '" + str(new_segmentThreshold) + "'. Use a number of bytes, optionally followed by K, M or G (e.g. 100M).")
+
+        self._segmentThreshold = segmentThreshold
+
+    @retries.setter
+    def retries(self, new_retries: int):
+        self._retries = new_retries
+
+    @backoff.setter
+    def backoff(self, new_backoff: float):
+        self._backoff = new_backoff
+
+    @maxBackoff.setter
+    def maxBackoff(self, new_maxBackoff: float):
+        self._maxBackoff = new_maxBackoff
+
+    @limitRate.setter
+    def limitRate(self, new_limitRate: str):
+        """Accepts a number of bytes per second, with an optional K, M or G (powers of 1024) suffix. E.g. '500K', '10M'. None, '' or '0' means no limit."""
+
+        if not new_limitRate:
+            self._limitRate = None
+            return
+
+        limitRate: float = self._parseByteSize(new_limitRate)
+        if limitRate is None:
+            raise InvalidInputError("LocalPyPIController::limitRate - Incorrect rate format '" + str(new_limitRate) + "'. Use a number of bytes per second, optionally followed by K, M or G (e.g. 500K, 10M).")
+
+        self._limitRate = limitRate or None
+
+    @maxRequestsPerSecond.setter
+    def maxRequestsPerSecond(self, new_maxRequestsPerSecond: float):
+        self._maxRequestsPerSecond = new_maxRequestsPerSecond if new_maxRequestsPerSecond else None
+
+    @blobStore.setter
+    def blobStore(self, new_blobStore: BlobStore):
+        self._blobStore = new_blobStore
+
     @dryRun.setter
     def dryRun(self, new_dryRun: bool):
         self._dryRun = new_dryRun
 
+    def _parseByteSize(self, size: str) -> float:
+        """Returns the number of bytes in 'size' (e.g. '500K', '10M' or '1024'), K, M and G being powers of 1024. None if the format is not valid."""
+
+        byteSize = re.match(self._regexByteRate, str(size).strip())
+        if not byteSize:
+            return None
+
+        return float(byteSize[1]) * pow(1024, " KMG".index(byteSize[2].upper() if byteSize[2] else " "))
+
+    def _formatByteSize(self, size: int) -> str:
+        """Returns 'size' in a human-readable way (e.g. '1.5 MiB'), or 'unknown size' if it is None."""
+
+        if size is None:
+            return "unknown size"
+
+        for unit in ["B", "KiB", "MiB", "GiB"]:
+            if size < 1024 or unit == "GiB":
+                return (str(size) if unit == "B" else "{:.1f}".format(size)) + " " + unit
+            size /= 1024
+
+    def _printDryRunPlan(self, title: str, indexEntries: Dict[str, List[str]], files: Dict[str, List[FileRecord]]):
+        """Prints the plan of a dry run: the 'indexEntries' (e.g. {"to add": [...]}) and the 'files' (e.g. {"to download": [...]}), along with their sizes as stated in the indices."""
+
+        self._print("DRY RUN. " + title)
+        for action, entries in indexEntries.items():
+            self._print("  Index entries " + action + " (" + str(len(entries)) + "):")
+            for entry in entries:
+                self._print("    " + entry)
+
+        for action, fileRecords in files.items():
+            knownSizes: List[int] = [fileRecord.size for fileRecord in fileRecords if fileRecord.size is not None]
+            totalSize: str = self._formatByteSize(sum(knownSizes) if len(knownSizes) > 0 or len(fileRecords) == 0 else None)
+            if 0 < len(knownSizes) < len(fileRecords):
+                totalSize += ", plus " + str(len(fileRecords) - len(knownSizes)) + " of unknown size"
+            self._print("  Files " + action + " (" + str(len(fileRecords)) + ", " + totalSize + "):")
+            for fileRecord in fileRecords:
+                self._print("    " + fileRecord.fileName + " (" + self._formatByteSize(fileRecord.size) + ")")
+
+    def _print(self, *values):
+        print(*values, file=self._output)
+
     def _removeFile(self, fileName: str):
         if os.path.exists(fileName):
             os.remove(fileName)
@@ -218,29 +501,29 @@ class LocalPyPIController:
             self.packageName = specifiedVersion[1]
             self.packageVersion = self.packageName + "-" + specifiedVersion[2]
         elif "=" in self.packageName:
-            print("Incorrect version format.")
-            exit(0)
+            raise InvalidInputError("LocalPyPIController::parseScriptArguments - Incorrect version format in '" + str(args.packageName) + "'. Use 'package_name==version'.")
 
         self.pypiLocalPath = args.pypiLocalPath
 
     def printDefaultConfigIfRequired(self):
         if self.printDefaultConfig:
-            print("")
-            print("DEFAULT CONFIGURATION VARIABLES:")
-            print("\tIndex path (current): " + self.pypiLocalPath)
-            print("")
-            print("\tBase HTML file: " + self._baseHTMLFileName)
-            print("\tPackage HTML file dir: " + self.packageHTMLFileFullName)
-            print("\tPython repository : " + self._remotePypiBaseDir)
-            print("")
-            print("\tWheel filters settings file path: " + self._htmlManager.getWheelFiltersSettingsFilePath())
-            print("\tDry runs path: " + self._dryRunsTmpDir)
-            print("")
-            print("\tIncluded zips and tars: " + self._regexZIPAndTars)
-            print("")
-            print("\tWheel filters enabled: " + str(self._htmlManager.areWheelFiltersEnabled()))
-            print("\t\tUse the 'config' command to get the whole wheel filters configuration.")
-            print("")
+            self._print("")
+            self._print("DEFAULT CONFIGURATION VARIABLES:")
+            self._print("\tIndex path (current): " + self.pypiLocalPath)
+            self._print("")
+            self._print("\tBase HTML file: " + self._baseHTMLFileName)
+            self._print("\tPackage HTML file dir: " + self.packageHTMLFileFullName)
+            self._print("\tPython repository : " + self.remotePyPIRepository)
+            self._print("\tRemote indices cache dir: " + self.httpCache.cacheDir)
+            self._print("\tBlob store: " + (self.blobStore.storePath if self.blobStore is not None else "-"))
+            self._print("")
+            self._print("\tWheel filters settings file path: " + self._htmlManager.getWheelFiltersSettingsFilePath())
+            self._print("")
+            self._print("\tIncluded zips and tars: " + self._regexZIPAndTars)
+            self._print("")
+            self._print("\tWheel filters enabled: " + str(self._htmlManager.areWheelFiltersEnabled()))
+            self._print("\t\tUse the 'config' command to get the whole wheel filters configuration.")
+            self._print("")
 
     def repositoryExists(self) -> bool:
         return os.path.exists(self.baseHTMLFileFullName)
@@ -248,63 +531,154 @@ class LocalPyPIController:
     def packageExists(self) -> bool:
         """Returns whether the self._packageName already exists in the self._pypiLocalPath. If the local repository has not even been created previously, returns False."""
 
-        if not os.path.exists(self.baseHTMLFileFullName):
+        if not self.repositoryExists():
             return False
 
+        return self.catalog.hasPackage(self.packageName)
+
+    def __importIndicesIntoCatalog(self, catalog: Catalog):
+        """Fills the 'catalog' with the packages and files listed in the HTML indices of the local repository."""
+
         with open(self.baseHTMLFileFullName, "r") as baseHTMLFile:
-            baseHTMLStr: str = baseHTMLFile.read()
+            packageNames: List[str] = list(self._htmlManager.getHRefsList(baseHTMLFile.read()).keys())
 
-        return self._htmlManager.existsHTMLEntry(baseHTMLStr, "a", self.packageName)
+        catalog.setPackages(packageNames)
+        for packageName in packageNames:
+            packageHTMLFileFullName: str = os.path.join(self.pypiLocalPath, packageName, self._packageHTMLFileName)
+            if not os.path.exists(packageHTMLFileFullName):
+                continue
 
-    def _writeFileFromTheStart(self, file: TextIOWrapper, textToWrite: str):
-        file.seek(0)
-        file.truncate(0)
-        file.write(textToWrite)
+            with open(packageHTMLFileFullName, "r") as packageHTMLFile:
+                fileRecords: Dict[str, FileRecord] = self._htmlManager.getFileRecords(packageHTMLFile.read(), "")
 
-    def _addPackagesToIndex(self, indexHTML: str, file: TextIOWrapper, entries: Dict[str, str]):
-        updatedHTML: str = indexHTML
-        for href, entryText in entries.items():
-            _, updatedHTML = self._htmlManager.insertHTMLEntry(updatedHTML, "a", entryText, {"href": href})
-        
-        self._writeFileFromTheStart(file, updatedHTML)
-        
-        return updatedHTML
+            catalog.setFiles(packageName, [self._getLocalFileRecord(packageName, fileRecord) for fileRecord in fileRecords.values()])
+
+    def _getResult(self, packageName: str = None) -> PackageResult:
+        """The result of the operation on the package (self.packageName by default), created the first time."""
+
+        packageName = packageName if packageName is not None else self.packageName
+        if packageName not in self._results:
+            self._results[packageName] = PackageResult(packageName)
+
+        return self._results[packageName]
+
+    def _getLocalFileRecord(self, packageName: str, fileRecord: FileRecord, sha256: str = None) -> FileRecord:
+        """Returns the record of a file of the local repository, taking the metadata from 'fileRecord' (e.g. the remote record it was downloaded from), but pointing to the local file."""
+
+        filePath: str = os.path.join(self.pypiLocalPath, packageName, fileRecord.fileName)
+        hashes: Dict[str, str] = {"sha256": sha256} if sha256 is not None else fileRecord.hashes
+
+        return FileRecord(fileRecord.fileName, "./" + fileRecord.fileName, hashes=hashes, requiresPython=fileRecord.requiresPython, yanked=fileRecord.yanked, size=os.path.getsize(filePath) if os.path.exists(filePath) else fileRecord.size, uploadTime=fileRecord.uploadTime)
+
+    def _getIndexWriter(self) -> IndexWriter:
+        return IndexWriter(self.catalog, self.pypiLocalPath, self._htmlManager, self._jsonManager)
+
+    def _getFilterProfile(self) -> str:
+        """Digest of the settings the files are selected with, recorded along with them in the catalog. None if there is no filtering."""
+
+        return None
+
+    def _setUpstreams(self, upstreams: str):
+        """Sets the comma-separated list of upstreams (remote simple indices), in order of preference, both in this controller and its network manager."""
+
+        self.upstreams = upstreams
+        self._networkManager.upstreams = self.upstreams
+
+    def _getRemoteProjectPage(self, httpCache: HTTPCache = None) -> Tuple[bool, bool, str, bytes, str]:
+        """Gets the self.packageName page from the healthiest upstream, failing over to the other ones if needed. See NetworkManager.getProjectPage."""
+
+        ok, modified, status, content, contentType, pageURL = self._networkManager.getUpstreamProjectPage(self.packageName, httpCache, showRetries=self.showRetries)
+        if ok:
+            self._remotePackageURL = pageURL
+
+        return ok, modified, status, content, contentType
+
+    def _getFileRecords(self, projectPage: bytes, contentType: str, pageURL: str) -> Dict[str, FileRecord]:
+        """Returns the files listed in a remote project page, either it is in the PEP 691 JSON format or in the PEP 503 HTML one."""
+
+        if self._jsonManager.isJSONContentType(contentType):
+            return self._jsonManager.getFileRecords(projectPage, pageURL)
+
+        return self._htmlManager.getFileRecords(projectPage.decode("utf-8"), pageURL)
 
     def _printPackageNamesInHTML(self, packageFiles: List[str], message: str):
-        print(message + " [" + str(len(packageFiles)) + "]:")
+        self._print(message + " [" + str(len(packageFiles)) + "]:")
         for packageName in packageFiles:
-            print(packageName)
+            self._print(packageName)
         if len(packageFiles) == 0:
-            print("-")
-        print("")
+            self._print("-")
+        self._print("")
+
+    def __getLinkSHA256(self, fileLink: str) -> str:
+        fragment: str = urldefrag(fileLink)[1]
+        if not fragment.startswith("sha256="):
+            return None
+
+        return fragment[len("sha256="):].lower()
+
+    def _downloadFile(self, fileName: str, fileLink: str, printVerbose: bool = False, showRetries: bool = False, onProgress: Callable[[str, int], None] = None) -> Tuple[str, str, bool, str, str]:
+        """Downloads a single file into the package local path, verifying its hash if the link states one. If there is a blob store and it already holds a file with that hash, it is linked instead of downloaded. Safe to be run from a worker thread, since it does not touch the index. See NetworkManager.downloadLink for 'onProgress'."""
+
+        filePath: str = self.packageLocalPath + fileName
+
+        linkSHA256: str = self.__getLinkSHA256(fileLink)
+        if self.blobStore is not None and self.blobStore.contains(linkSHA256):
+            self.blobStore.linkInto(linkSHA256, filePath)
+            return fileName, fileLink, True, "Linked from the blob store", linkSHA256
 
-    def _downloadFilesInLocalPath(self, packagesToDownload: Dict[str, str], indexHTML: str, htmlFile: TextIOWrapper, printVerbose: bool = False, showRetries: bool = False):
-        updatedHTML: str = indexHTML
+        ok, status, sha256 = self._networkManager.downloadLink(fileLink, filePath, printVerbose=printVerbose, showRetries=showRetries, onProgress=onProgress)
+        if ok and self.blobStore is not None:
+            self.blobStore.addFile(filePath, sha256)
 
-        actuallyDownloadedPackages: int = 0
+        return fileName, fileLink, ok, status, sha256
 
-        if len(packagesToDownload) == 0:
-            print("No new packages in the remote to download.")
+    def _downloadFilesInLocalPath(self, packagesToDownload: Dict[str, str], printVerbose: bool = False, showRetries: bool = False, jobs: int = 1):
+        """Downloads the 'packagesToDownload' using up to 'jobs' parallel workers. The catalog and the package index are only updated from the calling thread, in batches, as the downloads complete."""
+
+        with self._getIndexWriter() as indexWriter:
+            return self._downloadFilesOfPackages([(self, packagesToDownload, indexWriter)], printVerbose, showRetries, jobs, self.output)[0]
+
+    @staticmethod
+    def _downloadFilesOfPackages(packages: List[Tuple["LocalPyPIController", Dict[str, str], IndexWriter]], printVerbose: bool = False, showRetries: bool = False, jobs: int = 1, output: TextIO = None) -> List[int]:
+        """Downloads the files of several packages, given as (controller, packagesToDownload, indexWriter), through a single pool of up to 'jobs' workers. The index of each package is only updated from the calling thread, as its downloads complete. See LocalPyPIController.output for 'output'.
+
+        Returns the number of files actually downloaded for each package."""
+
+        actuallyDownloadedPackages: List[int] = [0] * len(packages)
+        packagesToDownloadCount: int = sum(len(packagesToDownload) for _, packagesToDownload, _ in packages)
+
+        if packagesToDownloadCount == 0:
+            print("No new packages in the remote to download.", file=output)
         else:
-            print(str(len(packagesToDownload)) + " new packages available in the remote.")
+            print(str(packagesToDownloadCount) + " new packages available in the remote.", file=output)
 
-            with tqdm(total=len(packagesToDownload), desc="Download", ncols=100, position=0, leave=True, colour="green") as progressBar:
-                for fileName, fileLink in packagesToDownload.items():
-                    ok, status, content = self._networkManager.getLink(fileLink, printVerbose=printVerbose, showRetries=showRetries)
-                    if not ok:
-                        print("\nUNABLE TO DOWNLOAD PACKAGE '" + fileName + "' (URL: " + fileLink + ")\n\tSTATUS: " + status + "\n")
-                    else:
-                        with open(self.packageLocalPath + fileName, "wb") as f:
-                            f.write(content)
+            from tqdm import tqdm
 
-                        updatedHTML = self._addPackagesToIndex(updatedHTML, htmlFile, {"./" + fileName: fileName})
+            with tqdm(total=packagesToDownloadCount, desc="Download", ncols=100, position=0, leave=True, colour="green", disable=output is not None) as progressBar:
+                with ThreadPoolExecutor(max_workers=jobs) as executor:
+                    futures = {executor.submit(controller._downloadFile, fileName, fileLink, printVerbose, showRetries): index for index, (controller, packagesToDownload, _) in enumerate(packages) for fileName, fileLink in packagesToDownload.items()}
 
-                        actuallyDownloadedPackages += 1
+                    for future in as_completed(futures):
+                        index: int = futures[future]
+                        controller, _, indexWriter = packages[index]
 
-                    progressBar.update(1)
+                        fileName, fileLink, ok, status, sha256 = future.result()
+                        if not ok:
+                            print("\nUNABLE TO DOWNLOAD PACKAGE '" + fileName + "' (URL: " + fileLink + ")\n\tSTATUS: " + status + "\n", file=output)
+                            controller._getResult().addFailed(fileName, status)
+                        else:
+                            downloadedFileRecord: FileRecord = controller._getLocalFileRecord(controller.packageName, controller._remoteFileRecords.get(fileName, FileRecord(fileName, fileLink)), sha256)
+                            indexWriter.addFiles(controller.packageName, [downloadedFileRecord], {fileName: urldefrag(fileLink)[0]}, controller._getFilterProfile())
+                            controller._getResult().addDownloaded(fileName, downloadedFileRecord.size)
 
-        print()
-        print(str(actuallyDownloadedPackages) + "/" + str(len(packagesToDownload)) + " downloaded.")
+                            actuallyDownloadedPackages[index] += 1
+
+                        progressBar.update(1)
+
+        print(file=output)
+        print(str(sum(actuallyDownloadedPackages)) + "/" + str(packagesToDownloadCount) + " downloaded.", file=output)
+
+        return actuallyDownloadedPackages
 
 
 class Add(LocalPyPIController):
@@ -325,25 +699,64 @@ class Add(LocalPyPIController):
         self.includeRCs = args.includeRCs
         self.includePlatformSpecific = args.includePlatformSpecific
 
+        self.jobs = args.jobs
+        self.poolSize = args.poolSize
+
+        self.segments = args.segments
+        self.segmentThreshold = args.segmentThreshold
+
+        self.retries = args.retries
+        self.backoff = args.backoff
+        self.maxBackoff = args.maxBackoff
+
+        self.limitRate = args.limitRate
+        self.maxRequestsPerSecond = args.maxRequestsPerSecond
+
+        if args.blobStorePath:
+            self.blobStore = BlobStore(args.blobStorePath)
+
+        self.upstreams = args.upstreams
+        self.pageTTL = args.pageTTL
         self.dryRun = args.dryRun
 
-        # 2. Use only the ones we have set:
+        # 2. Use only the ones we have set (the network ones, in configureNetworkManager):
         self._htmlManager.setFlags(self.printAllFileNames, self.onlySources, self.includeDevs, self.includeRCs, self.includePlatformSpecific, self.packageVersion)
 
         if (self.includeDevs or self.includeRCs) and self._htmlManager.areWheelFiltersEnabled():
-            print("\tWARNING! Development releases (devX) or release candidates (RCs) flags are enabled, as well as the wheel filters, so they could be discarded anyway. This is caused because of the order of application: (1st) flags, (2nd) wheel filters.")
-            print("\tPLEASE, CHECK OUT YOUR WHEEL FILTERS.")
+            self._print("\tWARNING! Development releases (devX) or release candidates (RCs) flags are enabled, as well as the wheel filters, so they could be discarded anyway. This is caused because of the order of application: (1st) flags, (2nd) wheel filters.")
+            self._print("\tPLEASE, CHECK OUT YOUR WHEEL FILTERS.")
 
-        if self.dryRun:
-            shutil.copytree(self.pypiLocalPath, self._dryRunsTmpDir)
-            self.pypiLocalPath = self._dryRunsTmpDir
+    def _getNetworkSettings(self) -> Tuple:
+        """The options configuring the network manager and the download pool, which have to be the same for all the packages added in a run."""
+
+        return (self.upstreams, self.pageTTL, self.jobs, self.poolSize, self.segments, self.segmentThreshold, self.retries, self.backoff, self.maxBackoff, self.limitRate, self.maxRequestsPerSecond, self.printVerbose, self.showRetries, self.dryRun)
+
+    def configureNetworkManager(self):
+        """Applies the network options (upstreams, retries, connection pool, segments, rate limits and page TTL) to the network manager. Done once per run, since the network manager is shared by all the controllers of the run, and reconfiguring it drops its connections."""
+
+        from pypickup.utils.networkManager import RetryPolicy
+
+        self._networkManager.upstreams = self.upstreams
+        self._networkManager.pageTTL = self.pageTTL
+        self._networkManager.poolSize = max(self.poolSize, self.jobs + self.segments)
+        self._networkManager.setSegmentation(self.segments, int(self.segmentThreshold))
+        self._networkManager.retryPolicy = RetryPolicy(retries=self.retries, backoffFactor=self.backoff, maxBackoff=self.maxBackoff)
+        self._networkManager.setRateLimits(self.limitRate, self.maxRequestsPerSecond)
+
+    @property
+    def _pageCache(self) -> HTTPCache:
+        """The cache of the remote pages, unless running dry, in which nothing is written in the local repository."""
+
+        return self.httpCache if not self.dryRun else None
 
     def validPackageName(self) -> bool:
         """Checks whether the package link exists or not. If not, it returns False. True otherwise."""
 
-        ok, status, _ = self._networkManager.getLink(self._remotePypiBaseDir + self.packageName)
+        ok, _, status, _, _ = self._getRemoteProjectPage(self._pageCache)
         if not ok:
-            print(status)
+            self._print(status)
+            self._getResult().status = "not found"
+            self._getResult().message = status
             return False
 
         return True
@@ -365,46 +778,91 @@ class Add(LocalPyPIController):
         self.__createFileIfNeeded(self.baseHTMLFileFullName)
 
     def addNewPackageToIndex(self):
-        """Adds the self.packageName package to the base HTML index, if not exists already."""
+        """Adds the self.packageName package to the catalog and the base index, if not exists already."""
 
-        baseHTMLFile = open(self.baseHTMLFileFullName, "r+")
-        htmlContent: str = baseHTMLFile.read()
+        self.catalog.addPackage(self.packageName)
+        self._getIndexWriter().writeBaseIndex()
 
-        if len(htmlContent) == 0:
-            htmlContent = self._htmlManager.getBaseHTML()
+        self._getResult().status = "added"
 
-        _, htmlUpdated = self._htmlManager.insertHTMLEntry(htmlContent, "a", self.packageName, {"href": "./" + self.packageName})
+    def getRemoteFileRecords(self) -> Dict[str, FileRecord]:
+        """Gets and filters the remote files of self.packageName, the file name in the key. None if the remote could not be retrieved."""
 
-        self._writeFileFromTheStart(baseHTMLFile, htmlUpdated)
+        ok, _, status, pypiPackagePage, contentType = self._getRemoteProjectPage(self._pageCache)
+        if not ok:
+            self._print(status)
+            self._getResult().status = "error"
+            self._getResult().message = status
+            return None
 
-        baseHTMLFile.close()
+        remoteFileRecords: Dict[str, FileRecord] = self._getFileRecords(pypiPackagePage, contentType, self.remotePackageURL)
 
-    def getPackage(self):
-        """Downloads all the files for the required package 'packageName', i.e. all the .whl, the .zip and the .tar.gz if necessary."""
+        if self.printAllFileNames:
+            self._printPackageNamesInHTML(list(remoteFileRecords.keys()), "\nRetrieved package files (before filtering)")
 
-        ok, status, pypiPackageHTML = self._networkManager.getLink(self._remotePypiBaseDir + self.packageName)
-        if not ok:
-            print(status)
-        else:
-            pypiPackageHTMLStr: str = pypiPackageHTML.decode("utf-8")
+        self._remoteFileRecords = self._htmlManager.filterFileRecords(remoteFileRecords, self._regexZIPAndTars)
 
-        if self.printAllFileNames:
-            packageFiles: List[str] = list(self._htmlManager.getHRefsList(pypiPackageHTMLStr).keys())
-            self._printPackageNamesInHTML(packageFiles, "\nRetrieved package files (before filtering)")
+        return self._remoteFileRecords
+
+    def getNewPackageDownloads(self) -> Dict[str, str]:
+        """Gets and filters the remote files of the new package self.packageName, and initializes its local index. Returns the links to download (by file name), or None if the remote could not be retrieved."""
+
+        remoteFileRecords: Dict[str, FileRecord] = self.getRemoteFileRecords()
+        if remoteFileRecords is None:
+            return None
 
-        pypiPackageHTMLStr = self._htmlManager.filterInHTML(pypiPackageHTMLStr, self._regexZIPAndTars)
-        linksToDownload: Dict[str, str] = self._htmlManager.getHRefsList(pypiPackageHTMLStr)
+        linksToDownload: Dict[str, str] = {fileName: fileRecord.link for fileName, fileRecord in remoteFileRecords.items()}
 
         if self.printAllFileNames:
             self._printPackageNamesInHTML(list(linksToDownload.keys()), "\nTo-be-downloaded package files (after filtering)")
 
-        packageBaseHTML: str = self._htmlManager.getBaseHTML()
-        _, packageBaseHTML = self._htmlManager.insertHTMLEntry(packageBaseHTML, "h1", "Links for " + self.packageName, {})
-        with open(self.packageHTMLFileFullName, "w") as packageHTML_file:
-            packageHTML_file.write(packageBaseHTML)
+        if not self.dryRun:
+            self._getIndexWriter().writePackageIndex(self.packageName)
+
+        return linksToDownload
+
+    def getPackage(self):
+        """Downloads all the files for the required package 'packageName', i.e. all the .whl, the .zip and the .tar.gz if necessary."""
+
+        linksToDownload: Dict[str, str] = self.getNewPackageDownloads()
+        if linksToDownload is None:
+            return
+
+        downloadedPackages: int = self._downloadFilesInLocalPath(linksToDownload, printVerbose=self.printVerbose, showRetries=self.showRetries, jobs=self.jobs)
+
+        self.finishSync(downloadedPackages, len(linksToDownload))
+
+    def finishSync(self, downloadedPackages: int, packagesToDownload: int):
+        """Records the synchronization of self.packageName as complete, so it is skipped until something changes, if all its files were downloaded."""
+
+        if downloadedPackages == packagesToDownload:
+            self.httpCache.setSyncFingerprint(self.remotePackageURL, self.__getSyncFingerprint())
+
+    def _getFilterProfile(self) -> str:
+        """Digest of the filtering flags and the wheel filters settings."""
+
+        filterProfile = hashlib.sha256()
+        filterProfile.update(repr((self.onlySources, self.includeDevs, self.includeRCs, self.includePlatformSpecific, self.packageVersion, self._regexZIPAndTars)).encode("utf-8"))
+
+        wheelFiltersSettingsFilePath: str = self._htmlManager.getWheelFiltersSettingsFilePath()
+        if os.path.exists(wheelFiltersSettingsFilePath):
+            with open(wheelFiltersSettingsFilePath, "rb") as file:
+                filterProfile.update(file.read())
+
+        return filterProfile.hexdigest()
+
+    def __getSyncFingerprint(self) -> str:
+        """Digest of everything the result of a synchronization depends on, apart from the remote index itself: the filter profile and the local package index."""
+
+        fingerprint = hashlib.sha256()
+        fingerprint.update(self._getFilterProfile().encode("utf-8"))
+
+        if os.path.exists(self.packageHTMLFileFullName):
+            with open(self.packageHTMLFileFullName, "rb") as file:
+                fingerprint.update(file.read())
+
+        return fingerprint.hexdigest()
 
-            self._downloadFilesInLocalPath(linksToDownload, packageBaseHTML, packageHTML_file, printVerbose=self.printVerbose, showRetries=self.showRetries)
-        
     def __checkPackagesInLocalButNotInRemote(self, remoteIndexHRefs: Dict[str, str], localIndexHRefs: Dict[str, str]) -> str:
         additionalPackagesMessage: str = ""
         for localPackageName, localPackageURL in localIndexHRefs.items():
@@ -427,39 +885,137 @@ class Add(LocalPyPIController):
         if not self.packageVersion:
             additionalPackagesMessage: str = self.__checkPackagesInLocalButNotInRemote(remoteIndexHRefs, localIndexHRefs)
             if additionalPackagesMessage != "":
-                print("WARNING! " + additionalPackagesMessage)
+                self._print("WARNING! " + additionalPackagesMessage)
 
         return resultingDict
 
-    def getPackageDiff(self):
-        """Synchronize the self.packageName against the PyPI remote repository, i.e. it downloads only the new packages available or, in general terms, the ones fulfiling the currently active filters."""
+    def getPackageDiffDownloads(self) -> Dict[str, str]:
+        """Gets and filters the remote files of the already existing package self.packageName. Returns the links of the ones not in the catalog yet (by file name), or None if there is nothing to do."""
 
-        ok, status, pypiRemoteIndex = self._networkManager.getLink(self._remotePypiBaseDir + self.packageName)
+        ok, modified, status, pypiRemoteIndex, contentType = self._getRemoteProjectPage(self._pageCache)
         if not ok:
-            print(status)
-        else:
-            pypiRemoteIndexStr: str = pypiRemoteIndex.decode("utf-8")
+            self._print(status)
+            self._getResult().status = "error"
+            self._getResult().message = status
+            return None
 
-        if self.printAllFileNames:
-            packageFiles: List[str] = list(self._htmlManager.getHRefsList(pypiRemoteIndexStr).keys())
-            self._printPackageNamesInHTML(packageFiles, "\nRetrieved package files (before filtering)")
+        if not modified and not self.dryRun and self.httpCache.getSyncFingerprint(self.remotePackageURL) == self.__getSyncFingerprint():
+            self._print("The remote index has not changed since the last synchronization. Nothing to do.")
+            self._getResult().status = "up to date"
+            return None
 
-        with open(self.packageHTMLFileFullName, "r") as pypiLocalIndexFile:
-            pypiLocalIndex: str = pypiLocalIndexFile.read()
+        remoteFileRecords: Dict[str, FileRecord] = self._getFileRecords(pypiRemoteIndex, contentType, self.remotePackageURL)
 
-        pypiRemoteIndexFiltered: str = self._htmlManager.filterInHTML(pypiRemoteIndexStr, self._regexZIPAndTars)
+        if self.printAllFileNames:
+            self._printPackageNamesInHTML(list(remoteFileRecords.keys()), "\nRetrieved package files (before filtering)")
+
+        remoteFileRecords = self._htmlManager.filterFileRecords(remoteFileRecords, self._regexZIPAndTars)
+        self._remoteFileRecords = remoteFileRecords
 
-        remoteIndexHRefs: Dict[str, str] = self._htmlManager.getHRefsList(pypiRemoteIndexFiltered)
-        localIndexHRefs: Dict[str, str] = self._htmlManager.getHRefsList(pypiLocalIndex)
+        remoteIndexHRefs: Dict[str, str] = {fileName: fileRecord.link for fileName, fileRecord in remoteFileRecords.items()}
+        localIndexHRefs: Dict[str, str] = {fileName: fileRecord.link for fileName, fileRecord in self.catalog.getFiles(self.packageName).items()}
         newPackagesToDownload: Dict[str, str] = self.__getNewPackagesInRemote(remoteIndexHRefs, localIndexHRefs)
 
+        self._getResult().addSkipped([fileName for fileName in remoteIndexHRefs if fileName in localIndexHRefs])
+        self._getResult().status = "updated" if len(newPackagesToDownload) > 0 else "up to date"
+
         if self.printAllFileNames:
             self._printPackageNamesInHTML(list(remoteIndexHRefs.keys()), "\nIn-the-remote package files (after filtering)")
             self._printPackageNamesInHTML(list(localIndexHRefs.keys()), "\nIn-the-local package files")
             self._printPackageNamesInHTML(list(newPackagesToDownload.keys()), "\nTo-be-downloaded package files (after filtering, in-the-remote minus in-the-local ones)")
 
-        with open(self.packageHTMLFileFullName, "r+") as pypiLocalIndexFile:
-            self._downloadFilesInLocalPath(newPackagesToDownload, pypiLocalIndex, pypiLocalIndexFile, printVerbose=self.printVerbose, showRetries=self.showRetries)
+        return newPackagesToDownload
+
+    def getPackageDiff(self):
+        """Synchronize the self.packageName against the PyPI remote repository, i.e. it downloads only the new packages available or, in general terms, the ones fulfiling the currently active filters."""
+
+        newPackagesToDownload: Dict[str, str] = self.getPackageDiffDownloads()
+        if newPackagesToDownload is None:
+            return
+
+        downloadedPackages: int = self._downloadFilesInLocalPath(newPackagesToDownload, printVerbose=self.printVerbose, showRetries=self.showRetries, jobs=self.jobs)
+
+        self.finishSync(downloadedPackages, len(newPackagesToDownload))
+
+    def planPackage(self):
+        """Prints what adding (or synchronizing) self.packageName would do: the index entries to add and the files to download, with their sizes. Only the remote index is retrieved; nothing is written."""
+
+        isNewPackage: bool = not self.packageExists()
+
+        linksToDownload: Dict[str, str] = self.getNewPackageDownloads() if isNewPackage else self.getPackageDiffDownloads()
+        if linksToDownload is None:
+            return
+
+        indexEntries: Dict[str, List[str]] = {"to add": (["./" + self.packageName + " (main index)"] if isNewPackage else list()) + list(linksToDownload.keys())}
+        filesToDownload: List[FileRecord] = [self._remoteFileRecords.get(fileName, FileRecord(fileName, link)) for fileName, link in linksToDownload.items()]
+
+        self._printDryRunPlan("Plan for '" + self.packageName + "':", indexEntries, {"to download": filesToDownload})
+        self._getResult().status = "planned"
+
+    def prefetchRemoteProjectPages(self, packageNames: List[str]):
+        """Retrieves the remote pages of all the 'packageNames' concurrently (up to self.jobs at a time), so they are already memoized by the time each package is processed."""
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for _ in executor.map(lambda packageName: self._networkManager.getUpstreamProjectPage(packageName, self._pageCache, showRetries=self.showRetries), packageNames):
+                pass
+
+    @staticmethod
+    def downloadPackagesFiles(packageDownloads: List[Tuple["Add", Dict[str, str]]], printVerbose: bool = False, showRetries: bool = False, jobs: int = 1, output: TextIO = None):
+        """Downloads the files of several packages, given as (controller, linksToDownload), through a single pool of up to 'jobs' workers, and finishes the synchronization of each one. See LocalPyPIController.output for 'output'."""
+
+        with ExitStack() as stack:
+            packages = [(controller, linksToDownload, stack.enter_context(controller._getIndexWriter())) for controller, linksToDownload in packageDownloads]
+
+            downloadedPackages: List[int] = LocalPyPIController._downloadFilesOfPackages(packages, printVerbose, showRetries, jobs, output)
+
+        for (controller, linksToDownload), downloaded in zip(packageDownloads, downloadedPackages):
+            controller.finishSync(downloaded, len(linksToDownload))
+
+    @staticmethod
+    def addPackages(controllers: List["Add"]):
+        """Adds (or synchronizes) the package of each controller: the remote indices of all of them are retrieved upfront, concurrently, and all their files are downloaded at the end through a single pool of workers.
+
+        The network and download options (see _getNetworkSettings) have to be the same for all the controllers, and are applied once; the filtering ones (e.g. onlySources or the version) are per package."""
+
+        if len(controllers) == 0:
+            return
+
+        differentPackages: List[str] = [controllerInstance.packageName for controllerInstance in controllers if controllerInstance._getNetworkSettings() != controllers[0]._getNetworkSettings()]
+        if len(differentPackages) > 0:
+            raise InvalidInputError("Add::addPackages - The packages added together must share the network and download options (e.g. upstreams, jobs or retries), unlike " + ", ".join(differentPackages) + ".")
+
+        controllers[0].configureNetworkManager()
+        controllers[0].prefetchRemoteProjectPages([controllerInstance.packageName for controllerInstance in controllers])
+
+        packageDownloads: List[Tuple[Add, Dict[str, str]]] = list()
+        for controllerInstance in controllers:
+            controllerInstance._print("Adding '" + controllerInstance.packageName + "' to the local index (" + os.path.abspath(controllerInstance.pypiLocalPath) + "/" + "):")
+            if controllerInstance.validPackageName():
+                if controllerInstance.dryRun:
+                    controllerInstance.planPackage()
+                    controllerInstance._print()
+                    continue
+
+                controllerInstance.initLocalRepo()
+
+                if not controllerInstance.packageExists():
+                    controllerInstance.addNewPackageToIndex()
+                    linksToDownload: Dict[str, str] = controllerInstance.getNewPackageDownloads()
+                else:
+                    linksToDownload = controllerInstance.getPackageDiffDownloads()
+
+                if linksToDownload is not None:
+                    packageDownloads.append((controllerInstance, linksToDownload))
+            else:
+                controllerInstance._print("Package " + controllerInstance.packageName + " does not exist in the remote repository (" + controllerInstance.remotePyPIRepository + ")")
+
+            controllerInstance._print()
+
+        if controllers[0].dryRun:
+            return
+
+        controllers[0]._print("Downloading the files of " + str(len(packageDownloads)) + " packages:")
+        Add.downloadPackagesFiles(packageDownloads, printVerbose=controllers[0].printVerbose, showRetries=controllers[0].showRetries, jobs=controllers[0].jobs, output=controllers[0].output)
 
 
 class Remove(LocalPyPIController):
@@ -469,28 +1025,15 @@ class Remove(LocalPyPIController):
     def parseScriptArguments(self, args: argparse.ArgumentParser):
         LocalPyPIController.parseScriptArguments(self, args)
 
-        # 1. Set all the params we are going to use (let the ones we don't to None):
         self.dryRun = args.dryRun
 
-        # 2. Use only the ones we have set:
-        if self.dryRun:
-            shutil.copytree(self.pypiLocalPath, self._dryRunsTmpDir)
-            self.pypiLocalPath = self._dryRunsTmpDir
+    def __removeWholePackage(self):
+        self.catalog.removePackage(self.packageName)
+        self._getIndexWriter().writeBaseIndex()
 
-    def __removeWholePackage(self, htmlFile: TextIOWrapper):
-        htmlFile.seek(0)
-
-        _, updatedHTML = self._htmlManager.removeHTMLEntry(htmlFile.read(), "a", self.packageName)
-        self._writeFileFromTheStart(htmlFile, updatedHTML)
-
-    def __removePackages(self, htmlFile: TextIOWrapper, subPackages: List[str]):
-        htmlFile.seek(0)
-
-        updatedHTML: str = htmlFile.read()
-        for subpackage in subPackages:
-            _, updatedHTML = self._htmlManager.removeHTMLEntry(updatedHTML, "a", subpackage)
-        
-        self._writeFileFromTheStart(htmlFile, updatedHTML)
+    def __removePackages(self, subPackages: List[str]):
+        self.catalog.removeFiles(self.packageName, subPackages)
+        self._getIndexWriter().writePackageIndex(self.packageName)
 
         # Actually remove the package after having updated the index
         for subpackage in subPackages:
@@ -499,16 +1042,13 @@ class Remove(LocalPyPIController):
     def removePackage(self):
         """Removes the specified version for the self.packageName from the local repository, or the whole package if it has not being specified. Assumes that the package exists."""
 
-        baseHTMLFile = open(self.baseHTMLFileFullName, "r+")
-        packageExist = self._htmlManager.existsHTMLEntry(baseHTMLFile.read(), "a", self.packageName)
-
-        if not packageExist:
-            print("Package '" + self.packageName + "' was not being tracked yet.")
+        if not self.packageExists():
+            self._print("Package '" + self.packageName + "' was not being tracked yet.")
+            self._getResult().status = "not tracked"
             return
 
-        localPackageHTMLFile = open(self.packageHTMLFileFullName, "r+")
-        localPackageHTMLIndex = localPackageHTMLFile.read()
-        currentLocalPackages = self._htmlManager.getHRefsList(localPackageHTMLIndex).keys()
+        currentLocalFiles: Dict[str, FileRecord] = self.catalog.getFiles(self.packageName)
+        currentLocalPackages = currentLocalFiles.keys()
 
         localSubPackagesToRemove: List[str] = list()
         for package in currentLocalPackages:
@@ -516,20 +1056,24 @@ class Remove(LocalPyPIController):
                 localSubPackagesToRemove.append(package)
         
         removeWholePackage: bool = len(localSubPackagesToRemove) == len(currentLocalPackages)
+        if self.dryRun:
+            indexEntries: Dict[str, List[str]] = {"to remove": (["./" + self.packageName + " (main index)"] if removeWholePackage else list()) + localSubPackagesToRemove}
+            self._printDryRunPlan("Plan for '" + self.packageName + "':", indexEntries, {"to delete": [currentLocalFiles[fileName] for fileName in localSubPackagesToRemove]})
+            self._getResult().status = "planned"
+            return
+
         if removeWholePackage:
-            self.__removeWholePackage(baseHTMLFile)
+            self.__removeWholePackage()
         else:
-            self.__removePackages(localPackageHTMLFile, localSubPackagesToRemove)
-
-        # Must close files in case the whole directory (package) needs to be erased
-        localPackageHTMLFile.close()
-        baseHTMLFile.close()
+            self.__removePackages(localSubPackagesToRemove)
 
-        print("Subpackages from package '" + self.packageName + "' successfully removed:\n" + '\n'.join(localSubPackagesToRemove) + "\n")
+        self._print("Subpackages from package '" + self.packageName + "' successfully removed:\n" + '\n'.join(localSubPackagesToRemove) + "\n")
+        self._getResult().addRemoved(localSubPackagesToRemove)
+        self._getResult().status = "removed"
 
         if removeWholePackage:
             self._removeDir(self.packageLocalPath, True)
-            print("Whole package '" + self.packageName + "' successfully removed.")
+            self._print("Whole package '" + self.packageName + "' successfully removed.")
             
         
 class List(LocalPyPIController):
@@ -539,6 +1083,13 @@ class List(LocalPyPIController):
     def parseScriptArguments(self, args: argparse.ArgumentParser):
         LocalPyPIController.parseScriptArguments(self, args)
 
+        self.pageTTL = args.pageTTL
+
+        # The network manager is only needed (and thus loaded) to list the remote
+        if args.remote:
+            self._setUpstreams(args.upstreams)
+            self._networkManager.pageTTL = self.pageTTL
+
     def filterByVersion(self, packagesList) -> List[str]:
         resultingList: List[str] = list()
         for packageName in packagesList:
@@ -550,44 +1101,39 @@ class List(LocalPyPIController):
     def listPackagesInTheRemote(self):
         self._htmlManager.setFlags(None, None, None, None, None, self.packageVersion)
 
-        ok, status, pypiPackageHTML = self._networkManager.getLink(self._remotePypiBaseDir + self.packageName)
+        ok, _, status, pypiPackagePage, contentType = self._getRemoteProjectPage(self.httpCache if self.pageTTL > 0 else None)
         if not ok:
-            print(status)
-        else:
-            pypiPackageHTMLStr: str = pypiPackageHTML.decode("utf-8")
+            self._print(status)
+            return
 
-        packageFiles: List[str] = self._htmlManager.getHRefsList(pypiPackageHTMLStr).keys()
+        packageFiles: List[str] = self._getFileRecords(pypiPackagePage, contentType, self.remotePackageURL).keys()
 
         filteredPackageFiles = self.filterByVersion(packageFiles)
         filteredPackageFiles.sort()
 
-        print("Found " + str(len(filteredPackageFiles)) + " packages (IN THE REMOTE, i.e. NOT DOWNLOADED - perform the 'add' command to add the the package to the local repository):")
-        print('\n'.join(filteredPackageFiles))
+        self._print("Found " + str(len(filteredPackageFiles)) + " packages (IN THE REMOTE, i.e. NOT DOWNLOADED - perform the 'add' command to add the the package to the local repository):")
+        self._print('\n'.join(filteredPackageFiles))
 
     def listPackages(self):
         """Lists all the packages in the root HTML index, if self.packageName == None. Lists the downloaded files for package self.packageName otherwise."""
 
         printMessage: str = ""
 
-        htmlString: str = ""
+        packageFiles: List[str] = list()
         if self.packageName == "":
-            with open(self.baseHTMLFileFullName, "r") as baseHTMLFile:
-                htmlString = baseHTMLFile.read()
+            packageFiles = self.catalog.getPackages()
 
             printMessage = "Found {} packages:"
         else:
-            with open(self.packageHTMLFileFullName, "r") as packageHTMLFile:
-                htmlString = packageHTMLFile.read()
+            packageFiles = list(self.catalog.getFiles(self.packageName).keys())
 
             printMessage = "Found {} files for package '" + str(self.packageVersion if self.packageVersion else self.packageName) + "':"
 
-        packageFiles: List[str] = self._htmlManager.getHRefsList(htmlString).keys()
-
         filteredPackageFiles = self.filterByVersion(packageFiles)
         filteredPackageFiles.sort()
         
-        print(printMessage.format(len(filteredPackageFiles)))
-        print('\n'.join(filteredPackageFiles))
+        self._print(printMessage.format(len(filteredPackageFiles)))
+        self._print('\n'.join(filteredPackageFiles))
 
 class Config(LocalPyPIController):
     def __init__(self):
@@ -650,58 +1196,398 @@ class Config(LocalPyPIController):
 
 
 class RebuildIndex(LocalPyPIController):
+
+    """
+    A class to rebuild the indices of a local repository from the files actually in it.
+
+    Rebuilding all of them is incremental: the manifest of each package directory (its modification time and a digest of the name, size and modification
+    time of its files) is recorded in the catalog, and packages whose directory has not changed since their last rebuild are skipped. The rest are scanned
+    and their indices regenerated in a pool of processes.
+    """
+
+    _rebuildChunkSize: int = 64
+
     def __init__(self):
         LocalPyPIController.__init__(self)
 
+        self._force: bool = False
+
+    @property
+    def force(self):
+        return self._force
+
+    @force.setter
+    def force(self, new_force: bool):
+        self._force = new_force
+
     def parseScriptArguments(self, args: argparse.ArgumentParser):
         LocalPyPIController.parseScriptArguments(self, args)
 
-    def __getDirectoriesInLocal(self):
-        dirsAndFileNames: List[str] = os.listdir(self.pypiLocalPath)
-        return [el for el in dirsAndFileNames if el != "settings" and "index.html" not in el]
+        self.jobs = args.jobs if args.jobs is not None else os.cpu_count() or 1
+        self.force = args.force
 
-    def __rebuildMainIndex(self):
-        baseHTML: str = self._htmlManager.getBaseHTML()
+    def __getDirectoriesInLocal(self) -> Dict[str, int]:
+        """Returns the package directories of the local repository along with their modification time (in ns)."""
 
-        directories: List[str] = self.__getDirectoriesInLocal()
+        with os.scandir(self.pypiLocalPath) as entries:
+            return {entry.name: entry.stat().st_mtime_ns for entry in entries if entry.name != "settings" and not entry.name.startswith(".") and entry.is_dir()}
 
-        with open(self.baseHTMLFileFullName, "r+") as baseHTMLFile:
-            self._addPackagesToIndex(baseHTML, baseHTMLFile, {"./" + dir:dir for dir in directories})
+    def __rebuildMainIndex(self) -> Dict[str, int]:
+        directories: Dict[str, int] = self.__getDirectoriesInLocal()
 
-        print("Main index rebuilt.")
+        self.catalog.setPackages(list(directories.keys()))
+        self._getIndexWriter().writeBaseIndex()
+
+        self._print("Main index rebuilt.")
 
         return directories
-    
-    def __getSubpackagesForPackage(self, packageLocalPath: str):
-        subpackagesList: List[str] = os.listdir(packageLocalPath)
-        return [file for file in subpackagesList if re.match(self._regexZIPAndTars, file) or ".whl" in file]
 
-    def __rebuildIndexForPackage(self, package: str):
-        packageLocalPath: str = os.path.join(self.pypiLocalPath, package) + "/"
-        packageHTMLFileFullName: str = os.path.join(packageLocalPath, self._packageHTMLFileName)
+    @staticmethod
+    def _rebuildPackageIndex(pypiLocalPath: str, packageName: str, knownFileRecords: Dict[str, FileRecord], knownDigest: str = None) -> Tuple:
+        """Scans the directory of the package and, unless the digest of its listing is 'knownDigest' and its indices exist, regenerates them from its files. The metadata in 'knownFileRecords' (e.g. their hashes) is kept, so the files do not need to be hashed again.
 
-        baseHTML: str = self._htmlManager.getBaseHTML()
+        Returns the package name, its file records (None if skipped) and the new manifest of its directory (mtime and digest). Runs in the worker processes, so it does not touch the catalog.
+        """
 
-        subpackages: List[str] = self.__getSubpackagesForPackage(packageLocalPath)
+        packageLocalPath: str = os.path.join(pypiLocalPath, packageName)
 
-        _, baseHTML = self._htmlManager.insertHTMLEntry(baseHTML, "h1", "Links for " + self.packageName, {})
-        with open(packageHTMLFileFullName, "w") as packageHTML_file:
-            self._addPackagesToIndex(baseHTML, packageHTML_file, {"./" + subpackage:subpackage for subpackage in subpackages})
-        
-        print("Index for '" + package + "' rebuilt.")
+        with os.scandir(packageLocalPath) as entries:
+            subpackages: List[Tuple[str, int, int]] = sorted((entry.name, entry.stat().st_size, entry.stat().st_mtime_ns) for entry in entries if entry.is_file() and (re.match(RebuildIndex._regexZIPAndTars, entry.name) or entry.name.endswith(".whl")))
+
+        digest: str = hashlib.sha256(repr(subpackages).encode("utf-8")).hexdigest()
+
+        indexWriter = IndexWriter(None, pypiLocalPath, RebuildIndex._htmlManager, RebuildIndex._jsonManager)
+        indicesExist: bool = all(os.path.exists(os.path.join(packageLocalPath, fileName)) for fileName in [indexWriter._htmlFileName, indexWriter._jsonFileName])
+
+        fileRecords: List[FileRecord] = None
+        if digest != knownDigest or not indicesExist:
+            fileRecords = list()
+            for subpackage, size, _ in subpackages:
+                knownFileRecord: FileRecord = knownFileRecords.get(subpackage, FileRecord(subpackage, "./" + subpackage))
+                fileRecords.append(FileRecord(subpackage, "./" + subpackage, hashes=knownFileRecord.hashes, requiresPython=knownFileRecord.requiresPython, yanked=knownFileRecord.yanked, size=size, uploadTime=knownFileRecord.uploadTime))
+
+            indexWriter.writePackageIndex(packageName, fileRecords)
+
+        # Writing the indices changes the modification time of the directory
+        return packageName, fileRecords, os.stat(packageLocalPath).st_mtime_ns, digest
+
+    def __applyRebuiltPackages(self, rebuiltPackages) -> int:
+        """Records the results of _rebuildPackageIndex in the catalog. Returns the number of packages whose indices were actually rebuilt."""
+
+        rebuilt: int = 0
+        manifests: Dict[str, Tuple[int, str]] = dict()
+
+        for packageName, fileRecords, mtime, digest in rebuiltPackages:
+            if fileRecords is not None:
+                self.catalog.setFiles(packageName, fileRecords)
+                self._print("Index for '" + packageName + "' rebuilt.")
+                rebuilt += 1
+
+            self._getResult(packageName).status = "rebuilt" if fileRecords is not None else "unchanged"
+
+            manifests[packageName] = (mtime, digest)
+
+        self.catalog.setManifests(manifests)
+
+        return rebuilt
 
     def rebuildAllIndices(self):
-        print()
+        self._print()
+
+        currentPackages: Dict[str, int] = self.__rebuildMainIndex()
+        knownManifests: Dict[str, Tuple[int, str]] = self.catalog.getManifests() if not self.force else dict()
+
+        # The modification time of a directory only changes when files are added, removed or renamed in it; if it did, the digest of its listing tells whether they are actually different
+        packagesToScan: List[str] = [package for package, mtime in currentPackages.items() if package not in knownManifests or knownManifests[package][0] != mtime]
+        tasks = [(self.pypiLocalPath, package, self.catalog.getFiles(package), knownManifests[package][1] if package in knownManifests else None) for package in packagesToScan]
+
+        if self.jobs > 1 and len(tasks) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(tasks))) as executor:
+                rebuilt: int = self.__applyRebuiltPackages(executor.map(self._rebuildPackageIndex, *zip(*tasks), chunksize=self._rebuildChunkSize))
+        else:
+            rebuilt = self.__applyRebuiltPackages(self._rebuildPackageIndex(*task) for task in tasks)
 
-        currentPackages: List[str] = self.__rebuildMainIndex()
-        
         for package in currentPackages:
-            self.__rebuildIndexForPackage(package)
+            if package not in packagesToScan:
+                self._getResult(package).status = "unchanged"
+
+        self._print("\n" + str(rebuilt) + " indices rebuilt, " + str(len(currentPackages) - rebuilt) + " unchanged.")
     
     def rebuildIndex(self):
-        print()
+        self._print()
         
         if self.packageName == "":
             self.__rebuildMainIndex()
         else:
-            self.__rebuildIndexForPackage(self.packageName)
\ No newline at end of file
+            self.__applyRebuiltPackages([self._rebuildPackageIndex(self.pypiLocalPath, self.packageName, self.catalog.getFiles(self.packageName))])
+
+
+class Serve(LocalPyPIController):
+
+    """
+    A class to serve the local repository over HTTP, as a PEP 503/691 simple index, with an IndexServer.
+
+    As a proxy, it is a pull-through cache of the upstreams: the project pages list the upstream files (filtered as 'add' would, with the 'proxyArguments'
+    of the 'add' command) along with the local ones, and the files requested are downloaded into the local repository and recorded in its indices. The
+    upstream files of a project are retrieved again once they are older than 'proxyTTL' seconds. Only the 'cacheSize' projects requested last are kept track of.
+
+    All the reads and writes of the catalog and the indices by the proxy are made from a single thread, as in 'add', where only the main thread updates them.
+    """
+
+    def __init__(self):
+        LocalPyPIController.__init__(self)
+
+        self._host: str = None
+        self._port: int = None
+        self._cacheSize: int = None
+
+        self._proxyArguments: argparse.Namespace = None
+        self._proxyTTL: float = None
+
+        self._indexExecutor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pypickup-index")
+        self._proxyLock: threading.Lock = threading.Lock()
+        self._proxyControllers: OrderedDict = OrderedDict()
+        self._projectLocks: Dict[str, threading.Lock] = dict()
+        self._proxiedFileRecords: Dict[str, Tuple[float, Dict[str, FileRecord]]] = dict()
+        self._proxiedPages: Dict[Tuple[str, str], "IndexPage"] = dict()
+
+    @property
+    def host(self):
+        return self._host
+
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def cacheSize(self):
+        return self._cacheSize
+
+    @property
+    def proxyArguments(self):
+        """The arguments of the 'add' command the files of the proxied projects are filtered and downloaded with. None if not a proxy."""
+
+        return self._proxyArguments
+
+    @property
+    def proxyTTL(self):
+        return self._proxyTTL
+
+    @host.setter
+    def host(self, new_host: str):
+        self._host = new_host
+
+    @port.setter
+    def port(self, new_port: int):
+        if not 0 <= new_port <= 65535:
+            raise InvalidInputError("Serve::port - The port must be between 0 and 65535.")
+        self._port = new_port
+
+    @cacheSize.setter
+    def cacheSize(self, new_cacheSize: int):
+        if new_cacheSize < 1:
+            raise InvalidInputError("Serve::cacheSize - The number of cached index pages must be greater than 0.")
+        self._cacheSize = new_cacheSize
+
+    @proxyArguments.setter
+    def proxyArguments(self, new_proxyArguments: argparse.Namespace):
+        self._proxyArguments = new_proxyArguments
+
+    @proxyTTL.setter
+    def proxyTTL(self, new_proxyTTL: float):
+        if new_proxyTTL < 0:
+            raise InvalidInputError("Serve::proxyTTL - The time to live of the proxied pages must be 0 or greater.")
+        self._proxyTTL = new_proxyTTL
+
+    def parseScriptArguments(self, args: argparse.ArgumentParser):
+        LocalPyPIController.parseScriptArguments(self, args)
+
+        self.printVerbose = args.printVerbose
+
+        self.host = args.host
+        self.port = args.port
+        self.cacheSize = args.cacheSize
+
+        self.proxyArguments = args.proxyArguments
+        self.proxyTTL = args.proxyTTL
+
+        # Once, since the network manager is shared by the controllers of all the proxied projects, which download from several threads
+        if self.proxyArguments is not None:
+            controller = Add()
+            controller.parseScriptArguments(self.__getProxyArguments(""))
+            controller.configureNetworkManager()
+
+    def __runInIndexThread(self, function: Callable, *args):
+        return self._indexExecutor.submit(function, *args).result()
+
+    def __initProxiedRepo(self):
+        os.makedirs(self.pypiLocalPath, exist_ok=True)
+        if not self.repositoryExists():
+            self._getIndexWriter().writeBaseIndex()
+
+    def getIndexServer(self) -> "IndexServer":
+        from pypickup.utils.indexServer import IndexServer
+
+        if self.proxyArguments is not None:
+            self.__runInIndexThread(self.__initProxiedRepo)
+
+        # Opening the catalog here imports the indices of repositories created before it existed
+        catalogPath: str = self.__runInIndexThread(lambda: self.catalog.dbPath)
+
+        return IndexServer(self.pypiLocalPath, catalogPath, self.host, self.port, self.cacheSize, self.printVerbose, proxy=self if self.proxyArguments is not None else None)
+
+    #### Proxy ####
+
+    def __getProxyArguments(self, projectName: str) -> argparse.Namespace:
+        args = argparse.Namespace(**vars(self.proxyArguments))
+        args.packageName = projectName
+        args.pypiLocalPath = self.pypiLocalPath
+
+        return args
+
+    def getProxyController(self, projectName: str) -> Add:
+        """The Add controller the files of the proxied project are filtered and downloaded with."""
+
+        with self._proxyLock:
+            if projectName not in self._proxyControllers:
+                controller = Add()
+                controller.parseScriptArguments(self.__getProxyArguments(projectName))
+                self._proxyControllers[projectName] = controller
+                self.__forgetProxiedProjects()
+
+            self._proxyControllers.move_to_end(projectName)
+
+            return self._proxyControllers[projectName]
+
+    def __forgetProxiedProjects(self):
+        """Forgets the projects requested least recently (their controller, upstream files and pages) beyond self.cacheSize, so a long running proxy does not grow without bound. Projects being retrieved are kept. To be called with self._proxyLock held."""
+
+        for projectName in list(self._proxyControllers)[: max(len(self._proxyControllers) - self.cacheSize, 0)]:
+            projectLock: threading.Lock = self._projectLocks.get(projectName)
+            if projectLock is not None and projectLock.locked():
+                continue
+
+            del self._proxyControllers[projectName]
+            self._projectLocks.pop(projectName, None)
+            self._proxiedFileRecords.pop(projectName, None)
+            for key in [key for key in self._proxiedPages if key[0] == projectName]:
+                del self._proxiedPages[key]
+
+    def __getProjectLock(self, projectName: str) -> threading.Lock:
+        with self._proxyLock:
+            return self._projectLocks.setdefault(projectName, threading.Lock())
+
+    def __invalidateProxiedPages(self, projectName: str):
+        with self._proxyLock:
+            for key in [key for key in self._proxiedPages if key[0] == projectName]:
+                del self._proxiedPages[key]
+
+    def __getProxiedFileRecords(self, projectName: str) -> Dict[str, FileRecord]:
+        """The filtered upstream files of the project, retrieved again once older than self.proxyTTL. Concurrent requests of a project wait for a single retrieval. None if the upstreams do not have it."""
+
+        with self.__getProjectLock(projectName):
+            retrievedAt, fileRecords = self._proxiedFileRecords.get(projectName, (None, None))
+            if retrievedAt is not None and time.monotonic() - retrievedAt < self.proxyTTL:
+                return fileRecords
+
+            controller: Add = self.getProxyController(projectName)
+
+            # Pages are only requested once per run otherwise. Only this project's, since the rest may be in use by other threads
+            self._networkManager.clearPageMemo(controller.packageName)
+            remoteFileRecords: Dict[str, FileRecord] = controller.getRemoteFileRecords()
+
+            # The last known files are kept if the upstreams fail, but asked for again on the next request
+            if remoteFileRecords is not None:
+                self._proxiedFileRecords[projectName] = (time.monotonic(), remoteFileRecords)
+                self.__invalidateProxiedPages(projectName)
+                fileRecords = remoteFileRecords
+
+            return fileRecords
+
+    def getProxiedFileRecord(self, projectName: str, fileName: str) -> FileRecord:
+        """The upstream record of the file, or None if the upstreams do not have it or it is filtered out."""
+
+        fileRecords: Dict[str, FileRecord] = self.__getProxiedFileRecords(projectName)
+
+        return fileRecords.get(fileName) if fileRecords is not None else None
+
+    def __renderProxiedPage(self, projectName: str, remoteFileRecords: Dict[str, FileRecord], contentType: str) -> "IndexPage":
+        """Renders the page listing the local files of the project, and the upstream ones not downloaded yet, the latter pointing to the proxy too."""
+
+        from pypickup.utils.indexServer import IndexPage, IndexServer
+
+        fileRecords: Dict[str, FileRecord] = {fileName: FileRecord(fileName, "./" + fileName, hashes=fileRecord.hashes, requiresPython=fileRecord.requiresPython, yanked=fileRecord.yanked, size=fileRecord.size, uploadTime=fileRecord.uploadTime) for fileName, fileRecord in remoteFileRecords.items()}
+        fileRecords.update(self.catalog.getFiles(projectName))
+
+        if contentType == IndexServer._contentTypeJSONv1:
+            content: str = self._jsonManager.renderProjectJSON(projectName, list(fileRecords.values()))
+        else:
+            content = self._htmlManager.renderProjectHTML(projectName, list(fileRecords.values()))
+
+        return IndexPage(None, content.encode("utf-8"))
+
+    def getProxiedProjectPage(self, projectName: str, contentType: str) -> "IndexPage":
+        """The page of the project with both its local and upstream files, in the 'contentType' format. None if the upstreams do not have it."""
+
+        remoteFileRecords: Dict[str, FileRecord] = self.__getProxiedFileRecords(projectName)
+        if remoteFileRecords is None:
+            return None
+
+        with self._proxyLock:
+            page: "IndexPage" = self._proxiedPages.get((projectName, contentType))
+        if page is None:
+            page = self.__runInIndexThread(self.__renderProxiedPage, projectName, remoteFileRecords, contentType)
+            with self._proxyLock:
+                self._proxiedPages[(projectName, contentType)] = page
+
+        return page
+
+    def __recordProxiedFile(self, controller: Add, fileRecord: FileRecord, fileLink: str, sha256: str):
+        isNewPackage: bool = not self.catalog.hasPackage(controller.packageName)
+
+        with self._getIndexWriter() as indexWriter:
+            indexWriter.addFiles(controller.packageName, [controller._getLocalFileRecord(controller.packageName, fileRecord, sha256)], {fileRecord.fileName: urldefrag(fileLink)[0]}, controller._getFilterProfile())
+
+        if isNewPackage:
+            self._getIndexWriter().writeBaseIndex()
+
+    def fetchProxiedFile(self, projectName: str, fileName: str, onProgress: Callable[[str, int], None] = None) -> bool:
+        """Downloads the upstream file into the local repository, and records it in the catalog and the indices. See NetworkManager.downloadLink for 'onProgress'."""
+
+        fileRecord: FileRecord = self.getProxiedFileRecord(projectName, fileName)
+        if fileRecord is None:
+            return False
+
+        controller: Add = self.getProxyController(projectName)
+        os.makedirs(controller.packageLocalPath, exist_ok=True)
+
+        _, fileLink, ok, status, sha256 = controller._downloadFile(fileName, fileRecord.link, showRetries=controller.showRetries, onProgress=onProgress)
+        if not ok:
+            self._print("Unable to fetch '" + fileName + "': " + status)
+            return False
+
+        self.__runInIndexThread(self.__recordProxiedFile, controller, fileRecord, fileLink, sha256)
+        self.__invalidateProxiedPages(projectName)
+        if self.printVerbose:
+            self._print("Fetched '" + fileName + "' into " + controller.packageLocalPath)
+
+        return True
+
+    def serve(self):
+        """Serves the local repository until interrupted (e.g. with Ctrl+C)."""
+
+        import asyncio
+
+        indexServer = self.getIndexServer()
+
+        def printURL():
+            self._print("Serving '" + os.path.abspath(self.pypiLocalPath) + "' at " + indexServer.url + " (e.g. pip install --index-url " + indexServer.url + "simple/ package_name). Press Ctrl+C to stop.")
+
+        try:
+            asyncio.run(indexServer.serveForever(printURL))
+        except KeyboardInterrupt:
+            self._print("\nServer stopped.")
+        finally:
+            self._indexExecutor.shutdown()
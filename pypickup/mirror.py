@@ -0,0 +1,194 @@
+import argparse
+import io
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, TextIO
+
+from pypickup.cmd.add import AddEP
+from pypickup.cmd.list import ListEP
+from pypickup.cmd.rebuildIndexEP import RebuildIndexEP
+from pypickup.cmd.remove import RemoveEP
+from pypickup.controller import Add, LocalPyPIController, RebuildIndex, Remove
+from pypickup.controller import List as ListController
+from pypickup.utils.catalog import Catalog
+from pypickup.utils.invalidInputError import InvalidInputError
+from pypickup.utils.results import MirrorResult
+
+if TYPE_CHECKING:
+    from pypickup.utils.networkManager import NetworkManager
+
+
+class Mirror:
+
+    """
+    An in-process API to a local repository, for long-running programs (e.g. the workers of an orchestration service) that would otherwise run the
+    pypickup command once per package and parse what it prints. E.g.:
+
+        with Mirror("/srv/pypickup", includePlatformSpecific=True) as mirror:
+            result = mirror.add(["numpy", "scipy==1.11"], jobs=8)
+            print(result.downloadedBytes, result.failed, result["numpy"].elapsed)
+
+    Each operation returns a MirrorResult, with a PackageResult per package, and raises InvalidInputError (a ValueError) on incorrect input (e.g. a malformed version or an
+    unknown option) instead of exiting. The options are the ones of the corresponding command, by the name of their attribute (e.g. 'onlySources' for
+    'add -s', or 'upstreams'), and their defaults are the same; the ones given to the Mirror apply to all its operations. What the commands print is
+    captured in the 'output' of the results, unless 'quiet' is False.
+
+    Each Mirror has its own network manager, so several of them in a process do not override each other's options (e.g. 'upstreams' or 'retries'). Its
+    session (and keep-alive connections), the health of the upstreams, the wheel filters and the catalog are kept across operations. The remote pages
+    are requested again in every operation, revalidated with the cache of the local repository as in the commands. The output is collected from the
+    controllers themselves, so the one of other threads is not captured; only the retries and verbose downloads of the network manager ('showRetries'
+    and 'printVerbose') are printed to the standard output.
+
+    A Mirror is meant to be used from a single thread at a time, since its catalog is.
+    """
+
+    _entryPoints: list = [AddEP, RemoveEP, ListEP, RebuildIndexEP]
+
+    def __init__(self, pypiLocalPath: str = "./.pypickup/", quiet: bool = True, **options):
+        self._pypiLocalPath: str = pypiLocalPath
+        self._quiet: bool = quiet
+        self._catalog: Catalog = None
+        self._networkManager: "NetworkManager" = None
+
+        knownOptions = set(name for entryPoint in self._entryPoints for name in vars(self.__getDefaultArguments(entryPoint)))
+        unknownOptions: List[str] = [name for name in options if name not in knownOptions]
+        if len(unknownOptions) > 0:
+            raise InvalidInputError("Mirror::__init__ - Unknown options: " + ", ".join(unknownOptions) + ".")
+
+        self._options: Dict = options
+
+    @property
+    def pypiLocalPath(self):
+        return self._pypiLocalPath
+
+    @property
+    def quiet(self):
+        return self._quiet
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.close()
+
+    def close(self):
+        if self._catalog is not None:
+            self._catalog.close()
+            self._catalog = None
+
+    def __getNetworkManager(self) -> "NetworkManager":
+        """Created on first use, since only 'add' needs it."""
+
+        if self._networkManager is None:
+            from pypickup.utils.networkManager import NetworkManager
+
+            self._networkManager = NetworkManager()
+
+        return self._networkManager
+
+    def __getOutput(self) -> TextIO:
+        return io.StringIO() if self._quiet else None
+
+    @staticmethod
+    def __getDefaultArguments(entryPoint) -> argparse.Namespace:
+        parser = argparse.ArgumentParser(prog="pypickup")
+        entryPoint.init_subparser(parser)
+
+        # The positional arguments are set for each package
+        return parser.parse_args(["-"] if entryPoint in [AddEP, RemoveEP] else [])
+
+    def __getArguments(self, entryPoint, options: Dict) -> argparse.Namespace:
+        """The arguments of the command, with its defaults overridden by the options of the Mirror, and then by the 'options' of the operation."""
+
+        args: argparse.Namespace = self.__getDefaultArguments(entryPoint)
+        args.pypiLocalPath = self._pypiLocalPath
+
+        for name, value in self._options.items():
+            if hasattr(args, name):
+                setattr(args, name, value)
+
+        for name, value in options.items():
+            if not hasattr(args, name):
+                raise InvalidInputError("Mirror::__getArguments - Unknown option '" + name + "'.")
+            setattr(args, name, value)
+
+        return args
+
+    def __getController(self, controllerClass, args: argparse.Namespace, packageName: str, output: TextIO = None) -> LocalPyPIController:
+        packageArgs = argparse.Namespace(**vars(args))
+        packageArgs.packageName = packageName
+
+        controller: LocalPyPIController = controllerClass()
+        controller.output = output
+        if controllerClass is Add:
+            controller.networkManager = self.__getNetworkManager()
+        controller.parseScriptArguments(packageArgs)
+
+        # A single catalog is kept open for all the operations but the dry runs, which only read it
+        if os.path.isdir(self._pypiLocalPath) and not getattr(packageArgs, "dryRun", False):
+            if self._catalog is None:
+                self._catalog = controller.catalog
+            else:
+                controller.catalog = self._catalog
+
+        return controller
+
+    def __run(self, operation: Callable[[], None], controllers: List[LocalPyPIController], output: TextIO) -> MirrorResult:
+        startedAt: float = time.monotonic()
+        operation()
+
+        return MirrorResult([result for controller in controllers for result in controller.results], time.monotonic() - startedAt, output.getvalue() if output is not None else "")
+
+    def add(self, packageNames: List[str], jobs: int = 1, **options) -> MirrorResult:
+        """Adds the packages (e.g. "numpy" or "numpy==1.26") to the local repository, or synchronizes them if already there, downloading up to 'jobs' files in parallel. See the 'add' command for the options."""
+
+        args: argparse.Namespace = self.__getArguments(AddEP, dict(options, jobs=jobs))
+
+        if not args.dryRun:
+            os.makedirs(self._pypiLocalPath, exist_ok=True)
+
+        output: TextIO = self.__getOutput()
+        controllers: List[Add] = [self.__getController(Add, args, packageName, output) for packageName in packageNames]
+
+        # Pages are only requested once per run otherwise
+        self.__getNetworkManager().clearPageMemo()
+
+        return self.__run(lambda: Add.addPackages(controllers), controllers, output)
+
+    def remove(self, packageNames: List[str], **options) -> MirrorResult:
+        """Removes the packages (or only a version of them, e.g. "numpy==1.8") from the local repository. See the 'rm' command for the options."""
+
+        args: argparse.Namespace = self.__getArguments(RemoveEP, options)
+        output: TextIO = self.__getOutput()
+        controllers: List[Remove] = [self.__getController(Remove, args, packageName, output) for packageName in packageNames]
+
+        def removePackages():
+            for controller in controllers:
+                controller.removePackage()
+
+        return self.__run(removePackages, controllers, output)
+
+    def list(self, packageName: str = "") -> List[str]:
+        """Returns the names of the packages in the local repository or, given a package (optionally with a version, e.g. "numpy==1.8"), the names of its files."""
+
+        controller: ListController = self.__getController(ListController, self.__getArguments(ListEP, dict()), packageName)
+        if not controller.repositoryExists():
+            return list()
+
+        names: List[str] = controller.catalog.getPackages() if controller.packageName == "" else list(controller.catalog.getFiles(controller.packageName).keys())
+
+        return sorted(controller.filterByVersion(names))
+
+    def rebuildIndex(self, packageName: str = None, **options) -> MirrorResult:
+        """Rebuilds the indices of the package or, if no package is given, all of them (as 'rebuild-index -a'). See the 'rebuild-index' command for the options."""
+
+        args: argparse.Namespace = self.__getArguments(RebuildIndexEP, options)
+        output: TextIO = self.__getOutput()
+        controller: RebuildIndex = self.__getController(RebuildIndex, args, packageName if packageName is not None else "", output)
+
+        if not controller.repositoryExists():
+            raise InvalidInputError("Mirror::rebuildIndex - No local repository has been initialized yet at '" + self._pypiLocalPath + "'.")
+        if packageName is not None and not controller.packageExists():
+            raise InvalidInputError("Mirror::rebuildIndex - Package '" + packageName + "' has not been added to the local repository yet.")
+
+        return self.__run(controller.rebuildAllIndices if packageName is None else controller.rebuildIndex, [controller], output)
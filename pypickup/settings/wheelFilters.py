@@ -1,8 +1,12 @@
-from typing import Dict, List
+from typing import Callable, Dict, List
 
+import hashlib
+import json
 import os, shutil
+import tempfile
+import time
 
-import yaml
+from pypickup.utils.invalidInputError import InvalidInputError
 
 class WheelsConfig:
 
@@ -77,21 +81,88 @@ class WheelsConfig:
         ** After this, if we would like to download too the files for AMD64 machines running Windows, we would specify in platform_tags those 2
            filters, and perform an 'update' command on the same package.
 
+
+    #### CACHE ####
+
+    Once parsed and validated (by the 'validate' function given, if any), the settings are cached in a JSON file next to the YAML one, along with the
+    modification time, size and sha256 of the YAML file. As long as the YAML file does not change, the settings are loaded from the cache, without parsing
+    (nor validating) them again. If only its modification time changes (e.g. it was touched), its hash tells the settings are the same.
     """
 
     _incorrectInOrOutMessage: str = "Incorrect settings field 'inOrOut'! Set 'in' or 'out' in settings/wheelFilters.py."
 
-    def __init__(self):
+    _cacheFileName: str = ".wheelFiltersSettings.cache.json"
+    _cacheFormatVersion: int = 1
+    _racyMtimeWindow: int = 2 * 10**9
+
+    def __init__(self, validate: Callable[["WheelsConfig"], None] = None):
         settingsDir: str = os.path.join(os.getenv("PYPICKUP_INDEX_PATH", default="./.pypickup/"), "settings")
         settingsFileName: str = "wheelFiltersSettings.yaml"
-        
-        self._setSettingsEnvironment(settingsDir, settingsFileName)
 
         self._settingsFilePath = os.path.join(settingsDir, settingsFileName)
+        self._cacheFilePath: str = os.path.join(settingsDir, self._cacheFileName)
+
+        # The environment is only set up the first time, when there is no settings file yet
+        try:
+            settingsStat = os.stat(self._settingsFilePath)
+        except FileNotFoundError:
+            self._setSettingsEnvironment(settingsDir, settingsFileName)
+            settingsStat = os.stat(self._settingsFilePath)
+
+        cache: Dict = self.__readCache()
+        if cache is not None and cache["mtime"] == settingsStat.st_mtime_ns and cache["size"] == settingsStat.st_size:
+            self.__setSettings(cache["settings"])
+            return
+
+        with open(self._settingsFilePath, "rb") as stream:
+            settingsContent: bytes = stream.read()
+        settingsSHA256: str = hashlib.sha256(settingsContent).hexdigest()
+
+        if cache is not None and cache["sha256"] == settingsSHA256:
+            settingsDict = cache["settings"]
+            self.__setSettings(settingsDict)
+        else:
+            import yaml
+
+            settingsDict = yaml.safe_load(settingsContent)
+            self.__setSettings(settingsDict)
+            if validate is not None:
+                validate(self)
 
-        stream = open(self._settingsFilePath, 'r')
-        settingsDict = yaml.safe_load(stream)
+        self.__writeCache(settingsStat, settingsSHA256, settingsDict)
 
+    def __readCache(self) -> Dict:
+        """Returns the cached settings, along with the modification time, size and sha256 of the YAML file they were parsed from. None if there is no (valid) cache."""
+
+        try:
+            with open(self._cacheFilePath, "r") as cacheFile:
+                cache: Dict = json.load(cacheFile)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(cache, dict) or cache.get("version") != self._cacheFormatVersion:
+            return None
+
+        return cache
+
+    def __writeCache(self, settingsStat: os.stat_result, settingsSHA256: str, settingsDict: Dict):
+        # A file modified right before being cached could change again without its modification time doing so, so it is checked by its hash next time
+        mtime: int = settingsStat.st_mtime_ns if time.time_ns() - settingsStat.st_mtime_ns > self._racyMtimeWindow else None
+        cache: Dict = {"version": self._cacheFormatVersion, "mtime": mtime, "size": settingsStat.st_size, "sha256": settingsSHA256, "settings": settingsDict}
+
+        # The cache is just an optimization, so being unable to write it (e.g. in a read-only settings directory) is not an error
+        tmpFilePath: str = None
+        try:
+            fileDescriptor, tmpFilePath = tempfile.mkstemp(dir=os.path.dirname(self._cacheFilePath), suffix=".tmp")
+            with os.fdopen(fileDescriptor, "w") as tmpFile:
+                json.dump(cache, tmpFile, separators=(",", ":"))
+            os.chmod(tmpFilePath, 0o644)
+            os.replace(tmpFilePath, self._cacheFilePath)
+        except OSError:
+            if tmpFilePath is not None and os.path.exists(tmpFilePath):
+                os.remove(tmpFilePath)
+
+    def __setSettings(self, settingsDict: Dict):
         try:
             self._filtersEnabled: str = settingsDict["filtersEnabled_wheels"]
             self._inOrOut: str = settingsDict["inOrOut_wheels"]
@@ -104,8 +175,7 @@ class WheelsConfig:
             self._out_ORorAnd: str = settingsDict["out_ORorAnd"]
             self._out_ORorAndAttributes: Dict[str, List[str]] = settingsDict["out_ORorAndAttributes"]
         except KeyError as key:
-            print("wheelFilterSettings.yaml file not correct. Field " + str(key) + " not found!")
-            exit(0)
+            raise InvalidInputError("WheelsConfig::__setSettings - wheelFilterSettings.yaml file not correct. Field " + str(key) + " not found!")
 
     @property
     def settingsFilePath(self):
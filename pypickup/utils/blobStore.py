@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+
+try:
+    import fcntl
+except ImportError:     # Not available on Windows
+    fcntl = None
+
+
+class BlobStore:
+
+    """
+    A class to manage a content-addressed store of files, keyed by their sha256, that can be shared by several local repositories (index roots).
+
+    Each file is kept only once in the store, and it is placed into the package directories as a hard link to it. If that is not possible (e.g. the store
+    lives in another file system), a reflink (copy-on-write clone) is tried, and a regular copy as a last resort.
+    """
+
+    _FICLONE: int = 0x40049409
+
+    def __init__(self, storePath: str):
+        self._storePath: str = storePath
+
+    @property
+    def storePath(self):
+        return self._storePath
+
+    def getBlobPath(self, sha256: str) -> str:
+        return os.path.join(self._storePath, "sha256", sha256[:2], sha256)
+
+    def contains(self, sha256: str) -> bool:
+        return sha256 is not None and os.path.isfile(self.getBlobPath(sha256))
+
+    def __reflink(self, sourcePath: str, destinationPath: str) -> bool:
+        if fcntl is None:
+            return False
+
+        try:
+            with open(sourcePath, "rb") as source, open(destinationPath, "wb") as destination:
+                fcntl.ioctl(destination.fileno(), self._FICLONE, source.fileno())
+        except OSError:
+            if os.path.exists(destinationPath):
+                os.remove(destinationPath)
+            return False
+
+        return True
+
+    def __placeFile(self, sourcePath: str, destinationPath: str):
+        """Places 'sourcePath' at 'destinationPath' (hard link, reflink or copy, in this order of preference). The destination is replaced atomically if it already exists."""
+
+        fileDescriptor, tmpPath = tempfile.mkstemp(dir=os.path.dirname(destinationPath), prefix="." + os.path.basename(destinationPath) + ".", suffix=".tmp")
+        os.close(fileDescriptor)
+        os.remove(tmpPath)
+
+        try:
+            try:
+                os.link(sourcePath, tmpPath)
+            except OSError:
+                if not self.__reflink(sourcePath, tmpPath):
+                    shutil.copyfile(sourcePath, tmpPath)
+
+            os.replace(tmpPath, destinationPath)
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+
+    def linkInto(self, sha256: str, destinationPath: str):
+        """Places the blob 'sha256' at 'destinationPath'. The blob is expected to exist."""
+
+        blobPath: str = self.getBlobPath(sha256)
+        if os.path.exists(destinationPath) and os.path.samefile(blobPath, destinationPath):
+            return
+
+        self.__placeFile(blobPath, destinationPath)
+
+    def addFile(self, filePath: str, sha256: str):
+        """Adds the already verified 'filePath' to the store. If the blob was already there, 'filePath' is replaced by a link to it, so it is not stored twice."""
+
+        blobPath: str = self.getBlobPath(sha256)
+        if os.path.isfile(blobPath):
+            self.linkInto(sha256, filePath)
+            return
+
+        os.makedirs(os.path.dirname(blobPath), exist_ok=True)
+        self.__placeFile(filePath, blobPath)
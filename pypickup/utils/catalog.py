@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import time
+from typing import Dict, List, Tuple, Union
+from urllib.request import pathname2url
+
+from pypickup.utils.fileRecord import FileRecord
+
+
+class Catalog:
+
+    """
+    A class to keep the packages and files held by a local repository in an embedded SQLite database, which is the source of truth of the repository: its
+    HTML and JSON indices are generated from it. Besides the information served in the indices (file name, href, sha256, size, requires-python, yanked
+    and upload time), the origin URL of each file and the filter profile it was selected with are recorded. The manifest of each package directory (its
+    modification time and a digest of its listing) as of its last index rebuild is kept too, so unchanged packages can be skipped.
+
+    Every method runs in its own transaction, and the database is in WAL mode, so readers (e.g. 'serve') are never blocked by a synchronization.
+    A catalog opened read-only (e.g. for a dry run) does not create nor change any file, not even the WAL ones.
+    """
+
+    _schema: str = """
+        CREATE TABLE IF NOT EXISTS packages (
+            name TEXT PRIMARY KEY,
+            addedAt REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            package TEXT NOT NULL,
+            fileName TEXT NOT NULL,
+            url TEXT NOT NULL,
+            sha256 TEXT,
+            size INTEGER,
+            requiresPython TEXT,
+            yanked TEXT,
+            uploadTime TEXT,
+            originURL TEXT,
+            filterProfile TEXT,
+            addedAt REAL NOT NULL,
+            PRIMARY KEY (package, fileName)
+        );
+        CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+        CREATE TABLE IF NOT EXISTS manifests (
+            package TEXT PRIMARY KEY,
+            mtime INTEGER NOT NULL,
+            digest TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, dbPath: str, readOnly: bool = False):
+        self._dbPath: str = dbPath
+
+        if readOnly:
+            # The WAL is only read if there is one (i.e. another connection is open); otherwise, the database is not even locked
+            options: str = "mode=ro" if os.path.exists(dbPath + "-wal") else "mode=ro&immutable=1"
+            self._connection = sqlite3.connect("file:" + pathname2url(os.path.abspath(dbPath)) + "?" + options, uri=True)
+            return
+
+        self._connection = sqlite3.connect(dbPath)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.executescript(self._schema)
+
+    @property
+    def dbPath(self):
+        return self._dbPath
+
+    def close(self):
+        self._connection.close()
+
+    def isEmpty(self) -> bool:
+        return self._connection.execute("SELECT 1 FROM packages LIMIT 1").fetchone() is None
+
+    def hasPackage(self, packageName: str) -> bool:
+        return self._connection.execute("SELECT 1 FROM packages WHERE name = ?", (packageName,)).fetchone() is not None
+
+    def getPackages(self) -> List[str]:
+        """Returns the names of the packages, in the order they were added."""
+
+        return [name for name, in self._connection.execute("SELECT name FROM packages ORDER BY rowid")]
+
+    def addPackage(self, packageName: str):
+        with self._connection:
+            self._connection.execute("INSERT OR IGNORE INTO packages (name, addedAt) VALUES (?, ?)", (packageName, time.time()))
+
+    def __deletePackage(self, packageName: str):
+        self._connection.execute("DELETE FROM files WHERE package = ?", (packageName,))
+        self._connection.execute("DELETE FROM manifests WHERE package = ?", (packageName,))
+        self._connection.execute("DELETE FROM packages WHERE name = ?", (packageName,))
+
+    def removePackage(self, packageName: str):
+        """Removes the package and all its files."""
+
+        with self._connection:
+            self.__deletePackage(packageName)
+
+    def setPackages(self, packageNames: List[str]):
+        """Makes 'packageNames' the whole set of packages, removing the rest (along with their files) and keeping the known ones as they are."""
+
+        with self._connection:
+            knownPackages: List[str] = [name for name, in self._connection.execute("SELECT name FROM packages")]
+            for packageName in set(knownPackages) - set(packageNames):
+                self.__deletePackage(packageName)
+
+            self._connection.executemany("INSERT OR IGNORE INTO packages (name, addedAt) VALUES (?, ?)", [(packageName, time.time()) for packageName in packageNames])
+
+    def __getYanked(self, yanked: Union[bool, str]) -> str:
+        """PEP 691 'yanked' (False, True or the reason) as stored: NULL, '' or the reason."""
+
+        if yanked is False or yanked is None:
+            return None
+
+        return "" if yanked is True else yanked
+
+    def __getFileRecord(self, row: tuple) -> FileRecord:
+        fileName, url, sha256, size, requiresPython, yanked, uploadTime = row
+
+        return FileRecord(fileName, url, hashes={"sha256": sha256} if sha256 else None, requiresPython=requiresPython, yanked=False if yanked is None else (yanked or True), size=size, uploadTime=uploadTime)
+
+    def getFiles(self, packageName: str) -> Dict[str, FileRecord]:
+        """Returns the files of the package, the file name in the key, in the order they were added."""
+
+        rows = self._connection.execute("SELECT fileName, url, sha256, size, requiresPython, yanked, uploadTime FROM files WHERE package = ? ORDER BY rowid", (packageName,))
+
+        return {row[0]: self.__getFileRecord(row) for row in rows}
+
+    def __insertFiles(self, packageName: str, fileRecords: List[FileRecord], originURLs: Dict[str, str], filterProfile: str):
+        self._connection.execute("INSERT OR IGNORE INTO packages (name, addedAt) VALUES (?, ?)", (packageName, time.time()))
+        self._connection.executemany(
+            "INSERT INTO files (package, fileName, url, sha256, size, requiresPython, yanked, uploadTime, originURL, filterProfile, addedAt) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (package, fileName) DO UPDATE SET url = excluded.url, sha256 = excluded.sha256, size = excluded.size, requiresPython = excluded.requiresPython, yanked = excluded.yanked, uploadTime = excluded.uploadTime, originURL = COALESCE(excluded.originURL, originURL), filterProfile = COALESCE(excluded.filterProfile, filterProfile)",
+            [(packageName, record.fileName, record.url, record.hashes.get("sha256"), record.size, record.requiresPython, self.__getYanked(record.yanked), record.uploadTime, originURLs.get(record.fileName), filterProfile, time.time()) for record in fileRecords],
+        )
+
+    def addFiles(self, packageName: str, fileRecords: List[FileRecord], originURLs: Dict[str, str] = None, filterProfile: str = None):
+        """Adds (or updates) the 'fileRecords' of the package, all of them in a single transaction. 'originURLs' are the URLs they were downloaded from, the file name in the key."""
+
+        with self._connection:
+            self.__insertFiles(packageName, fileRecords, originURLs if originURLs is not None else dict(), filterProfile)
+
+    def removeFiles(self, packageName: str, fileNames: List[str]):
+        with self._connection:
+            self._connection.executemany("DELETE FROM files WHERE package = ? AND fileName = ?", [(packageName, fileName) for fileName in fileNames])
+
+    def setFiles(self, packageName: str, fileRecords: List[FileRecord]):
+        """Makes 'fileRecords' the whole set of files of the package, removing the rest and keeping the origin and filter profile of the known ones."""
+
+        fileNames = {record.fileName for record in fileRecords}
+
+        with self._connection:
+            knownFileNames: List[str] = [fileName for fileName, in self._connection.execute("SELECT fileName FROM files WHERE package = ?", (packageName,))]
+            self._connection.executemany("DELETE FROM files WHERE package = ? AND fileName = ?", [(packageName, fileName) for fileName in knownFileNames if fileName not in fileNames])
+
+            self.__insertFiles(packageName, fileRecords, dict(), None)
+
+    def getManifests(self) -> Dict[str, Tuple[int, str]]:
+        """Returns the (mtime, digest) manifest of the package directories as of their last index rebuild, the package name in the key."""
+
+        return {package: (mtime, digest) for package, mtime, digest in self._connection.execute("SELECT package, mtime, digest FROM manifests")}
+
+    def setManifests(self, manifests: Dict[str, Tuple[int, str]]):
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO manifests (package, mtime, digest) VALUES (?, ?, ?)", [(package, mtime, digest) for package, (mtime, digest) in manifests.items()])
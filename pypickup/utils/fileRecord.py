@@ -0,0 +1,60 @@
+from typing import Dict, Union
+
+
+class FileRecord:
+
+    """
+    A class to hold the information a simple index (PEP 503/691) provides about a single distribution file, whatever the format of that index is.
+    """
+
+    def __init__(self, fileName: str, url: str, hashes: Dict[str, str] = None, requiresPython: str = None, yanked: Union[bool, str] = False, size: int = None, uploadTime: str = None):
+        self._fileName: str = fileName
+        self._url: str = url
+        self._hashes: Dict[str, str] = hashes if hashes is not None else dict()
+        self._requiresPython: str = requiresPython
+        self._yanked: Union[bool, str] = yanked
+        self._size: int = size
+        self._uploadTime: str = uploadTime
+
+    @property
+    def fileName(self):
+        return self._fileName
+
+    @property
+    def url(self):
+        return self._url
+
+    @property
+    def hashes(self):
+        return self._hashes
+
+    @property
+    def requiresPython(self):
+        return self._requiresPython
+
+    @property
+    def yanked(self):
+        return self._yanked
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def uploadTime(self):
+        return self._uploadTime
+
+    @property
+    def link(self) -> str:
+        """The URL of the file with its hash in the fragment (e.g. '...#sha256=...'), as it appears in the HTML indices."""
+
+        if "sha256" in self._hashes:
+            return self._url + "#sha256=" + self._hashes["sha256"]
+
+        for hashName, hashValue in self._hashes.items():
+            return self._url + "#" + hashName + "=" + hashValue
+
+        return self._url
+
+    def __repr__(self) -> str:
+        return "FileRecord(" + self._fileName + ")"
@@ -1,14 +1,17 @@
-import os
-
 import re
+import html
 
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, TextIO
+from urllib.parse import urljoin, urldefrag
 
-from bs4 import BeautifulSoup, element as bs4Element
 import wheel_filename
-from multimethod import multimethod
 
 from pypickup.settings.wheelFilters import WheelsConfig
+from pypickup.utils.fileRecord import FileRecord
+from pypickup.utils.invalidInputError import InvalidInputError
+from pypickup.utils.linkExtractor import LinkExtractor, LinkRecord
+from pypickup.utils.sharedOnFirstUse import SharedOnFirstUse
+from pypickup.utils.wheelFilter import WheelFilter
 
 
 class WheelsManager:
@@ -23,9 +26,9 @@ class WheelsManager:
     _gte_char: str = ">="
 
     def __init__(self):
-        self._wheelsConfig = WheelsConfig()
-
-        self.__checkFilters()
+        # The filters are only checked when the settings change, since the settings are cached once checked
+        self._wheelsConfig = WheelsConfig(validate=self.__checkFilters)
+        self._wheelFilter: WheelFilter = None
 
     @property
     def wheelsConfig(self):
@@ -58,127 +61,49 @@ class WheelsManager:
             return False
         return True
 
-    def __checkFilters(self):
-        filterNames: List[str] = self.wheelsConfig.getFilterKeys()
+    def __checkFilters(self, wheelsConfig: WheelsConfig):
+        filterNames: List[str] = wheelsConfig.getFilterKeys()
         for filterName in filterNames:
 
-            filtersForWheel: List[str] = self.wheelsConfig.getField(filterName)
+            filtersForWheel: List[str] = wheelsConfig.getField(filterName)
             for filter in filtersForWheel:
 
                 if re.search(rf"({self._lt_char}|{self._gt_char})", filter):
                     if filterName != "python_tags":
-                        raise ValueError("WheelsManager::__checkFilters - NOT SUPPORTED inequalities for filter '" + filterName + "'.")
+                        raise InvalidInputError("WheelsManager::__checkFilters - NOT SUPPORTED inequalities for filter '" + filterName + "'.")
                     else:
                         filterSimplifiedPythonVersion: str = self.__getSimplifiedPythonVersionFromFilterFormat(filter)
                         if not self.__isCastableToInt(filterSimplifiedPythonVersion):
-                            raise ValueError("WheelsManager::__checkFilters - NOT SUPPORTED Python version format in filter '" + filterName + "' (filter: " + filter + "). A version should be a number-formatted string.")
+                            raise InvalidInputError("WheelsManager::__checkFilters - NOT SUPPORTED Python version format in filter '" + filterName + "' (filter: " + filter + "). A version should be a number-formatted string.")
                 else:
                     if re.search(rf"[^a-zA-Z1-9~_]", filter):
-                        raise ValueError("WheelsManager::__checkFilters - NOT SUPPORTED format in filter '" + filterName + "' (filter: " + filter + "). Remove the non-available characters.")
-
-    def __getLiteralFilter(self, filter: str, filterName: str) -> str:
-        filterLiteral: str = filter.replace("~", "")
-
-        if filterName == "python_tags":
-            filterLiteral = self.__getSimplifiedPythonVersionFromFilterFormat(filterLiteral)
-
-        return filterLiteral
-
-    def __getPythonVersions(self, filterString: str, wheelString: str) -> Tuple[int, int]:
-        filterStringCleaned: str = re.sub(rf"[a-zA-Z]*(\d*)", r"\1", filterString)
-        wheelStringCleaned: str = re.sub(rf"[a-zA-Z]*(\d*)", r"\1", wheelString)
-
-        resultingFilterVersion: int = int(filterStringCleaned)
-        resultingWheelVersion: int = int(wheelStringCleaned)
-
-        filterNumberOfDigits: int = len(filterStringCleaned)
-        wheelNumberOfDigits: int = len(wheelStringCleaned)
-        if filterNumberOfDigits < wheelNumberOfDigits:
-            resultingWheelVersion = int(int(wheelStringCleaned) / pow(10, wheelNumberOfDigits - filterNumberOfDigits))
-        elif filterNumberOfDigits > wheelNumberOfDigits:
-            resultingFilterVersion = int(int(filterStringCleaned) / pow(10, filterNumberOfDigits - wheelNumberOfDigits))
-
-        return resultingFilterVersion, resultingWheelVersion
-
-    @multimethod
-    def __fulfillFilterCriteria(self, wheelAttribute: str, filter: str, filterName: str) -> bool:
-        filterLiteral: str = self.__getLiteralFilter(filter, filterName)
-
-        if self._aprox_char in filter:
-            if filterLiteral in wheelAttribute:
-                return True
-        else:
-            if filterName == "python_tags":
-
-                filter_pyVersion, wheel_pyVersion = self.__getPythonVersions(filterLiteral, wheelAttribute)
-                if self._lte_char in filter:
-                    if wheel_pyVersion <= filter_pyVersion:
-                        return True
-                elif self._gte_char in filter:
-                    if wheel_pyVersion >= filter_pyVersion:
-                        return True
-                elif self._lt_char in filter:
-                    if wheel_pyVersion < filter_pyVersion:
-                        return True
-                elif self._gt_char in filter:
-                    if wheel_pyVersion > filter_pyVersion:
-                        return True
-
-        return False
-
-    @__fulfillFilterCriteria.register
-    def _(self, wheelAttributeList: List[str], filter: str, filterName: str) -> bool:
-        for wheelAttribute in wheelAttributeList:
-            if self.__fulfillFilterCriteria(wheelAttribute, filter, filterName):
-                return True
-
-        return False
+                        raise InvalidInputError("WheelsManager::__checkFilters - NOT SUPPORTED format in filter '" + filterName + "' (filter: " + filter + "). Remove the non-available characters.")
 
-    def __getDefaultBehaviourForIncludingWheels(self):
-        if self.wheelsConfig.inOrOut == "in":
-            return False
-        elif self.wheelsConfig.inOrOut == "out":
-            return True
-        else:
-            raise ValueError("WheelsManager::__getDefaultBehaviourForIncludingWheels - " + self.wheelsConfig.incorrectInOrOutMessage)
+    @property
+    def wheelFilter(self) -> WheelFilter:
+        """The filters of the settings compiled into a WheelFilter, the first time they are needed."""
 
-    def __needToBeIncluded(self, parsedWheel: wheel_filename.ParsedWheelFilename) -> bool:
-        filterKeys: List[str] = self.wheelsConfig.getFilterKeys()
-        for filterKey in filterKeys:
-            wheelAttribute = getattr(parsedWheel, filterKey)
-            filtersForWheel: List[str] = self.wheelsConfig.getField(filterKey)
+        if self._wheelFilter is None:
+            self._wheelFilter = WheelFilter.fromConfig(self._wheelsConfig)
 
-            for filter in filtersForWheel:
-                if self.__fulfillFilterCriteria(wheelAttribute, filter, filterKey):
-                    if self.wheelsConfig.inOrOut == "in":
-                        return True
-                    elif self.wheelsConfig.inOrOut == "out":
-                        return False
-                    else:
-                        raise ValueError("WheelsManager::__needToBeIncluded - " + self.wheelsConfig.incorrectInOrOutMessage)
+        return self._wheelFilter
 
-        return self.__getDefaultBehaviourForIncludingWheels()
+    def isValidWheel(self, wheelName: str, output: TextIO = None) -> bool:
+        """Checks out whether the 'wheelName' is a valid wheel name according to the wheel-filename package (https://pypi.org/project/wheel-filename/) and the settings file in settings/wheelFilters.py. Incorrect wheel names are reported to 'output' (stdout if None)."""
 
-    def isValidWheel(self, wheelName: str) -> bool:
-        """Checks out whether the 'wheelName' is a valid wheel name according to the wheel-filename package (https://pypi.org/project/wheel-filename/) and the settings file in settings/wheelFilters.py."""
-
-        if os.path.splitext(wheelName)[1] == ".whl":
+        if wheelName.endswith(".whl"):
             try:
-                parsedWheel = wheel_filename.parse_wheel_filename(wheelName)
-
                 filtersEnabled: str = self._wheelsConfig.filtersEnabled
                 if filtersEnabled == "no":
+                    wheel_filename.parse_wheel_filename(wheelName)
                     return True
                 elif filtersEnabled != "yes":
-                    raise ValueError("WheelsManager::isValidWheel - Incorrect value for 'filtersEnabled_wheels' field in settings/wheelFilters.py.")
-
-                if self.__needToBeIncluded(parsedWheel):
-                    return True
+                    raise InvalidInputError("WheelsManager::isValidWheel - Incorrect value for 'filtersEnabled_wheels' field in settings/wheelFilters.py.")
 
-                return False
+                return self.wheelFilter(wheelName)
 
             except wheel_filename.InvalidFilenameError:
-                print('Incorrect wheel format "' + wheelName + '". Ignored.')
+                print('Incorrect wheel format "' + wheelName + '". Ignored.', file=output)
                 return False
 
 
@@ -188,7 +113,8 @@ class HTMLManager:
     A class used for builing and managing the HTML files needed for the PyPI local repository.
     """
 
-    _wheelsManager = WheelsManager()
+    # Created on first use, since it reads and checks the settings file
+    _wheelsManager = SharedOnFirstUse(WheelsManager)
 
     _baseHTML_fromScratch = """
         <!DOCTYPE html>
@@ -208,6 +134,8 @@ class HTMLManager:
 
         self._packageVersion: str
 
+        self._output: TextIO = None
+
     @property
     def printAllFileNames(self):
         return self._printAllFileNames
@@ -232,6 +160,12 @@ class HTMLManager:
     def packageVersion(self):
         return self._packageVersion
 
+    @property
+    def output(self):
+        """The text stream the filtered out files are printed to. None means the standard output."""
+
+        return self._output
+
     @printAllFileNames.setter
     def printAllFileNames(self, new_printAllFileNames: bool):
         self._printAllFileNames = new_printAllFileNames
@@ -256,6 +190,10 @@ class HTMLManager:
     def packageVersion(self, new_packageVersion: bool):
         self._packageVersion = new_packageVersion
 
+    @output.setter
+    def output(self, new_output: TextIO):
+        self._output = new_output
+
     def setFlags(self, printAllFileNames: bool, onlySources: bool, includeDevs: bool, includeRCs: bool, includePlatformSpecific: bool, packageVersion: str):
         self.printAllFileNames = printAllFileNames
         self.onlySources = onlySources
@@ -277,76 +215,50 @@ class HTMLManager:
     def getBaseHTML(self) -> str:
         return self._baseHTML_fromScratch
 
-    def __getElementContentInlined(self, htmlString: str, element: str) -> str:
-        """Gets inlined the specified 'element' from the 'htmlString', returning a new HTML string."""
-
-        resultingHTML: str = ""
-        resultingHTML = re.sub(rf"(<{element}.*>)[\n ]+", r"\1", htmlString)
-        resultingHTML = re.sub(rf"[\n ]+(</{element}>)", r"\1", resultingHTML)
+    def __parseHTML(self, htmlString: str) -> Tuple[str, Dict[str, LinkRecord]]:
+        """Returns the title and the links of the 'htmlString' index, the file name in the key."""
 
-        return resultingHTML
+        linkExtractor = LinkExtractor()
+        links: Dict[str, LinkRecord] = dict()
+        for link in linkExtractor.iterLinks(htmlString):
+            links.setdefault(link.fileName, link)
 
-    def __getDecodedASCII(self, htmlString: str) -> str:
-        htmlCodes = (("'", "&#39;"), ('"', "&quot;"), (">", "&gt;"), ("<", "&lt;"), ("&", "&amp;"))
+        return linkExtractor.title, links
 
-        for code in htmlCodes:
-            htmlString = htmlString.replace(code[1], code[0])
+    def renderHTML(self, title: str, links: List[LinkRecord]) -> str:
+        """Renders an index with the 'title' heading (if not None) followed by the 'links', in the layout of the local indices."""
 
-        return htmlString
+        lines: List[str] = ["<!DOCTYPE html>", "<html>", " <body>"]
+        if title is not None:
+            lines.extend(["  <h1>", "   " + html.escape(title, quote=False), "  </h1>"])
 
-    def __prettifyHTML(self, htmlSoup: BeautifulSoup) -> str:
-        """Lets the 'htmlString' formatted as desired."""
+        for link in links:
+            attributes: Dict[str, str] = dict(link.attributes, href=link.href)
+            lines.append("  <a " + " ".join(name + "=\"" + html.escape(value) + "\"" for name, value in sorted(attributes.items())) + ">" + html.escape(link.fileName, quote=False) + "</a>")
 
-        resultingHTML: str = str(htmlSoup.prettify())
+        lines.extend([" </body>", "</html>", ""])
 
-        resultingHTML = self.__getElementContentInlined(resultingHTML, "a")
-        resultingHTML = self.__getDecodedASCII(resultingHTML)
+        return "\n".join(lines)
 
-        return resultingHTML
+    def renderIndexHTML(self, projectNames: List[str]) -> str:
+        """Renders the PEP 503 root page of a local repository, listing the 'projectNames'."""
 
-    def existsHTMLEntry(self, htmlString: str, tagName: str, entryText: str) -> bool:
-        soup = BeautifulSoup(htmlString, "html.parser")
+        return self.renderHTML(None, [LinkRecord(projectName, "./" + projectName) for projectName in projectNames])
 
-        if soup.find(tagName, string=entryText):
-            return True
-        return False
-
-    def insertHTMLEntry(self, htmlString: str, tagName: str, newEntryText: str, additionalAttrs: Dict[str, str]) -> Tuple[bool, str]:
-        """Appends a new element <'tagName'> into the 'htmlString' body, with the attributes in 'attributes'. Returns whether the entry already existed in the htmlString, and the updated htmlString."""
-
-        soup = BeautifulSoup(htmlString, "html.parser")
-
-        if soup.find(tagName, string=newEntryText):
-            return True, ""
-
-        newEntry = soup.new_tag(tagName)
-        for attrName, attrValue in additionalAttrs.items():
-            newEntry[attrName] = attrValue
-        newEntry.string = newEntryText
+    def renderProjectHTML(self, projectName: str, fileRecords: List[FileRecord]) -> str:
+        """Renders the PEP 503 page of the project 'projectName', listing the 'fileRecords' (with their hash, and their 'data-requires-python' and 'data-yanked' attributes, if any)."""
 
-        soup.html.body.append(newEntry)
+        links: List[LinkRecord] = list()
+        for fileRecord in fileRecords:
+            attributes: Dict[str, str] = dict()
+            if fileRecord.requiresPython is not None:
+                attributes["data-requires-python"] = fileRecord.requiresPython
+            if fileRecord.yanked:
+                attributes["data-yanked"] = fileRecord.yanked if isinstance(fileRecord.yanked, str) else ""
 
-        return False, self.__prettifyHTML(soup)
+            links.append(LinkRecord(fileRecord.fileName, fileRecord.link, attributes))
 
-    def removeHTMLEntry(self, htmlString: str, tagName: str, entryText: str) -> Tuple[bool, str]:
-        """Removes the element identified by a 'tagName' and 'entryText' from the 'htmlString'. Returns whether the entry already existed in the htmlString, and the updated htmlString."""
-
-        soup = BeautifulSoup(htmlString, "html.parser")
-
-        tagToRemove = soup.find(tagName, string=entryText)
-        if not tagToRemove:
-            return False, htmlString
-
-        tagToRemove.decompose()
-
-        return True, self.__prettifyHTML(soup)
-
-    def __addZipsOrTarsToEntries(self, zipAndTarsDict: Dict[str, str], originalSoup: BeautifulSoup, aEntriesOutput: List[bs4Element.Tag]):
-        for name, ext in zipAndTarsDict.items():
-
-            aEntry: str = originalSoup.find("a", string=name + "." + ext)
-            if not aEntry is None:
-                aEntriesOutput.append(aEntry)
+        return self.renderHTML("Links for " + projectName, links)
 
     def __isDevFile(self, fileName: str) -> bool:
         if re.search(rf"\.dev\d+", fileName):
@@ -375,42 +287,37 @@ class HTMLManager:
     def __isRequiredVersion(self, fileName):
         return self.packageVersion in fileName
 
-    def _printFilteredOutFiles(self, nonFilteredEntries: bs4Element.ResultSet[bs4Element.Tag], filteredEntries: List[bs4Element.Tag]):
+    def _printFilteredOutFiles(self, nonFilteredFileNames: List[str], filteredFileNames: List[str]):
         filteredCounter = 0
-        print("Filtered out entries:")
-        for nonFilteredEntry in nonFilteredEntries:
-            if not nonFilteredEntry in filteredEntries:
-                print(nonFilteredEntry.string)
+        print("Filtered out entries:", file=self._output)
+        for nonFilteredFileName in nonFilteredFileNames:
+            if not nonFilteredFileName in filteredFileNames:
+                print(nonFilteredFileName, file=self._output)
 
                 filteredCounter += 1
-        if filteredCounter == 0: print("-")
-        print("\n\tIF YOU OBSERVED SOME ENTRY THAT SHOULD NOT BE FILTERED OUT, CHECK YOUR CURRENT COMMAND OPTIONS (--help) AND THE WHEEL FILTERS WITH COMMAND 'config'.\n")
-
-    def filterInHTML(self, htmlContent: str, regexZIPAndTars: str) -> str:
-        """Returns an HTML that keeps all those <a> entries from 'htmlContent' that follow all the specified set of rules (command flags and wheels filtering system stated in settings/wheelFilters.py). The ones that do not match any are filtered out."""
+        if filteredCounter == 0: print("-", file=self._output)
+        print("\n\tIF YOU OBSERVED SOME ENTRY THAT SHOULD NOT BE FILTERED OUT, CHECK YOUR CURRENT COMMAND OPTIONS (--help) AND THE WHEEL FILTERS WITH COMMAND 'config'.\n", file=self._output)
 
-        outputSoup = BeautifulSoup(self._baseHTML_fromScratch, "html.parser")
+    def filterFileNames(self, fileNames: List[str], regexZIPAndTars: str) -> List[str]:
+        """Returns the subset of 'fileNames' that follow all the specified set of rules (command flags and wheels filtering system stated in settings/wheelFilters.py)."""
 
         zipAndTarsDict: Dict[str, str] = dict()
 
-        originalSoup = BeautifulSoup(htmlContent, "html.parser")
-        aEntries: bs4Element.ResultSet[bs4Element.Tag] = originalSoup.find_all("a")
-
-        aEntriesOutput: List[bs4Element.Tag] = list()
-        for aEntry in aEntries:
-            if (self.__isDevFile(aEntry.string) and not self.includeDevs) or (self.__isRCFile(aEntry.string) and not self.includeRCs):
+        filteredFileNames: List[str] = list()
+        for fileName in fileNames:
+            if (self.__isDevFile(fileName) and not self.includeDevs) or (self.__isRCFile(fileName) and not self.includeRCs):
                 continue
 
-            if self.__isPlatformSpecificWheel(aEntry.string) and not self.includePlatformSpecific:
+            if self.__isPlatformSpecificWheel(fileName) and not self.includePlatformSpecific:
                 continue
 
-            if not self.__isRequiredVersion(aEntry.string):
+            if not self.__isRequiredVersion(fileName):
                 continue
 
-            if not self.onlySources and self._wheelsManager.isValidWheel(aEntry.string):    # Checking wheels
-                aEntriesOutput.append(aEntry)
-            else:                                                                           # Checking source codes
-                reSult = re.match(regexZIPAndTars, aEntry.string)
+            if not self.onlySources and self._wheelsManager.isValidWheel(fileName, self._output):     # Checking wheels
+                filteredFileNames.append(fileName)
+            else:                                                                       # Checking source codes
+                reSult = re.match(regexZIPAndTars, fileName)
                 if reSult:
                     reSultName: str = reSult.group(1)
                     reSultExtension: str = reSult.group(2)
@@ -421,23 +328,46 @@ class HTMLManager:
                         if not reSultName in zipAndTarsDict.keys():
                             zipAndTarsDict[reSultName] = reSultExtension
 
-        self.__addZipsOrTarsToEntries(zipAndTarsDict, originalSoup, aEntriesOutput)
+        for name, ext in zipAndTarsDict.items():
+            filteredFileNames.append(name + "." + ext)
 
         if self.printAllFileNames:
-            self._printFilteredOutFiles(aEntries, aEntriesOutput)
+            self._printFilteredOutFiles(fileNames, filteredFileNames)
+
+        return filteredFileNames
+
+    def filterFileRecords(self, fileRecords: Dict[str, FileRecord], regexZIPAndTars: str) -> Dict[str, FileRecord]:
+        """Same as filterFileNames, but for the file records of a simple index, the file name in the key."""
 
-        for aEntry in aEntriesOutput:
-            outputSoup.html.body.append(aEntry)
+        return {fileName: fileRecords[fileName] for fileName in self.filterFileNames(list(fileRecords.keys()), regexZIPAndTars)}
 
-        return self.__prettifyHTML(outputSoup)
+    def getLinkRecords(self, pypiPackageHTML: str) -> Dict[str, LinkRecord]:
+        """Returns the <a> entries appearing in 'pypiPackageHTML', the file name in the key."""
+
+        return self.__parseHTML(pypiPackageHTML)[1]
 
     def getHRefsList(self, pypiPackageHTML: str) -> Dict[str, str]:
         """Returns a dict of the href attributes appearing in 'pypiPackageHTML', the package's name in the key."""
 
-        soup = BeautifulSoup(pypiPackageHTML, "html.parser")
+        return {fileName: link.href for fileName, link in self.getLinkRecords(pypiPackageHTML).items()}
+
+    def getFileRecords(self, pypiPackageHTML: str, pageURL: str) -> Dict[str, FileRecord]:
+        """Returns the files listed in the PEP 503 project page 'pypiPackageHTML', the file name in the key. Relative URLs are resolved against 'pageURL'."""
+
+        resultingDict: Dict[str, FileRecord] = dict()
+        for fileName, link in self.getLinkRecords(pypiPackageHTML).items():
+            url: str = urldefrag(urljoin(pageURL, link.href))[0]
+
+            hashes: Dict[str, str] = dict()
+            if link.hashName is not None:
+                hashes[link.hashName] = link.hashValue
+
+            yanked = link.attributes.get("data-yanked")
+            if yanked is not None:
+                yanked = yanked if yanked else True
+            else:
+                yanked = False
 
-        resultingDict: Dict[str, str] = dict()
-        for a in soup.find_all("a", href=True):
-            resultingDict[str(a.string)] = a["href"]
+            resultingDict[fileName] = FileRecord(fileName, url, hashes=hashes, requiresPython=link.attributes.get("data-requires-python"), yanked=yanked, uploadTime=link.attributes.get("data-upload-time"))
 
         return resultingDict
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict
+
+
+class HTTPCache:
+
+    """
+    A class to keep a local copy of remote pages, keyed by their URL, along with their HTTP validators (ETag and Last-Modified). Those validators are sent back
+    in conditional requests (If-None-Match/If-Modified-Since), so an unchanged page is answered with a '304 Not Modified' and it is not downloaded again.
+
+    Each entry also keeps the time it was last confirmed against the remote, so it can be reused without asking the remote at all for a while (see isFresh), and the fingerprint of the last successful synchronization made from it, which lets the caller know whether there is anything to do at all.
+    """
+
+    def __init__(self, cacheDir: str):
+        self._cacheDir: str = cacheDir
+
+    @property
+    def cacheDir(self):
+        return self._cacheDir
+
+    def __getEntryPath(self, url: str) -> str:
+        return os.path.join(self._cacheDir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def __writeAtomically(self, filePath: str, content: bytes):
+        fileDescriptor, tmpFilePath = tempfile.mkstemp(dir=self._cacheDir, suffix=".tmp")
+        try:
+            with os.fdopen(fileDescriptor, "wb") as tmpFile:
+                tmpFile.write(content)
+            os.replace(tmpFilePath, filePath)
+        finally:
+            if os.path.exists(tmpFilePath):
+                os.remove(tmpFilePath)
+
+    def __getMetadata(self, url: str) -> Dict[str, str]:
+        try:
+            with open(self.__getEntryPath(url) + ".json", "r") as metadataFile:
+                metadata: Dict[str, str] = json.load(metadataFile)
+        except (OSError, ValueError):
+            return dict()
+
+        if metadata.get("url") != url or not os.path.exists(self.__getEntryPath(url) + ".body"):
+            return dict()
+
+        return metadata
+
+    def __setMetadata(self, url: str, metadata: Dict[str, str]):
+        self.__writeAtomically(self.__getEntryPath(url) + ".json", json.dumps(metadata).encode("utf-8"))
+
+    def getConditionalHeaders(self, url: str) -> Dict[str, str]:
+        """Returns the headers needed to perform a conditional request for 'url'. Empty if there is nothing cached for it."""
+
+        metadata: Dict[str, str] = self.__getMetadata(url)
+
+        headers: Dict[str, str] = dict()
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("lastModified"):
+            headers["If-Modified-Since"] = metadata["lastModified"]
+
+        return headers
+
+    def getContent(self, url: str) -> bytes:
+        with open(self.__getEntryPath(url) + ".body", "rb") as bodyFile:
+            return bodyFile.read()
+
+    def getContentType(self, url: str) -> str:
+        return self.__getMetadata(url).get("contentType")
+
+    def isFresh(self, url: str, ttl: float) -> bool:
+        """Whether 'url' is cached and was last confirmed against the remote less than 'ttl' seconds ago."""
+
+        fetchedAt: float = self.__getMetadata(url).get("fetchedAt")
+        return fetchedAt is not None and 0 <= time.time() - fetchedAt < ttl
+
+    def touch(self, url: str):
+        """Records that the cached 'url' has just been confirmed to be up to date (e.g. by a '304 Not Modified')."""
+
+        metadata: Dict[str, str] = self.__getMetadata(url)
+        if not metadata:
+            return
+
+        metadata["fetchedAt"] = time.time()
+        self.__setMetadata(url, metadata)
+
+    def store(self, url: str, etag: str, lastModified: str, contentType: str, content: bytes):
+        """Caches the 'content' for 'url'. Any previous synchronization fingerprint is discarded, since it referred to an older content."""
+
+        os.makedirs(self._cacheDir, exist_ok=True)
+
+        self.__writeAtomically(self.__getEntryPath(url) + ".body", content)
+        self.__setMetadata(url, {"url": url, "etag": etag, "lastModified": lastModified, "contentType": contentType, "fetchedAt": time.time(), "syncFingerprint": None})
+
+    def getSyncFingerprint(self, url: str) -> str:
+        return self.__getMetadata(url).get("syncFingerprint")
+
+    def setSyncFingerprint(self, url: str, fingerprint: str):
+        metadata: Dict[str, str] = self.__getMetadata(url)
+        if not metadata:
+            return
+
+        metadata["syncFingerprint"] = fingerprint
+        self.__setMetadata(url, metadata)
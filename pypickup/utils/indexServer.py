@@ -0,0 +1,629 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from pypickup.utils.catalog import Catalog
+
+
+class IndexPage:
+
+    """
+    An index page (HTML or JSON) of the local repository as kept in memory by the IndexServer: its content, along with its gzipped version (computed the
+    first time a client accepts it) and its ETag. 'fileId' identifies the version of the file it was read from, so it is read again only if it changes.
+    """
+
+    __slots__ = ("_fileId", "_content", "_gzippedContent", "_etag")
+
+    def __init__(self, fileId: Tuple[int, int, int], content: bytes):
+        self._fileId: Tuple[int, int, int] = fileId
+        self._content: bytes = content
+        self._gzippedContent: bytes = None
+        self._etag: str = '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+    @property
+    def fileId(self):
+        return self._fileId
+
+    @property
+    def content(self):
+        return self._content
+
+    @property
+    def gzippedContent(self) -> bytes:
+        if self._gzippedContent is None:
+            self._gzippedContent = gzip.compress(self._content, compresslevel=6, mtime=0)
+
+        return self._gzippedContent
+
+    @property
+    def etag(self):
+        return self._etag
+
+
+class ProxiedDownload:
+
+    """
+    A file being fetched from the upstream by the proxy of an IndexServer, shared by all the clients requesting it meanwhile. Its progress is the size of
+    the '.part' file it is being written into, so the clients can be sent the bytes already there while the rest arrive.
+    """
+
+    __slots__ = ("_loop", "_size", "_partFilePath", "_written", "_done", "_ok", "_changed")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, size: int = None):
+        self._loop: asyncio.AbstractEventLoop = loop
+        self._size: int = size
+        self._partFilePath: str = None
+        self._written: int = 0
+        self._done: bool = False
+        self._ok: bool = False
+        self._changed: asyncio.Future = loop.create_future()
+
+    @property
+    def size(self):
+        """The size of the file as stated by the upstream index. None if unknown."""
+
+        return self._size
+
+    @property
+    def partFilePath(self):
+        return self._partFilePath
+
+    @property
+    def written(self):
+        return self._written
+
+    @property
+    def done(self):
+        return self._done
+
+    @property
+    def ok(self):
+        return self._ok
+
+    @property
+    def changed(self) -> asyncio.Future:
+        """A future resolved on the next change of the download (more bytes written, or finished)."""
+
+        return self._changed
+
+    def __notify(self):
+        self._changed.set_result(None)
+        self._changed = self._loop.create_future()
+
+    def update(self, partFilePath: str, written: int):
+        self._partFilePath = partFilePath
+        self._written = written
+        self.__notify()
+
+    def finish(self, ok: bool):
+        self._done = True
+        self._ok = ok
+        self.__notify()
+
+
+class IndexServer:
+
+    """
+    An asyncio HTTP/1.1 server of a local repository, compliant with PEP 503 and PEP 691: the index pages are served either in HTML or in JSON, as
+    negotiated through the Accept header (or the 'format' query parameter), and the distribution files are sent with sendfile, without copying them
+    through user space.
+
+    Index pages are kept in memory (up to 'cacheSize' of them) and read again only when their file changes on disk, so they can be updated (e.g. by 'add')
+    while serving. They are gzipped if the client accepts it, and revalidated with ETags. Files support ETags, Last-Modified and single Range requests
+    (with If-Range), so interrupted downloads can be resumed. Connections are kept alive between requests.
+
+    Both the root of the server and /simple/ can be used as the index URL. Project names are normalized as stated in PEP 503, so pip finds the projects
+    whatever the case or separators they were added with.
+
+    With a 'proxy', the server is a pull-through cache: project pages are the ones the proxy builds (e.g. from the upstream files, filtered), and files
+    missing in the local repository are fetched by the proxy into it. Concurrent requests of the same file share a single fetch, and are sent the file
+    while it is being written. The proxy is expected to provide, all of them blocking (they are run in worker threads):
+        getProxiedProjectPage(projectName, contentType) -> IndexPage, or None to serve the local page (if any).
+        getProxiedFileRecord(projectName, fileName) -> FileRecord of the upstream file (its size, if known, is used to stream it), or None if not found.
+        fetchProxiedFile(projectName, fileName, onProgress) -> bool, calling onProgress(partFilePath, writtenBytes) as the file is being written.
+    """
+
+    _contentTypeHTML: str = "text/html"
+    _contentTypeHTMLv1: str = "application/vnd.pypi.simple.v1+html"
+    _contentTypeJSONv1: str = "application/vnd.pypi.simple.v1+json"
+    _contentTypeFile: str = "application/octet-stream"
+
+    _htmlFileName: str = "index.html"
+    _jsonFileName: str = "index.json"
+    _simplePrefix: str = "/simple"
+    # Directories of the local repository which are not projects, and thus never served nor proxied
+    _nonProjectDirs: List[str] = ["settings"]
+
+    _minGzipSize: int = 512
+    _indexMaxAge: int = 600
+    _keepAliveTimeout: float = 15.0
+    _maxHeaders: int = 100
+    _backlog: int = 1024
+    _proxyWorkers: int = 64
+
+    def __init__(self, pypiLocalPath: str, catalogPath: str, host: str = "127.0.0.1", port: int = 8080, cacheSize: int = 4096, printVerbose: bool = False, proxy=None):
+        if cacheSize < 1:
+            raise ValueError("IndexServer::__init__ - The number of cached index pages must be greater than 0.")
+
+        self._pypiLocalPath: str = os.path.abspath(pypiLocalPath)
+        self._catalogPath: str = catalogPath
+        self._host: str = host
+        self._port: int = port
+        self._cacheSize: int = cacheSize
+        self._printVerbose: bool = printVerbose
+
+        self._catalog: Catalog = None
+        self._server: asyncio.AbstractServer = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._connections: set = set()
+
+        self._pages: OrderedDict = OrderedDict()
+        self._projectNames: Dict[str, str] = dict()
+        self._projectNamesId: Tuple[int, int, int] = None
+
+        self._proxy = proxy
+        self._proxyExecutor: ThreadPoolExecutor = None
+        self._downloads: Dict[str, ProxiedDownload] = dict()
+        self._downloadTasks: set = set()
+
+    @property
+    def pypiLocalPath(self):
+        return self._pypiLocalPath
+
+    @property
+    def host(self):
+        return self._host
+
+    @property
+    def port(self):
+        """The port the server listens on: the actual one once started, even if it was requested as 0 (any free port)."""
+
+        return self._port
+
+    @property
+    def url(self) -> str:
+        return "http://" + self._host + ":" + str(self._port) + "/"
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._catalog = Catalog(self._catalogPath)
+        if self._proxy is not None:
+            self._proxyExecutor = ThreadPoolExecutor(max_workers=self._proxyWorkers)
+        self._server = await asyncio.start_server(self.__handleConnection, self._host, self._port, backlog=self._backlog, reuse_address=True)
+        self._port = self._server.sockets[0].getsockname()[1]
+
+    async def serveForever(self, onStarted: Callable = None):
+        """Starts the server and serves until it is stopped. 'onStarted', if given, is called once it is listening."""
+
+        await self.start()
+        if onStarted is not None:
+            onStarted()
+
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._catalog.close()
+            if self._proxyExecutor is not None:
+                self._proxyExecutor.shutdown(wait=False)
+
+    def stop(self):
+        """Stops the server, closing the open connections. Can be called from any thread."""
+
+        def closeAll():
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+
+        self._loop.call_soon_threadsafe(closeAll)
+
+    #### Requests ####
+
+    async def __handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            keepAlive: bool = True
+            while keepAlive:
+                request = await self.__readRequest(reader)
+                if request is None:
+                    break
+
+                method, target, version, headers = request
+                keepAlive = self.__isKeepAlive(version, headers)
+
+                await self._handleRequest(writer, method, target, headers, keepAlive)
+
+                if self._printVerbose:
+                    print(method + " " + target)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def __readRequest(self, reader: asyncio.StreamReader) -> Tuple[str, str, str, Dict[str, str]]:
+        """Reads the next request of the connection: its method, target, HTTP version and headers (with lowercase names). None if the client is gone or has been idle for too long."""
+
+        try:
+            requestLine: bytes = await asyncio.wait_for(reader.readline(), self._keepAliveTimeout)
+        except asyncio.TimeoutError:
+            return None
+
+        if not requestLine.strip():
+            return None
+
+        parts: List[str] = requestLine.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError("IndexServer::__readRequest - Malformed request line.")
+
+        headers: Dict[str, str] = dict()
+        for _ in range(self._maxHeaders + 1):
+            headerLine: str = (await reader.readline()).decode("latin-1").strip()
+            if headerLine == "":
+                break
+
+            name, _, value = headerLine.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise ValueError("IndexServer::__readRequest - Too many headers.")
+
+        # Requests to an index do not have a body, but skip it if any to keep the connection in sync
+        contentLength: int = int(headers.get("content-length", "0"))
+        if contentLength > 0:
+            await reader.readexactly(contentLength)
+
+        return parts[0], parts[1], parts[2], headers
+
+    def __isKeepAlive(self, version: str, headers: Dict[str, str]) -> bool:
+        connection: str = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+
+        return connection != "close"
+
+    async def _handleRequest(self, writer: asyncio.StreamWriter, method: str, target: str, headers: Dict[str, str], keepAlive: bool):
+        if method not in ["GET", "HEAD"]:
+            await self.__sendResponse(writer, HTTPStatus.METHOD_NOT_ALLOWED, {"Allow": "GET, HEAD"}, b"", method, keepAlive)
+            return
+
+        splitTarget = urlsplit(target)
+        path: str = unquote(splitTarget.path)
+        if path == self._simplePrefix or path.startswith(self._simplePrefix + "/"):
+            path = path[len(self._simplePrefix) :]
+
+        segments: List[str] = [segment for segment in path.split("/") if segment != ""]
+        if any(segment.startswith(".") or "\\" in segment for segment in segments) or len(segments) > 2:
+            await self.__sendNotFound(writer, method, keepAlive)
+            return
+
+        formatQuery: str = parse_qs(splitTarget.query).get("format", [None])[0]
+
+        if len(segments) == 0:
+            await self.__sendIndexPage(writer, method, headers, keepAlive, self._pypiLocalPath, formatQuery)
+            return
+
+        projectDir: str = self._getProjectDir(segments[0])
+        if projectDir is None and self._proxy is not None and self._normalizeName(segments[0]) not in self._nonProjectDirs:
+            projectDir = self._normalizeName(segments[0])
+
+        if projectDir is None:
+            await self.__sendNotFound(writer, method, keepAlive)
+        elif len(segments) == 1 and not path.endswith("/"):
+            await self.__sendResponse(writer, HTTPStatus.MOVED_PERMANENTLY, {"Location": splitTarget.path + "/" + ("?" + splitTarget.query if splitTarget.query else "")}, b"", method, keepAlive)
+        elif len(segments) == 1:
+            await self.__sendIndexPage(writer, method, headers, keepAlive, os.path.join(self._pypiLocalPath, projectDir), formatQuery, projectDir)
+        elif self._proxy is not None and not os.path.isfile(os.path.join(self._pypiLocalPath, projectDir, segments[1])) and self.__isServableFile(segments[1]):
+            await self.__sendProxiedFile(writer, method, headers, keepAlive, projectDir, segments[1])
+        else:
+            await self.__sendFile(writer, method, headers, keepAlive, os.path.join(self._pypiLocalPath, projectDir, segments[1]))
+
+    #### Projects ####
+
+    @staticmethod
+    def _normalizeName(projectName: str) -> str:
+        """PEP 503 normalized name of a project."""
+
+        return re.sub(r"[-_.]+", "-", projectName).lower()
+
+    def __getFileId(self, filePath: str) -> Tuple[int, int, int]:
+        """What identifies the current version of a file: its inode, size and modification time. None if it does not exist."""
+
+        try:
+            fileStat = os.stat(filePath)
+        except OSError:
+            return None
+
+        return fileStat.st_ino, fileStat.st_size, fileStat.st_mtime_ns
+
+    def _getProjectDir(self, projectName: str) -> str:
+        """The directory of the project 'projectName' (as requested, i.e. normalized or not) in the local repository. None if it is not there."""
+
+        # The map from normalized names is built again from the catalog when the root index changes (i.e. when packages are added or removed)
+        rootIndexId: Tuple[int, int, int] = self.__getFileId(os.path.join(self._pypiLocalPath, self._htmlFileName))
+        if rootIndexId != self._projectNamesId:
+            self._projectNames = {self._normalizeName(packageName): packageName for packageName in self._catalog.getPackages()}
+            self._projectNamesId = rootIndexId
+
+        projectDir: str = self._projectNames.get(self._normalizeName(projectName))
+        if projectDir is None and os.path.isdir(os.path.join(self._pypiLocalPath, projectName)) and self._normalizeName(projectName) not in self._nonProjectDirs:
+            projectDir = projectName
+
+        return projectDir
+
+    #### Index pages ####
+
+    def __parseQualities(self, headerValue: str) -> Dict[str, float]:
+        """Returns the quality of each value in an Accept-like header (e.g. {"text/html": 1.0, "application/json": 0.5})."""
+
+        qualities: Dict[str, float] = dict()
+        for item in headerValue.split(","):
+            value, *parameters = [part.strip() for part in item.split(";")]
+            if value == "":
+                continue
+
+            quality: float = 1.0
+            for parameter in parameters:
+                name, _, parameterValue = parameter.partition("=")
+                if name.strip() == "q":
+                    try:
+                        quality = float(parameterValue)
+                    except ValueError:
+                        quality = 0.0
+
+            qualities[value.lower()] = quality
+
+        return qualities
+
+    def _negotiateContentType(self, accept: str) -> str:
+        """Returns the content type of the index page to serve for the 'accept' header, as stated in PEP 691 (HTML if there is no preference), or None if none of them is acceptable."""
+
+        if accept is None or accept.strip() == "":
+            return self._contentTypeHTML
+
+        qualities: Dict[str, float] = self.__parseQualities(accept)
+
+        # In order of preference of the server, for equal qualities
+        bestContentType, bestQuality = None, 0.0
+        for contentType, wildcards in [(self._contentTypeHTML, ["text/*", "*/*"]), (self._contentTypeHTMLv1, []), (self._contentTypeJSONv1, [])]:
+            quality: float = qualities.get(contentType, max([qualities[wildcard] for wildcard in wildcards if wildcard in qualities], default=0.0))
+            if quality > bestQuality:
+                bestContentType, bestQuality = contentType, quality
+
+        return bestContentType
+
+    def __getIndexPage(self, filePath: str) -> IndexPage:
+        fileId: Tuple[int, int, int] = self.__getFileId(filePath)
+        if fileId is None:
+            self._pages.pop(filePath, None)
+            return None
+
+        page: IndexPage = self._pages.get(filePath)
+        if page is None or page.fileId != fileId:
+            with open(filePath, "rb") as indexFile:
+                page = IndexPage(fileId, indexFile.read())
+            self._pages[filePath] = page
+
+        self._pages.move_to_end(filePath)
+        while len(self._pages) > self._cacheSize:
+            self._pages.popitem(last=False)
+
+        return page
+
+    async def __sendIndexPage(self, writer: asyncio.StreamWriter, method: str, headers: Dict[str, str], keepAlive: bool, indexDir: str, formatQuery: str = None, projectName: str = None):
+        contentType: str = formatQuery if formatQuery in [self._contentTypeHTML, self._contentTypeHTMLv1, self._contentTypeJSONv1] else self._negotiateContentType(headers.get("accept"))
+        if contentType is None:
+            await self.__sendResponse(writer, HTTPStatus.NOT_ACCEPTABLE, {"Content-Type": "text/plain"}, b"Supported content types: " + ", ".join([self._contentTypeHTML, self._contentTypeHTMLv1, self._contentTypeJSONv1]).encode("ascii"), method, keepAlive)
+            return
+
+        page: IndexPage = None
+        if self._proxy is not None and projectName is not None:
+            page = await self._loop.run_in_executor(self._proxyExecutor, self._proxy.getProxiedProjectPage, projectName, contentType)
+        if page is None:
+            page = self.__getIndexPage(os.path.join(indexDir, self._jsonFileName if contentType == self._contentTypeJSONv1 else self._htmlFileName))
+
+        if page is None:
+            await self.__sendNotFound(writer, method, keepAlive)
+            return
+
+        responseHeaders: Dict[str, str] = {"Content-Type": contentType, "ETag": page.etag, "Cache-Control": "max-age=" + str(self._indexMaxAge), "Vary": "Accept, Accept-Encoding"}
+
+        if page.etag in [etag.strip() for etag in headers.get("if-none-match", "").split(",")]:
+            await self.__sendResponse(writer, HTTPStatus.NOT_MODIFIED, responseHeaders, b"", method, keepAlive)
+            return
+
+        content: bytes = page.content
+        if len(content) >= self._minGzipSize and self.__parseQualities(headers.get("accept-encoding", "")).get("gzip", 0.0) > 0:
+            content = page.gzippedContent
+            responseHeaders["Content-Encoding"] = "gzip"
+
+        await self.__sendResponse(writer, HTTPStatus.OK, responseHeaders, content, method, keepAlive)
+
+    #### Files ####
+
+    def __getRange(self, rangeHeader: str, size: int) -> Tuple[int, int]:
+        """Returns the (first, last) bytes of a single 'bytes' range, (None, None) if it cannot be satisfied, or None if it is not a single 'bytes' range (i.e. it should be ignored)."""
+
+        byteRange = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", rangeHeader)
+        if not byteRange or (byteRange[1] == "" and byteRange[2] == ""):
+            return None
+
+        if byteRange[1] == "":
+            suffixLength: int = int(byteRange[2])
+            return (max(size - suffixLength, 0), size - 1) if suffixLength > 0 and size > 0 else (None, None)
+
+        first: int = int(byteRange[1])
+        if first >= size:
+            return None, None
+
+        last: int = min(int(byteRange[2]), size - 1) if byteRange[2] != "" else size - 1
+        if first > last:
+            return None
+
+        return first, last
+
+    def __isIfRangeFulfilled(self, ifRange: str, etag: str, lastModified: float) -> bool:
+        if ifRange is None:
+            return True
+
+        if ifRange.startswith('"') or ifRange.startswith("W/"):
+            return ifRange == etag
+
+        try:
+            return parsedate_to_datetime(ifRange).timestamp() >= int(lastModified)
+        except (TypeError, ValueError):
+            return False
+
+    def __isServableFile(self, fileName: str) -> bool:
+        """Whether 'fileName' can be a distribution file, i.e. it is not an index, nor a partial download."""
+
+        return fileName not in [self._htmlFileName, self._jsonFileName] and not re.search(r"\.part(\.\w+)?$", fileName)
+
+    async def __sendFile(self, writer: asyncio.StreamWriter, method: str, headers: Dict[str, str], keepAlive: bool, filePath: str):
+        if not self.__isServableFile(os.path.basename(filePath)) or not os.path.isfile(filePath):
+            await self.__sendNotFound(writer, method, keepAlive)
+            return
+
+        with open(filePath, "rb") as file:
+            fileStat = os.fstat(file.fileno())
+            size: int = fileStat.st_size
+            etag: str = '"' + format(size, "x") + "-" + format(fileStat.st_mtime_ns, "x") + '"'
+
+            responseHeaders: Dict[str, str] = {"Content-Type": self._contentTypeFile, "ETag": etag, "Last-Modified": formatdate(fileStat.st_mtime, usegmt=True), "Accept-Ranges": "bytes"}
+
+            if etag in [etag.strip() for etag in headers.get("if-none-match", "").split(",")]:
+                await self.__sendResponse(writer, HTTPStatus.NOT_MODIFIED, responseHeaders, b"", method, keepAlive)
+                return
+
+            status: HTTPStatus = HTTPStatus.OK
+            first, last = 0, size - 1
+
+            byteRange: Tuple[int, int] = self.__getRange(headers["range"], size) if "range" in headers and self.__isIfRangeFulfilled(headers.get("if-range"), etag, fileStat.st_mtime) else None
+            if byteRange == (None, None):
+                responseHeaders["Content-Range"] = "bytes */" + str(size)
+                await self.__sendResponse(writer, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, responseHeaders, b"", method, keepAlive)
+                return
+            elif byteRange is not None:
+                status = HTTPStatus.PARTIAL_CONTENT
+                first, last = byteRange
+                responseHeaders["Content-Range"] = "bytes " + str(first) + "-" + str(last) + "/" + str(size)
+
+            await self.__sendHead(writer, status, responseHeaders, last - first + 1, keepAlive)
+            if method == "GET" and last >= first:
+                await writer.drain()
+                await self._loop.sendfile(writer.transport, file, first, last - first + 1)
+
+    #### Proxied files ####
+
+    async def __fetchProxiedFile(self, download: ProxiedDownload, projectName: str, fileName: str, filePath: str):
+        ok: bool = False
+        try:
+            ok = await self._loop.run_in_executor(self._proxyExecutor, self._proxy.fetchProxiedFile, projectName, fileName, lambda partFilePath, written: self._loop.call_soon_threadsafe(download.update, partFilePath, written))
+        finally:
+            del self._downloads[filePath]
+            download.finish(ok)
+
+    async def __getProxiedDownload(self, projectName: str, fileName: str, filePath: str) -> ProxiedDownload:
+        """Returns the download of the file by the proxy, starting it if it is not in progress already. None if the proxy does not know the file."""
+
+        if filePath not in self._downloads:
+            fileRecord = await self._loop.run_in_executor(self._proxyExecutor, self._proxy.getProxiedFileRecord, projectName, fileName)
+            if fileRecord is None:
+                return None
+
+            # Another request may have started it in the meantime
+            if filePath not in self._downloads:
+                download = ProxiedDownload(self._loop, fileRecord.size)
+                self._downloads[filePath] = download
+
+                task = asyncio.ensure_future(self.__fetchProxiedFile(download, projectName, fileName, filePath))
+                self._downloadTasks.add(task)
+                task.add_done_callback(self._downloadTasks.discard)
+
+        return self._downloads[filePath]
+
+    async def __sendProxiedFile(self, writer: asyncio.StreamWriter, method: str, headers: Dict[str, str], keepAlive: bool, projectName: str, fileName: str):
+        filePath: str = os.path.join(self._pypiLocalPath, projectName, fileName)
+
+        download: ProxiedDownload = await self.__getProxiedDownload(projectName, fileName, filePath)
+        if download is None:
+            await self.__sendNotFound(writer, method, keepAlive)
+            return
+
+        # Only whole files of a known size are streamed while being fetched; the rest are served once fetched
+        streamed: bool = method == "GET" and download.size is not None and "range" not in headers
+        while not download.done and not (streamed and download.written > 0):
+            await download.changed
+
+        if download.done and not download.ok:
+            await self.__sendResponse(writer, HTTPStatus.BAD_GATEWAY, {"Content-Type": "text/plain"}, b"Unable to fetch the file from the upstream.", method, keepAlive)
+        elif not streamed:
+            await self.__sendFile(writer, method, headers, keepAlive, filePath)
+        else:
+            await self.__streamProxiedFile(writer, download, filePath, keepAlive)
+
+    async def __streamProxiedFile(self, writer: asyncio.StreamWriter, download: ProxiedDownload, filePath: str, keepAlive: bool):
+        """Sends the file while it is being fetched, tailing its '.part' file. If the fetch fails (or restarts from the beginning) once some bytes have been sent, the connection is aborted, so the client knows the file is incomplete."""
+
+        size: int = download.size
+        await self.__sendHead(writer, HTTPStatus.OK, {"Content-Type": self._contentTypeFile, "Accept-Ranges": "bytes"}, size, keepAlive)
+
+        sent: int = 0
+        file = None
+        try:
+            while sent < size:
+                if download.done:
+                    if not download.ok:
+                        raise ConnectionAbortedError("IndexServer::__streamProxiedFile - The fetch of '" + filePath + "' failed.")
+
+                    # The '.part' file, if opened, is the same file once renamed
+                    file = file if file is not None else open(filePath, "rb")
+                    available: int = os.fstat(file.fileno()).st_size
+                    if available <= sent:
+                        raise ConnectionAbortedError("IndexServer::__streamProxiedFile - '" + filePath + "' is smaller than stated by the upstream.")
+                else:
+                    if download.written < sent:
+                        raise ConnectionAbortedError("IndexServer::__streamProxiedFile - The fetch of '" + filePath + "' restarted.")
+
+                    file = file if file is not None else open(download.partFilePath, "rb")
+                    available = download.written
+
+                if available > sent:
+                    count: int = min(available, size) - sent
+                    await writer.drain()
+                    await self._loop.sendfile(writer.transport, file, sent, count)
+                    sent += count
+                else:
+                    await download.changed
+        finally:
+            if file is not None:
+                file.close()
+
+    #### Responses ####
+
+    async def __sendHead(self, writer: asyncio.StreamWriter, status: HTTPStatus, headers: Dict[str, str], contentLength: int, keepAlive: bool):
+        head: List[str] = ["HTTP/1.1 " + str(status.value) + " " + status.phrase, "Server: pypickup", "Date: " + formatdate(usegmt=True)]
+        head.extend(name + ": " + value for name, value in headers.items())
+        if status != HTTPStatus.NOT_MODIFIED:
+            head.append("Content-Length: " + str(contentLength))
+        head.append("Connection: " + ("keep-alive" if keepAlive else "close"))
+
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+    async def __sendResponse(self, writer: asyncio.StreamWriter, status: HTTPStatus, headers: Dict[str, str], content: bytes, method: str, keepAlive: bool):
+        await self.__sendHead(writer, status, headers, len(content), keepAlive)
+        if method != "HEAD" and status != HTTPStatus.NOT_MODIFIED:
+            writer.write(content)
+
+        await writer.drain()
+
+    async def __sendNotFound(self, writer: asyncio.StreamWriter, method: str, keepAlive: bool):
+        await self.__sendResponse(writer, HTTPStatus.NOT_FOUND, {"Content-Type": "text/plain"}, b"Not Found", method, keepAlive)
@@ -0,0 +1,112 @@
+import os
+import stat
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from pypickup.utils.catalog import Catalog
+from pypickup.utils.fileRecord import FileRecord
+from pypickup.utils.htmlManager import HTMLManager
+from pypickup.utils.jsonManager import JSONManager
+
+
+class IndexWriter:
+
+    """
+    A class to generate the indices of a local repository, both the PEP 503 HTML pages and the PEP 691 JSON ones, from its Catalog.
+
+    New files are not written one by one: they are kept in memory and flushed in batches, every 'flushEvery' files or 'flushInterval' seconds, and when the
+    writer is closed. Each flush records the files in the catalog in a single transaction, and then regenerates the indices of the affected packages. Every
+    index file is replaced atomically (a temporary file renamed over it), so a client reading the index (e.g. pip) never sees a half-written page.
+    """
+
+    _htmlFileName: str = "index.html"
+    _jsonFileName: str = "index.json"
+
+    def __init__(self, catalog: Catalog, pypiLocalPath: str, htmlManager: HTMLManager, jsonManager: JSONManager, flushEvery: int = 100, flushInterval: float = 5.0):
+        if flushEvery < 1:
+            raise ValueError("IndexWriter::__init__ - The number of files per flush must be greater than 0.")
+
+        self._catalog: Catalog = catalog
+        self._pypiLocalPath: str = pypiLocalPath
+        self._htmlManager: HTMLManager = htmlManager
+        self._jsonManager: JSONManager = jsonManager
+
+        self._flushEvery: int = flushEvery
+        self._flushInterval: float = flushInterval
+
+        self._pendingFiles: Dict[str, Tuple[List[FileRecord], Dict[str, str], str]] = dict()
+        self._pendingFilesCount: int = 0
+        self._lastFlush: float = time.monotonic()
+
+    @property
+    def catalog(self):
+        return self._catalog
+
+    @property
+    def pendingFilesCount(self):
+        return self._pendingFilesCount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.close()
+
+    def __writeAtomically(self, filePath: str, content: str):
+        fileDescriptor, tmpFilePath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filePath)), suffix=".tmp")
+        try:
+            with os.fdopen(fileDescriptor, "w") as tmpFile:
+                tmpFile.write(content)
+            os.chmod(tmpFilePath, stat.S_IMODE(os.stat(filePath).st_mode) if os.path.exists(filePath) else 0o644)
+            os.replace(tmpFilePath, filePath)
+        finally:
+            if os.path.exists(tmpFilePath):
+                os.remove(tmpFilePath)
+
+    def writeBaseIndex(self):
+        """Regenerates the root index, listing all the packages in the catalog."""
+
+        packageNames: List[str] = self._catalog.getPackages()
+
+        self.__writeAtomically(os.path.join(self._pypiLocalPath, self._htmlFileName), self._htmlManager.renderIndexHTML(packageNames))
+        self.__writeAtomically(os.path.join(self._pypiLocalPath, self._jsonFileName), self._jsonManager.renderIndexJSON(packageNames))
+
+    def writePackageIndex(self, packageName: str, fileRecords: List[FileRecord] = None):
+        """Regenerates the index of the package, listing all its files in the catalog (or the 'fileRecords', if given)."""
+
+        packageLocalPath: str = os.path.join(self._pypiLocalPath, packageName)
+        os.makedirs(packageLocalPath, exist_ok=True)
+
+        if fileRecords is None:
+            fileRecords = list(self._catalog.getFiles(packageName).values())
+
+        self.__writeAtomically(os.path.join(packageLocalPath, self._htmlFileName), self._htmlManager.renderProjectHTML(packageName, fileRecords))
+        self.__writeAtomically(os.path.join(packageLocalPath, self._jsonFileName), self._jsonManager.renderProjectJSON(packageName, fileRecords))
+
+    def addFiles(self, packageName: str, fileRecords: List[FileRecord], originURLs: Dict[str, str] = None, filterProfile: str = None):
+        """Adds the 'fileRecords' to the package, flushing them if enough files or time have accumulated since the last flush. 'originURLs' are the URLs they were downloaded from, the file name in the key."""
+
+        pendingRecords, pendingOriginURLs, _ = self._pendingFiles.get(packageName, (list(), dict(), None))
+        pendingRecords.extend(fileRecords)
+        pendingOriginURLs.update(originURLs if originURLs is not None else dict())
+        self._pendingFiles[packageName] = (pendingRecords, pendingOriginURLs, filterProfile)
+
+        self._pendingFilesCount += len(fileRecords)
+        if self._pendingFilesCount >= self._flushEvery or time.monotonic() - self._lastFlush >= self._flushInterval:
+            self.flush()
+
+    def flush(self):
+        """Records the pending files in the catalog, and regenerates the indices of their packages, only once for all of them."""
+
+        self._lastFlush = time.monotonic()
+
+        for packageName, (fileRecords, originURLs, filterProfile) in self._pendingFiles.items():
+            self._catalog.addFiles(packageName, fileRecords, originURLs, filterProfile)
+            self.writePackageIndex(packageName)
+
+        self._pendingFiles = dict()
+        self._pendingFilesCount = 0
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,6 @@
+class InvalidInputError(ValueError):
+
+    """
+    Raised on incorrect input from the user (e.g. a malformed version, an out of range option or incorrect wheel filter settings), as opposed to a failure
+    of pypickup itself. The command line reports it with its message only, without a traceback.
+    """
@@ -0,0 +1,58 @@
+import json
+from typing import Dict, List
+from urllib.parse import urljoin
+
+from pypickup.utils.fileRecord import FileRecord
+
+
+class JSONManager:
+
+    """
+    A class used for reading and writing the JSON simple index pages defined in PEP 691.
+    """
+
+    _contentTypeJSON: str = "application/vnd.pypi.simple.v1+json"
+    _apiVersion: str = "1.1"
+
+    def getContentType(self) -> str:
+        return self._contentTypeJSON
+
+    def isJSONContentType(self, contentType: str) -> bool:
+        if contentType is None:
+            return False
+
+        return contentType.split(";")[0].strip() == self._contentTypeJSON
+
+    def getFileRecords(self, jsonContent: bytes, pageURL: str) -> Dict[str, FileRecord]:
+        """Returns the files listed in the PEP 691 project page 'jsonContent', the file name in the key. Relative URLs are resolved against 'pageURL'."""
+
+        project = json.loads(jsonContent)
+
+        resultingDict: Dict[str, FileRecord] = dict()
+        for file in project.get("files", []):
+            resultingDict[file["filename"]] = FileRecord(file["filename"], urljoin(pageURL, file["url"]), hashes=file.get("hashes"), requiresPython=file.get("requires-python"), yanked=file.get("yanked", False), size=file.get("size"), uploadTime=file.get("upload-time"))
+
+        return resultingDict
+
+    def __getFileEntry(self, fileRecord: FileRecord) -> Dict:
+        fileEntry: Dict = {"filename": fileRecord.fileName, "url": fileRecord.url, "hashes": fileRecord.hashes}
+        if fileRecord.requiresPython is not None:
+            fileEntry["requires-python"] = fileRecord.requiresPython
+        if fileRecord.yanked:
+            fileEntry["yanked"] = fileRecord.yanked
+        if fileRecord.size is not None:
+            fileEntry["size"] = fileRecord.size
+        if fileRecord.uploadTime is not None:
+            fileEntry["upload-time"] = fileRecord.uploadTime
+
+        return fileEntry
+
+    def renderProjectJSON(self, projectName: str, fileRecords: List[FileRecord]) -> str:
+        """Renders the PEP 691 project page of 'projectName', listing the 'fileRecords'."""
+
+        return json.dumps({"meta": {"api-version": self._apiVersion}, "name": projectName, "files": [self.__getFileEntry(fileRecord) for fileRecord in fileRecords]})
+
+    def renderIndexJSON(self, projectNames: List[str]) -> str:
+        """Renders the PEP 691 root page, listing the 'projectNames'."""
+
+        return json.dumps({"meta": {"api-version": self._apiVersion}, "projects": [{"name": projectName} for projectName in projectNames]})
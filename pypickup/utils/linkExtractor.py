@@ -0,0 +1,106 @@
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Tuple
+from urllib.parse import urldefrag
+
+
+class LinkRecord:
+
+    """
+    A compact record of an <a> entry of a simple index page: the file name (the text of the link), the href and the rest of its attributes (e.g. the PEP 503
+    'data-requires-python' or 'data-yanked' ones). The hash stated in the href fragment, if any, is available through hashName and hashValue.
+    """
+
+    __slots__ = ("_fileName", "_href", "_attributes")
+
+    def __init__(self, fileName: str, href: str, attributes: Dict[str, str] = None):
+        self._fileName: str = fileName
+        self._href: str = href
+        self._attributes: Dict[str, str] = attributes if attributes is not None else dict()
+
+    @property
+    def fileName(self):
+        return self._fileName
+
+    @property
+    def href(self):
+        return self._href
+
+    @property
+    def attributes(self):
+        """All the attributes of the entry but the href, in the order they appeared."""
+
+        return self._attributes
+
+    @property
+    def dataAttributes(self) -> Dict[str, str]:
+        return {name: value for name, value in self._attributes.items() if name.startswith("data-")}
+
+    @property
+    def hashName(self) -> str:
+        fragment: str = urldefrag(self._href)[1]
+        return fragment.split("=", 1)[0] if "=" in fragment else None
+
+    @property
+    def hashValue(self) -> str:
+        fragment: str = urldefrag(self._href)[1]
+        return fragment.split("=", 1)[1] if "=" in fragment else None
+
+
+class LinkExtractor(HTMLParser):
+
+    """
+    A streaming parser that only keeps what a simple index page is made of: its <a> entries, as LinkRecords, and the text of its first <h1> (the title). The
+    rest of the page is skipped, and no tree is built, so pages with thousands of files are processed in a single fast pass.
+    """
+
+    _chunkSize: int = 64 * 1024
+
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=True)
+
+        self._title: str = None
+        self._links: List[LinkRecord] = list()
+
+        self._currentTag: str = None
+        self._currentAttributes: Dict[str, str] = None
+        self._currentText: List[str] = list()
+
+    @property
+    def title(self):
+        return self._title
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, str]]):
+        if tag == "a" or (tag == "h1" and self._title is None):
+            self._currentTag = tag
+            self._currentAttributes = {name: value if value is not None else "" for name, value in attrs}
+            self._currentText = list()
+
+    def handle_data(self, data: str):
+        if self._currentTag is not None:
+            self._currentText.append(data)
+
+    def handle_endtag(self, tag: str):
+        if tag != self._currentTag:
+            return
+
+        text: str = "".join(self._currentText).strip()
+        if tag == "h1":
+            self._title = text
+        elif "href" in self._currentAttributes:
+            href: str = self._currentAttributes.pop("href")
+            self._links.append(LinkRecord(text, href, self._currentAttributes))
+
+        self._currentTag = None
+
+    def iterLinks(self, htmlString: str) -> Iterator[LinkRecord]:
+        """Parses 'htmlString' in chunks, yielding its links as soon as they are found."""
+
+        for start in range(0, len(htmlString), self._chunkSize):
+            self.feed(htmlString[start : start + self._chunkSize])
+
+            yield from self._links
+            self._links = list()
+
+        self.close()
+        yield from self._links
+        self._links = list()
@@ -1,19 +1,352 @@
+import hashlib
+import json
 import os
+import random
+import re
+import threading
 import time
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urldefrag
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from tqdm import tqdm
 
+from pypickup.utils.httpCache import HTTPCache
+
+
+class RetryPolicy:
+
+    """
+    A class to decide whether a failed request should be retried, and how long to wait before doing so.
+
+    Connection errors, timeouts and the HTTP status codes in self._retryableStatusCodes (e.g. 429 or 503) are retried, any other error (e.g. a 404) fails at once.
+    The waiting time grows exponentially with the attempt number (backoffFactor * 2^attempt, up to maxBackoff), with full jitter so concurrent clients do not
+    retry in lockstep. A 'Retry-After' header sent by the server takes precedence over it.
+    """
+
+    _retryableStatusCodes = {408, 425, 429, 500, 502, 503, 504}
+
+    def __init__(self, retries: int = 10, backoffFactor: float = 0.5, maxBackoff: float = 30.0, jitter: bool = True):
+        if retries < 1:
+            raise ValueError("RetryPolicy::__init__ - The number of attempts must be greater than 0.")
+        if backoffFactor < 0 or maxBackoff < 0:
+            raise ValueError("RetryPolicy::__init__ - The backoff times cannot be negative.")
+
+        self._retries: int = retries
+        self._backoffFactor: float = backoffFactor
+        self._maxBackoff: float = maxBackoff
+        self._jitter: bool = jitter
+
+    @property
+    def retries(self):
+        return self._retries
+
+    @property
+    def backoffFactor(self):
+        return self._backoffFactor
+
+    @property
+    def maxBackoff(self):
+        return self._maxBackoff
+
+    @property
+    def jitter(self):
+        return self._jitter
+
+    def isRetryable(self, error: requests.exceptions.RequestException) -> bool:
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response is not None and error.response.status_code in self._retryableStatusCodes
+
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError))
+
+    def __getRetryAfter(self, response: requests.Response) -> float:
+        """Returns the seconds to wait stated by the 'Retry-After' header of 'response' (either in seconds or as an HTTP date), or None if there is no such header."""
+
+        if response is None or response.headers.get("Retry-After") is None:
+            return None
+
+        retryAfter: str = response.headers["Retry-After"].strip()
+        if retryAfter.isdigit():
+            return float(retryAfter)
+
+        try:
+            return max(0.0, (parsedate_to_datetime(retryAfter) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def getWaitTime(self, attempt: int, response: requests.Response = None) -> float:
+        """Returns the seconds to wait before retrying, 'attempt' being the number of the attempt that just failed (starting from 0)."""
+
+        retryAfter: float = self.__getRetryAfter(response)
+        if retryAfter is not None:
+            return retryAfter
+
+        backoff: float = min(self._maxBackoff, self._backoffFactor * pow(2, attempt))
+        if self._jitter:
+            return random.uniform(0, backoff)
+
+        return backoff
+
+
+class TokenBucket:
+
+    """
+    A thread-safe token bucket, used to limit a rate (e.g. bytes or requests per second) across all the threads sharing it. Tokens are refilled at 'rate'
+    per second, up to 'capacity'. Consuming more tokens than available puts the bucket in debt, and the caller waits until it would have been paid back.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("TokenBucket::__init__ - The rate must be greater than 0.")
+
+        self._rate: float = rate
+        self._capacity: float = capacity if capacity is not None else rate
+        self._tokens: float = self._capacity
+        self._lastRefill: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def consume(self, amount: float = 1):
+        with self._lock:
+            now: float = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._lastRefill) * self._rate)
+            self._lastRefill = now
+
+            self._tokens -= amount
+            waitTime: float = -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+        if waitTime > 0:
+            time.sleep(waitTime)
+
+
+class Upstream:
+
+    """
+    A class to keep track of the health of a remote simple index (e.g. PyPI, a devpi instance or another pypickup mirror served over HTTP): its latency
+    (exponentially smoothed) and its errors. After a failure, an upstream is considered unavailable for a while, which doubles with every consecutive failure.
+    """
+
+    _latencySmoothing: float = 0.3
+    _baseCooldown: float = 5.0
+    _maxCooldown: float = 300.0
+
+    def __init__(self, baseURL: str):
+        self._baseURL: str = baseURL if baseURL.endswith("/") else baseURL + "/"
+
+        self._latency: float = None
+        self._requests: int = 0
+        self._errors: int = 0
+        self._consecutiveErrors: int = 0
+        self._unavailableUntil: float = 0.0
+
+    @property
+    def baseURL(self):
+        return self._baseURL
+
+    @property
+    def latency(self):
+        return self._latency
+
+    @property
+    def errorRate(self) -> float:
+        return self._errors / self._requests if self._requests else 0.0
+
+    def getProjectURL(self, projectName: str) -> str:
+        return self._baseURL + projectName + "/"
+
+    def isAvailable(self) -> bool:
+        return time.monotonic() >= self._unavailableUntil
+
+    def getScore(self) -> float:
+        """The lower, the better. Upstreams not used yet score 0, so they are tried at least once."""
+
+        return self._latency if self._latency is not None else 0.0
+
+    def registerSuccess(self, latency: float):
+        self._requests += 1
+        self._consecutiveErrors = 0
+
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency = self._latencySmoothing * latency + (1 - self._latencySmoothing) * self._latency
+
+    def registerFailure(self):
+        self._requests += 1
+        self._errors += 1
+        self._consecutiveErrors += 1
+
+        self._unavailableUntil = time.monotonic() + min(self._maxCooldown, self._baseCooldown * pow(2, self._consecutiveErrors - 1))
+
+
 class NetworkManager:
 
     """
     A class used to download links in a proper way. Implements a retry system (e.g. in case the connection fails), and a progress bar (by means of the tqdm library) for the link to retrieve.
     """
 
-    def __init__(self):
-        pass
+    _downloadChunkSize: int = 1024 * 1024
+    _minChunkSize: int = 16 * 1024
+    _partSuffix: str = ".part"
+    _partValidatorsSuffix: str = ".validators"
+    _minSegmentSize: int = 1024 * 1024
+    _acceptProjectPage: str = "application/vnd.pypi.simple.v1+json, application/vnd.pypi.simple.v1+html;q=0.2, text/html;q=0.1"
+
+    _defaultUpstream: str = "https://pypi.org/simple/"
+    _failoverAttempts: int = 2
+
+    def __init__(self, poolSize: int = 10, retryPolicy: RetryPolicy = None, segments: int = 4, segmentThreshold: int = 100 * 1024 * 1024):
+        self._session: requests.Session = requests.Session()
+        self._poolSize: int = None
+        self._retryPolicy: RetryPolicy = retryPolicy if retryPolicy is not None else RetryPolicy()
+
+        self._segments: int = None
+        self._segmentThreshold: int = None
+        self.setSegmentation(segments, segmentThreshold)
+
+        self._bytesLimiter: TokenBucket = None
+        self._requestsLimiter: TokenBucket = None
+
+        self._upstreams: List[Upstream] = [Upstream(self._defaultUpstream)]
+        self._upstreamsLock = threading.Lock()
+
+        self._pageTTL: float = 0
+        self._pageMemo: Dict[Tuple[str, str], Tuple[bool, bool, str, bytes, str, str]] = dict()
+        self._pageMemoLock = threading.Lock()
+
+        self.poolSize = poolSize
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def retryPolicy(self):
+        return self._retryPolicy
+
+    @retryPolicy.setter
+    def retryPolicy(self, new_retryPolicy: RetryPolicy):
+        self._retryPolicy = new_retryPolicy
+
+    @property
+    def segments(self):
+        return self._segments
+
+    @property
+    def segmentThreshold(self):
+        return self._segmentThreshold
+
+    def setSegmentation(self, segments: int, segmentThreshold: int):
+        """Files of at least 'segmentThreshold' bytes are downloaded in 'segments' concurrent byte ranges, if the server supports them. 1 segment disables it."""
+
+        if segments < 1:
+            raise ValueError("NetworkManager::setSegmentation - The number of segments must be greater than 0.")
+        if segmentThreshold < 0:
+            raise ValueError("NetworkManager::setSegmentation - The segment threshold cannot be negative.")
+
+        self._segments = segments
+        self._segmentThreshold = segmentThreshold
+
+    @property
+    def pageTTL(self):
+        return self._pageTTL
+
+    @pageTTL.setter
+    def pageTTL(self, new_pageTTL: float):
+        """Seconds during which a project page cached on disk (see HTTPCache) is reused without asking the upstream at all. 0 means always revalidating it."""
+
+        if new_pageTTL < 0:
+            raise ValueError("NetworkManager::pageTTL - The time to live of the cached pages cannot be negative.")
+        self._pageTTL = new_pageTTL
+
+    def clearPageMemo(self, projectName: str = None):
+        """Forgets the project pages retrieved so far (only the ones of 'projectName', if given), so they are requested again."""
+
+        with self._pageMemoLock:
+            if projectName is None:
+                self._pageMemo.clear()
+            else:
+                for memoKey in [memoKey for memoKey in self._pageMemo if memoKey[0] == projectName]:
+                    del self._pageMemo[memoKey]
+
+    @property
+    def bytesPerSecond(self):
+        return self._bytesLimiter.rate if self._bytesLimiter is not None else None
+
+    @property
+    def requestsPerSecond(self):
+        return self._requestsLimiter.rate if self._requestsLimiter is not None else None
+
+    def setRateLimits(self, bytesPerSecond: float = None, requestsPerSecond: float = None):
+        """Limits the download bandwidth and the request rate of all the requests made through this manager, whatever the thread they are made from. None (or 0) means no limit."""
+
+        self._bytesLimiter = TokenBucket(bytesPerSecond) if bytesPerSecond else None
+        self._requestsLimiter = TokenBucket(requestsPerSecond, capacity=1) if requestsPerSecond else None
+
+    def __waitForRequest(self):
+        if self._requestsLimiter is not None:
+            self._requestsLimiter.consume(1)
+
+    def __waitForBytes(self, numberOfBytes: int):
+        if self._bytesLimiter is not None:
+            self._bytesLimiter.consume(numberOfBytes)
+
+    def __getChunkSize(self) -> int:
+        """Chunks are kept small enough under a bandwidth limit, so the throughput is smooth instead of bursty."""
+
+        if self._bytesLimiter is None:
+            return self._downloadChunkSize
+
+        return int(max(self._minChunkSize, min(self._downloadChunkSize, self._bytesLimiter.rate / 10)))
+
+    @property
+    def upstreams(self):
+        return self._upstreams
+
+    @upstreams.setter
+    def upstreams(self, new_upstreams: List[str]):
+        """Sets the ordered list of remote simple indices (base URLs). The statistics of the ones that were already known are kept."""
+
+        if len(new_upstreams) == 0:
+            raise ValueError("NetworkManager::upstreams - At least one upstream is needed.")
+
+        with self._upstreamsLock:
+            knownUpstreams: Dict[str, Upstream] = {upstream.baseURL: upstream for upstream in self._upstreams}
+
+            self._upstreams = list()
+            for baseURL in new_upstreams:
+                upstream = Upstream(baseURL)
+                self._upstreams.append(knownUpstreams.get(upstream.baseURL, upstream))
+
+        if [upstream.baseURL for upstream in self._upstreams] != list(knownUpstreams.keys()):
+            self.clearPageMemo()
+
+    @property
+    def poolSize(self):
+        return self._poolSize
+
+    @poolSize.setter
+    def poolSize(self, new_poolSize: int):
+        """Sets the maximum number of keep-alive connections kept per host. The already opened connections are dropped if the size changes."""
+
+        if new_poolSize < 1:
+            raise ValueError("NetworkManager::poolSize - The connection pool size must be greater than 0.")
+
+        if new_poolSize == self._poolSize:
+            return
+        self._poolSize = new_poolSize
+
+        adapter = HTTPAdapter(pool_connections=new_poolSize, pool_maxsize=new_poolSize)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
 
     def __printResponseProgressBar(self, linkURL: str, response: requests.Response, chunkSize: int = 4):
         """The chunkSize defines the speed at which the response content is consumed, so it actually works as a bottleneck. The smaller, the slower."""
@@ -22,50 +355,446 @@ class NetworkManager:
             for chunk in response.iter_content(chunk_size=chunkSize):
                 fout.write(chunk)
 
-    def getLink(self, linkURL: str, printVerbose: bool = False, showRetries: bool = False, retries: int = 10, timeBetweenRetries: float = 0.5) -> Tuple[bool, str, bytes]:
-        response: requests.Response = requests.Response()
+    def __getErrorStatus(self, error: requests.exceptions.RequestException) -> str:
+        if isinstance(error, requests.exceptions.HTTPError):
+            return "HTTP Error: " + str(error)
+        elif isinstance(error, requests.exceptions.ConnectionError):
+            return "Error Connecting: " + str(error)
+        elif isinstance(error, requests.exceptions.Timeout):
+            return "Timeout Error: " + str(error)
+        else:
+            return "OOps: Something Else: " + str(error)
+
+    def __getAttempts(self, retries: int) -> int:
+        return retries if retries is not None else self._retryPolicy.retries
+
+    def __waitBeforeRetrying(self, linkURL: str, attempt: int, error: requests.exceptions.RequestException, showRetries: bool):
+        waitTime: float = self._retryPolicy.getWaitTime(attempt, error.response)
+
+        if showRetries:
+            print("Trying again in " + "{:.1f}".format(waitTime) + "s...\t(" + linkURL + ")\t[" + self.__getErrorStatus(error) + "]")
+        time.sleep(waitTime)
 
-        retriesCounter: int = retries
-        again: bool = True
-        while again:
-            retriesCounter -= 1
-            if retriesCounter == 0:
-                break
+    def __getResponse(self, linkURL: str, headers: Dict[str, str] = None, printVerbose: bool = False, showRetries: bool = False, retries: int = None) -> Tuple[bool, str, requests.Response]:
+        """Gets 'linkURL' following the retry policy. 'retries' overrides the number of attempts of the policy."""
 
+        response: requests.Response = requests.Response()
+
+        attempts: int = self.__getAttempts(retries)
+        for attempt in range(attempts):
             try:
-                response = requests.get(linkURL, timeout=5, stream=printVerbose)
+                self.__waitForRequest()
+
+                response = self._session.get(linkURL, headers=headers, timeout=5, stream=printVerbose)
                 responseContent: str = response.content     # DO NOT DELETE! This is necessary to fetch the response before printing the response in the progress bar and not be consumed.
+                self.__waitForBytes(len(responseContent))
 
                 if printVerbose:
                     self.__printResponseProgressBar(linkURL, response)
 
                 response.raise_for_status()
 
-                again = False
-            except:
-                again = True
+                return True, str(response.status_code) + " " + str(response.reason), response
+            except requests.exceptions.RequestException as error:
+                if not self._retryPolicy.isRetryable(error) or attempt == attempts - 1:
+                    return False, self.__getErrorStatus(error), response
+
+                self.__waitBeforeRetrying(linkURL, attempt, error, showRetries)
+
+    def getLink(self, linkURL: str, printVerbose: bool = False, showRetries: bool = False, retries: int = None) -> Tuple[bool, str, bytes]:
+        ok, status, response = self.__getResponse(linkURL, printVerbose=printVerbose, showRetries=showRetries, retries=retries)
+
+        return ok, status, response.content
 
-                if showRetries:
-                    print("Trying again...\t(" + linkURL + ")")
-                time.sleep(timeBetweenRetries)
+    def __getProjectPage(self, linkURL: str, httpCache: HTTPCache = None, printVerbose: bool = False, showRetries: bool = False, retries: int = None) -> Tuple[bool, bool, str, bytes, str, requests.Response]:
+        headers: Dict[str, str] = {"Accept": self._acceptProjectPage}
+        if httpCache is not None:
+            headers.update(httpCache.getConditionalHeaders(linkURL))
 
-        if response.status_code != 200:
-            if retries > 1 and showRetries:
-                print("Last try on...\t(" + linkURL + ")")
+        ok, status, response = self.__getResponse(linkURL, headers=headers, printVerbose=printVerbose, showRetries=showRetries, retries=retries)
+        if not ok:
+            return False, True, status, response.content, None, response
+
+        if response.status_code == 304:
+            httpCache.touch(linkURL)
+            return True, False, status, httpCache.getContent(linkURL), httpCache.getContentType(linkURL), response
+
+        contentType: str = response.headers.get("Content-Type")
+        if httpCache is not None:
+            httpCache.store(linkURL, response.headers.get("ETag"), response.headers.get("Last-Modified"), contentType, response.content)
+
+        return True, True, status, response.content, contentType, response
+
+    def getProjectPage(self, linkURL: str, httpCache: HTTPCache = None, printVerbose: bool = False, showRetries: bool = False, retries: int = None) -> Tuple[bool, bool, str, bytes, str]:
+        """Gets a simple index project page, preferring the PEP 691 JSON format over the PEP 503 HTML one if the server offers it. If 'httpCache' is given, the validators (ETag/Last-Modified) stored in it for 'linkURL' are sent, and the cached content is returned if the page has not been modified since.
+
+        Returns whether the request succeeded, whether the page was modified, the status, the content and its content type."""
+
+        ok, modified, status, content, contentType, _ = self.__getProjectPage(linkURL, httpCache, printVerbose=printVerbose, showRetries=showRetries, retries=retries)
+
+        return ok, modified, status, content, contentType
+
+    def getSortedUpstreams(self) -> List[Upstream]:
+        """Returns the upstreams from the healthiest to the least one: first the available ones, by latency (keeping the configured order on ties), then the ones recently failing."""
+
+        with self._upstreamsLock:
+            availableUpstreams: List[Upstream] = [upstream for upstream in self._upstreams if upstream.isAvailable()]
+            unavailableUpstreams: List[Upstream] = [upstream for upstream in self._upstreams if not upstream.isAvailable()]
+
+        return sorted(availableUpstreams, key=lambda upstream: upstream.getScore()) + unavailableUpstreams
+
+    def __getFreshCachedProjectPage(self, projectName: str, httpCache: HTTPCache, sortedUpstreams: List[Upstream]) -> Tuple[bool, bool, str, bytes, str, str]:
+        """Returns the 'projectName' page cached on disk from any of the upstreams, as long as it is younger than self.pageTTL. None otherwise."""
+
+        if httpCache is None or self._pageTTL <= 0:
+            return None
+
+        for upstream in sortedUpstreams:
+            pageURL: str = upstream.getProjectURL(projectName)
+            if httpCache.isFresh(pageURL, self._pageTTL):
+                return True, False, "200 OK (cached)", httpCache.getContent(pageURL), httpCache.getContentType(pageURL), pageURL
+
+        return None
+
+    def getUpstreamProjectPage(self, projectName: str, httpCache: HTTPCache = None, printVerbose: bool = False, showRetries: bool = False) -> Tuple[bool, bool, str, bytes, str, str]:
+        """Same as getProjectPage, but for the project 'projectName' in the healthiest upstream. If it fails, the next ones are tried in turn (failover), each one but the last with a reduced number of attempts.
+
+        Pages are memoized for the lifetime of this manager, so a project is requested at most once per run. With a self.pageTTL, pages cached on disk are also reused across runs while they are fresh.
+        Returns the same as getProjectPage, plus the URL of the page actually retrieved."""
+
+        memoKey: Tuple[str, str] = (projectName, httpCache.cacheDir if httpCache is not None else None)
+        with self._pageMemoLock:
+            if memoKey in self._pageMemo:
+                return self._pageMemo[memoKey]
+
+        result: Tuple[bool, bool, str, bytes, str, str] = self.__getUpstreamProjectPage(projectName, httpCache, printVerbose, showRetries)
+        if result[0]:
+            with self._pageMemoLock:
+                self._pageMemo[memoKey] = result
+
+        return result
+
+    def __getUpstreamProjectPage(self, projectName: str, httpCache: HTTPCache = None, printVerbose: bool = False, showRetries: bool = False) -> Tuple[bool, bool, str, bytes, str, str]:
+        sortedUpstreams: List[Upstream] = self.getSortedUpstreams()
+
+        cachedProjectPage: Tuple[bool, bool, str, bytes, str, str] = self.__getFreshCachedProjectPage(projectName, httpCache, sortedUpstreams)
+        if cachedProjectPage is not None:
+            return cachedProjectPage
+
+        status: str = ""
+        for index, upstream in enumerate(sortedUpstreams):
+            isLastUpstream: bool = index == len(sortedUpstreams) - 1
+
+            pageURL: str = upstream.getProjectURL(projectName)
+            ok, modified, status, content, contentType, response = self.__getProjectPage(pageURL, httpCache, printVerbose=printVerbose, showRetries=showRetries, retries=None if isLastUpstream else min(self._failoverAttempts, self._retryPolicy.retries))
+
+            with self._upstreamsLock:
+                if ok:
+                    upstream.registerSuccess(response.elapsed.total_seconds())
+                    return True, modified, status, content, contentType, pageURL
+                elif response.status_code not in (404, 410):     # The project is not there, but the upstream is fine
+                    upstream.registerFailure()
+
+            if not isLastUpstream and showRetries:
+                print("Upstream " + upstream.baseURL + " failed (" + status + "). Trying with " + sortedUpstreams[index + 1].baseURL + "...")
+
+        return False, True, status, b"", None, None
+
+    def __streamResponseToFile(self, linkURL: str, response: requests.Response, file, hashers: list, printVerbose: bool = False, alreadyDownloaded: int = 0, onProgress: Callable[[str, int], None] = None):
+        """Writes the 'response' body into 'file' in chunks of self._downloadChunkSize bytes, so the memory usage does not depend on the size of the file. The 'hashers' are updated with every chunk on the way.
+
+        If given, 'onProgress' is called with the file name and the number of bytes in it after every chunk, once it has been flushed (i.e. it can be read by others)."""
+
+        written: int = alreadyDownloaded
+
+        if printVerbose:
+            with tqdm(unit="B", unit_scale=True, miniters=1, position=1, leave=False, desc=linkURL.split("/")[-1].split("#")[0], initial=alreadyDownloaded, total=alreadyDownloaded + int(response.headers.get("content-length", 0)), ncols=100) as progressBar:
+                for chunk in response.iter_content(chunk_size=self.__getChunkSize()):
+                    self.__waitForBytes(len(chunk))
+                    file.write(chunk)
+                    for hasher in hashers:
+                        hasher.update(chunk)
+                    progressBar.update(len(chunk))
+
+                    if onProgress is not None:
+                        written += len(chunk)
+                        file.flush()
+                        onProgress(file.name, written)
+        else:
+            for chunk in response.iter_content(chunk_size=self.__getChunkSize()):
+                self.__waitForBytes(len(chunk))
+                file.write(chunk)
+                for hasher in hashers:
+                    hasher.update(chunk)
+
+                if onProgress is not None:
+                    written += len(chunk)
+                    file.flush()
+                    onProgress(file.name, written)
+
+    def __getExpectedHash(self, linkURL: str) -> Tuple[str, str]:
+        """Returns the hash name and value stated in the 'linkURL' fragment (e.g. '#sha256=...'), or (None, None) if there is no usable one."""
+
+        fragment: str = urldefrag(linkURL)[1]
+        if "=" not in fragment:
+            return None, None
+
+        hashName, hashValue = fragment.split("=", 1)
+        if hashName not in hashlib.algorithms_guaranteed:
+            return None, None
+
+        return hashName, hashValue.lower()
+
+    def __getHashers(self, hashName: str) -> list:
+        """Returns a sha256 hasher, plus one for 'hashName' if it is a different algorithm."""
+
+        hashers: list = [hashlib.sha256()]
+        if hashName is not None and hashName != "sha256":
+            hashers.append(hashlib.new(hashName))
+
+        return hashers
+
+    def __hashFile(self, filePath: str, hashers: list):
+        with open(filePath, "rb") as file:
+            for chunk in iter(lambda: file.read(self._downloadChunkSize), b""):
+                for hasher in hashers:
+                    hasher.update(chunk)
+
+    def __getPartValidators(self, partFilePath: str, linkURL: str) -> Dict[str, str]:
+        """Returns the validators of the response a '.part' file was started from, or an empty dict if it cannot be safely resumed."""
+
+        try:
+            with open(partFilePath + self._partValidatorsSuffix, "r") as validatorsFile:
+                validators: Dict[str, str] = json.load(validatorsFile)
+        except (OSError, ValueError):
+            return dict()
+
+        if validators.get("url") != urldefrag(linkURL)[0]:
+            return dict()
+
+        return validators
+
+    def __setPartValidators(self, partFilePath: str, linkURL: str, response: requests.Response):
+        """Stores the validators of 'response' next to the '.part' file, as long as the server accepts byte ranges and provides a strong validator to send in 'If-Range'."""
+
+        etag: str = response.headers.get("ETag")
+        if etag is not None and etag.startswith("W/"):
+            etag = None
+        lastModified: str = response.headers.get("Last-Modified")
+
+        if response.headers.get("Accept-Ranges", "none").lower() != "bytes" or (etag is None and lastModified is None):
+            self.__removePartFiles(partFilePath)
+            return
+
+        with open(partFilePath + self._partValidatorsSuffix, "w") as validatorsFile:
+            json.dump({"url": urldefrag(linkURL)[0], "etag": etag, "lastModified": lastModified}, validatorsFile)
+
+    def __removePartFiles(self, partFilePath: str):
+        if os.path.exists(partFilePath + self._partValidatorsSuffix):
+            os.remove(partFilePath + self._partValidatorsSuffix)
+
+    def __getRangeHeaders(self, partFilePath: str, linkURL: str) -> Dict[str, str]:
+        """Returns the headers needed to resume the download of 'linkURL' from the end of its '.part' file. Empty if it has to be downloaded from the start."""
+
+        if not os.path.exists(partFilePath):
+            return dict()
+
+        validators: Dict[str, str] = self.__getPartValidators(partFilePath, linkURL)
+        partSize: int = os.path.getsize(partFilePath)
+        if not validators or partSize == 0:
+            return dict()
+
+        return {"Range": "bytes=" + str(partSize) + "-", "If-Range": validators["etag"] if validators.get("etag") else validators["lastModified"]}
+
+    def __isResumedResponse(self, response: requests.Response, partFilePath: str) -> bool:
+        if response.status_code != 206:
+            return False
+
+        contentRange = re.match(r"^bytes (\d+)-", response.headers.get("Content-Range", ""))
+        return contentRange is not None and int(contentRange.group(1)) == os.path.getsize(partFilePath)
+
+    def __getDownloadResponse(self, linkURL: str, partFilePath: str) -> Tuple[Dict[str, str], requests.Response]:
+        """Requests 'linkURL', resuming it from the end of its '.part' file if possible. If the server cannot resume it from there (416, or a 206 starting at another offset), the '.part' file is dropped and the whole file is requested instead.
+        Returns the 'Range' headers sent and the response."""
+
+        rangeHeaders: Dict[str, str] = self.__getRangeHeaders(partFilePath, linkURL)
+
+        self.__waitForRequest()
+        response: requests.Response = self._session.get(linkURL, headers=rangeHeaders, timeout=5, stream=True)
+        if rangeHeaders and (response.status_code == 416 or (response.status_code == 206 and not self.__isResumedResponse(response, partFilePath))):
+            response.close()
+            self.__removePartFiles(partFilePath)
+            os.remove(partFilePath)
+
+            self.__waitForRequest()
+            return dict(), self._session.get(linkURL, timeout=5, stream=True)
+
+        return rangeHeaders, response
+
+    def __getSegmentsValidator(self, response: requests.Response) -> str:
+        """Returns the strong validator to send in 'If-Range' along with the segments of the file in 'response', or None if it is not going to be downloaded in segments (it is too small, or the server does not support byte ranges)."""
+
+        if self._segments < 2 or response.status_code != 200 or response.headers.get("Accept-Ranges", "none").lower() != "bytes":
+            return None
+        if response.headers.get("Content-Encoding", "identity").lower() != "identity":     # Byte ranges would refer to the encoded content
+            return None
+
+        size: str = response.headers.get("Content-Length", "")
+        if not size.isdigit() or int(size) < max(self._segmentThreshold, 2 * self._minSegmentSize):
+            return None
+
+        etag: str = response.headers.get("ETag")
+        if etag is not None and not etag.startswith("W/"):
+            return etag
+
+        return response.headers.get("Last-Modified")
+
+    def __getSegments(self, size: int) -> List[Tuple[int, int]]:
+        """Splits 'size' bytes into self._segments ranges (first and last byte, both included), none of them smaller than self._minSegmentSize."""
+
+        numberOfSegments: int = max(1, min(self._segments, size // self._minSegmentSize))
+        segmentSize: int = -(-size // numberOfSegments)
+
+        return [(start, min(start + segmentSize, size) - 1) for start in range(0, size, segmentSize)]
+
+    def __downloadSegment(self, linkURL: str, partFilePath: str, start: int, end: int, ifRange: str, progressBar: tqdm, aborted: threading.Event, showRetries: bool = False, retries: int = None) -> Tuple[bool, str]:
+        """Writes the bytes from 'start' to 'end' of 'linkURL' at their offset of the '.part' file. Only this segment is retried on errors, from the last byte received."""
+
+        position: int = start
+
+        status: str = ""
+        attempts: int = self.__getAttempts(retries)
+        for attempt in range(attempts):
+            if aborted.is_set():
+                return False, "Aborted"
 
             try:
-                response = requests.get(linkURL, timeout=5, stream=printVerbose)
-                if printVerbose:
-                    self.__printResponseProgressBar(linkURL, response)
+                self.__waitForRequest()
+                with self._session.get(linkURL, headers={"Range": "bytes=" + str(position) + "-" + str(end), "If-Range": ifRange}, timeout=5, stream=True) as response:
+                    response.raise_for_status()
 
-                response.raise_for_status()
-            except requests.exceptions.HTTPError as errh:
-                return False, "HTTP Error: " + str(errh), response.content
-            except requests.exceptions.ConnectionError as errc:
-                return False, "Error Connecting: " + str(errc), response.content
-            except requests.exceptions.Timeout as errt:
-                return False, "Timeout Error: " + str(errt), response.content
-            except requests.exceptions.RequestException as err:
-                return False, "OOps: Something Else: " + str(err), response.content
-
-        return True, "200 OK", response.content
\ No newline at end of file
+                    contentRange = re.match(r"^bytes (\d+)-", response.headers.get("Content-Range", ""))
+                    if response.status_code != 206 or contentRange is None or int(contentRange.group(1)) != position:
+                        return False, "The remote file changed during the download (" + urldefrag(linkURL)[0] + ")."
+
+                    with open(partFilePath, "r+b") as partFile:
+                        partFile.seek(position)
+                        for chunk in response.iter_content(chunk_size=self.__getChunkSize()):
+                            if aborted.is_set():
+                                return False, "Aborted"
+
+                            chunk = chunk[: end + 1 - position]
+                            self.__waitForBytes(len(chunk))
+                            partFile.write(chunk)
+                            position += len(chunk)
+
+                            if progressBar is not None:
+                                with progressBar.get_lock():
+                                    progressBar.update(len(chunk))
+
+                if position > end:
+                    return True, "206 Partial Content"
+                raise requests.exceptions.ChunkedEncodingError("Connection closed before the end of the segment (" + str(position) + "/" + str(end + 1) + " bytes).")
+            except requests.exceptions.RequestException as error:
+                status = self.__getErrorStatus(error)
+                if not self._retryPolicy.isRetryable(error) or attempt == attempts - 1:
+                    break
+
+                self.__waitBeforeRetrying(linkURL, attempt, error, showRetries)
+
+        return False, status
+
+    def __downloadSegments(self, linkURL: str, partFilePath: str, size: int, ifRange: str, printVerbose: bool = False, showRetries: bool = False, retries: int = None) -> Tuple[bool, str]:
+        """Downloads the 'size' bytes of 'linkURL' into the '.part' file by means of concurrent 'Range' requests. As soon as a segment fails for good, the rest are aborted."""
+
+        with open(partFilePath, "wb") as partFile:
+            partFile.truncate(size)
+
+        aborted = threading.Event()
+        status: str = "200 OK"
+
+        progressBar: tqdm = tqdm(unit="B", unit_scale=True, miniters=1, position=1, leave=False, desc=linkURL.split("/")[-1].split("#")[0], total=size, ncols=100) if printVerbose else None
+        try:
+            segments: List[Tuple[int, int]] = self.__getSegments(size)
+            with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                futures = [executor.submit(self.__downloadSegment, linkURL, partFilePath, start, end, ifRange, progressBar, aborted, showRetries, retries) for start, end in segments]
+
+                for future in as_completed(futures):
+                    ok, segmentStatus = future.result()
+                    if not ok and not aborted.is_set():
+                        aborted.set()
+                        status = segmentStatus
+        finally:
+            if progressBar is not None:
+                progressBar.close()
+
+        return not aborted.is_set(), status
+
+    def downloadLink(self, linkURL: str, filePath: str, printVerbose: bool = False, showRetries: bool = False, retries: int = None, onProgress: Callable[[str, int], None] = None) -> Tuple[bool, str, str]:
+        """Streams the 'linkURL' content straight to disk. It is written into a 'filePath.part' file, which is renamed to 'filePath' only once the whole content has been received.
+
+        Files of at least self.segmentThreshold bytes are downloaded in self.segments concurrent 'Range' requests instead, each one retried on its own. Such '.part' files are not resumable across calls.
+        If the download is interrupted, the '.part' file is kept, and both the retries and later calls resume it by means of 'Range' requests, as long as the server supports them and the file has not changed in the remote since ('If-Range'). Otherwise (e.g. the server answers from another offset), the download starts over.
+
+        The content is hashed while it is being written. If 'linkURL' states a hash in its fragment (e.g. '#sha256=...'), a file not matching it is discarded and downloaded again.
+        If 'onProgress' is given, it is called with the '.part' file name and its size after every chunk written (see __streamResponseToFile), and the file is never downloaded in segments, so the '.part' file can be read while it grows.
+        Returns whether the download succeeded, the status, and the sha256 of the file."""
+
+        partFilePath: str = filePath + self._partSuffix
+        hashName, expectedHash = self.__getExpectedHash(linkURL)
+
+        status: str = ""
+        attempts: int = self.__getAttempts(retries)
+        for attempt in range(attempts):
+            try:
+                rangeHeaders, response = self.__getDownloadResponse(linkURL, partFilePath)
+                with response:
+                    response.raise_for_status()
+
+                    hashers: list = self.__getHashers(hashName)
+                    segmentsValidator: str = None if rangeHeaders or onProgress is not None else self.__getSegmentsValidator(response)
+                    if rangeHeaders and response.status_code == 206:
+                        self.__hashFile(partFilePath, hashers)
+
+                        alreadyDownloaded: int = os.path.getsize(partFilePath)
+                        with open(partFilePath, "ab") as partFile:
+                            self.__streamResponseToFile(linkURL, response, partFile, hashers, printVerbose, alreadyDownloaded, onProgress)
+                    elif segmentsValidator is None:
+                        self.__setPartValidators(partFilePath, linkURL, response)
+                        with open(partFilePath, "wb") as partFile:
+                            self.__streamResponseToFile(linkURL, response, partFile, hashers, printVerbose, onProgress=onProgress)
+
+                if segmentsValidator is not None:
+                    self.__removePartFiles(partFilePath)     # A '.part' file with holes in it cannot be resumed
+                    ok, status = self.__downloadSegments(linkURL, partFilePath, int(response.headers["Content-Length"]), segmentsValidator, printVerbose, showRetries, retries)
+                    if not ok:
+                        break
+
+                    self.__hashFile(partFilePath, hashers)
+
+                self.__removePartFiles(partFilePath)
+
+                if expectedHash is not None and hashers[-1].hexdigest() != expectedHash:
+                    os.remove(partFilePath)
+
+                    status = "Hash mismatch: expected " + hashName + "=" + expectedHash + " but got " + hashers[-1].hexdigest() + " (" + urldefrag(linkURL)[0] + ")."
+                    if attempt < attempts - 1:
+                        if showRetries:
+                            print(status + " Trying again...")
+                        continue
+                    break
+
+                os.replace(partFilePath, filePath)
+
+                return True, "200 OK", hashers[0].hexdigest()
+            except requests.exceptions.RequestException as error:
+                status = self.__getErrorStatus(error)
+                if not self._retryPolicy.isRetryable(error) or attempt == attempts - 1:
+                    break
+
+                self.__waitBeforeRetrying(linkURL, attempt, error, showRetries)
+
+        if os.path.exists(partFilePath) and not self.__getPartValidators(partFilePath, linkURL):
+            os.remove(partFilePath)
+
+        return False, status, None
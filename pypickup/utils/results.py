@@ -0,0 +1,165 @@
+import time
+from typing import Dict, List
+
+
+class PackageResult:
+
+    """
+    The result of an operation (e.g. 'add') on a single package of a local repository: its status, the files downloaded (along with their size), skipped
+    (because they were in the local repository already), failed (along with the reason) and removed, and the time it took.
+
+    The status is one of: "added", "updated", "up to date", "planned" (dry runs), "not found", "error" (see 'message'), "removed", "not tracked",
+    "rebuilt" or "unchanged". 'elapsed' is the time from the start of the operation until the package was done with (e.g. its last file downloaded).
+    """
+
+    _failedStatuses: List[str] = ["not found", "error", "not tracked"]
+
+    def __init__(self, packageName: str):
+        self._packageName: str = packageName
+        self._status: str = None
+        self._message: str = None
+
+        self._downloaded: Dict[str, int] = dict()
+        self._skipped: List[str] = list()
+        self._failed: Dict[str, str] = dict()
+        self._removed: List[str] = list()
+
+        self._startedAt: float = time.monotonic()
+        self._finishedAt: float = None
+
+    @property
+    def packageName(self):
+        return self._packageName
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def message(self):
+        return self._message
+
+    @property
+    def downloaded(self) -> List[str]:
+        return list(self._downloaded.keys())
+
+    @property
+    def downloadedBytes(self) -> int:
+        return sum(self._downloaded.values())
+
+    @property
+    def skipped(self):
+        return self._skipped
+
+    @property
+    def failed(self):
+        """The files that could not be downloaded, along with the reason."""
+
+        return self._failed
+
+    @property
+    def removed(self):
+        return self._removed
+
+    @property
+    def elapsed(self) -> float:
+        return (self._finishedAt if self._finishedAt is not None else time.monotonic()) - self._startedAt
+
+    @property
+    def ok(self) -> bool:
+        return self._status not in self._failedStatuses and len(self._failed) == 0
+
+    @status.setter
+    def status(self, new_status: str):
+        self._status = new_status
+        self.__finish()
+
+    @message.setter
+    def message(self, new_message: str):
+        self._message = new_message
+
+    def __finish(self):
+        self._finishedAt = time.monotonic()
+
+    def addDownloaded(self, fileName: str, size: int):
+        self._downloaded[fileName] = size if size is not None else 0
+        self.__finish()
+
+    def addSkipped(self, fileNames: List[str]):
+        self._skipped.extend(fileNames)
+
+    def addFailed(self, fileName: str, reason: str):
+        self._failed[fileName] = reason
+        self.__finish()
+
+    def addRemoved(self, fileNames: List[str]):
+        self._removed.extend(fileNames)
+        self.__finish()
+
+    def __repr__(self) -> str:
+        return "PackageResult(" + self._packageName + ", " + str(self._status) + ", " + str(len(self._downloaded)) + " downloaded, " + str(len(self._failed)) + " failed)"
+
+
+class MirrorResult:
+
+    """
+    The result of an operation of the Mirror API over several packages: the PackageResult of each one (also by name, e.g. result["numpy"]), their totals,
+    the time the whole operation took, and what it printed.
+    """
+
+    def __init__(self, packages: List[PackageResult], elapsed: float, output: str = ""):
+        self._packages: List[PackageResult] = packages
+        self._elapsed: float = elapsed
+        self._output: str = output
+
+    @property
+    def packages(self):
+        return self._packages
+
+    @property
+    def elapsed(self):
+        return self._elapsed
+
+    @property
+    def output(self):
+        return self._output
+
+    @property
+    def downloaded(self) -> List[str]:
+        return [fileName for package in self._packages for fileName in package.downloaded]
+
+    @property
+    def downloadedBytes(self) -> int:
+        return sum(package.downloadedBytes for package in self._packages)
+
+    @property
+    def skipped(self) -> List[str]:
+        return [fileName for package in self._packages for fileName in package.skipped]
+
+    @property
+    def failed(self) -> Dict[str, str]:
+        return {fileName: reason for package in self._packages for fileName, reason in package.failed.items()}
+
+    @property
+    def removed(self) -> List[str]:
+        return [fileName for package in self._packages for fileName in package.removed]
+
+    @property
+    def ok(self) -> bool:
+        return all(package.ok for package in self._packages)
+
+    def __getitem__(self, packageName: str) -> PackageResult:
+        for package in self._packages:
+            if package.packageName == packageName:
+                return package
+
+        raise KeyError(packageName)
+
+    def __iter__(self):
+        return iter(self._packages)
+
+    def __len__(self) -> int:
+        return len(self._packages)
+
+    def __repr__(self) -> str:
+        return "MirrorResult(" + str(len(self._packages)) + " packages, " + str(len(self.downloaded)) + " downloaded, " + str(len(self.failed)) + " failed, " + str(round(self._elapsed, 2)) + "s)"
@@ -0,0 +1,23 @@
+import threading
+from typing import Callable
+
+
+class SharedOnFirstUse:
+
+    """
+    A class attribute holding an object shared by the class, its subclasses and all their instances, which is only created (calling 'factory') the first
+    time it is accessed. Used for the managers importing heavy modules (e.g. requests) or reading settings, so only the commands using them pay for it.
+    """
+
+    def __init__(self, factory: Callable):
+        self._factory: Callable = factory
+        self._instance = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def __get__(self, instance, owner=None):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+
+        return self._instance
@@ -0,0 +1,104 @@
+import operator
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+import wheel_filename
+
+from pypickup.utils.invalidInputError import InvalidInputError
+
+
+class WheelFilter:
+
+    """
+    A compiled wheel filter: the filters of the settings are parsed once (literals stripped of their modifiers, Python version thresholds turned into
+    tuples) into a flat list of matchers per field, so screening a wheel name only takes parsing it and a few comparisons.
+
+    The result of each field is the 'or'/'and' of its filters (as set in *_ORorAndAttributes), and the fields with filters are combined in turn with the
+    *_ORorAnd operator. Fields without filters are not used. Wheels are included if the result is true when filtering "in", and excluded if it is true
+    when filtering "out". A filter matches a field with several tags (e.g. 'platform_tags') if it matches any of them.
+    """
+
+    _aprox_char: str = "~"
+    _comparisonOperators: Dict[str, Callable] = {"<=": operator.le, ">=": operator.ge, "<": operator.lt, ">": operator.gt}
+    _concatOperators: Dict[str, Callable] = {"or": any, "and": all}
+
+    def __init__(self, filters: Dict[str, List[str]], fieldConcatOperators: Dict[str, str], concatOperator: str, inOrOut: str):
+        if inOrOut not in ["in", "out"]:
+            raise InvalidInputError("WheelFilter::__init__ - Incorrect value '" + str(inOrOut) + "' for filtering wheels in or out. Set 'in' or 'out'.")
+
+        self._filterIn: bool = inOrOut == "in"
+        self._concatFields: Callable = self.__getConcatOperator(concatOperator)
+
+        self._fields: List[Tuple[str, Callable, List[Callable]]] = list()
+        for fieldName, fieldFilters in filters.items():
+            if len(fieldFilters) > 0:
+                self._fields.append((fieldName, self.__getConcatOperator(fieldConcatOperators.get(fieldName)), [self.__compileFilter(filter, fieldName) for filter in fieldFilters]))
+
+    @classmethod
+    def fromConfig(cls, wheelsConfig) -> "WheelFilter":
+        filterNames: List[str] = wheelsConfig.getFilterKeys()
+
+        return cls({filterName: wheelsConfig.getField(filterName) for filterName in filterNames}, {filterName: wheelsConfig.getFieldConcatOperator(filterName) for filterName in filterNames}, wheelsConfig.getFilterConcatOperator(), wheelsConfig.inOrOut)
+
+    def __getConcatOperator(self, concatOperator: str) -> Callable:
+        if concatOperator not in self._concatOperators:
+            raise InvalidInputError("WheelFilter::__getConcatOperator - Incorrect logical operator '" + str(concatOperator) + "'. Set 'or' or 'and'.")
+
+        return self._concatOperators[concatOperator]
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _getPythonVersion(pythonTag: str) -> Tuple[int, ...]:
+        """Version in a Python tag as a tuple, e.g. (3, 10) for 'cp310' or (3,) for 'py3'. Empty if it has no version (e.g. 'py')."""
+
+        digits: str = re.sub(r"^[a-zA-Z]*(\d*).*$", r"\1", pythonTag)
+
+        return tuple(int(digit) for digit in digits[:1]) + ((int(digits[1:]),) if len(digits) > 1 else tuple())
+
+    def __compileFilter(self, filter: str, fieldName: str) -> Callable[[str], bool]:
+        if self._aprox_char in filter:
+            literal: str = filter.replace(self._aprox_char, "")
+            return lambda wheelAttribute: literal in wheelAttribute
+
+        comparison: str = next((comparison for comparison in self._comparisonOperators if comparison in filter), None)
+        if comparison is None:
+            return lambda wheelAttribute: wheelAttribute == filter
+
+        if fieldName != "python_tags":
+            raise InvalidInputError("WheelFilter::__compileFilter - NOT SUPPORTED inequalities for filter '" + fieldName + "'.")
+
+        # ">3" stands for ">3.0"
+        threshold: Tuple[int, ...] = tuple(int(number) for number in re.sub(r"[^\d.]", "", filter).split(".") if number != "")
+        threshold = threshold + (0,) if len(threshold) == 1 else threshold
+        compare: Callable = self._comparisonOperators[comparison]
+
+        def fulfillsThreshold(wheelAttribute: str) -> bool:
+            wheelVersion: Tuple[int, ...] = self._getPythonVersion(wheelAttribute)
+            if len(wheelVersion) == 0:
+                return False
+
+            # Wheels for any version of a major one (e.g. 'py3') are only compared by the major version
+            commonLength: int = min(len(wheelVersion), len(threshold))
+            return compare(wheelVersion[:commonLength], threshold[:commonLength])
+
+        return fulfillsThreshold
+
+    def __fulfillsField(self, wheelAttribute, concatFilters: Callable, matchers: List[Callable]) -> bool:
+        if isinstance(wheelAttribute, str):
+            return concatFilters(matcher(wheelAttribute) for matcher in matchers)
+
+        return concatFilters(any(matcher(tag) for tag in wheelAttribute) for matcher in matchers)
+
+    def matches(self, parsedWheel: wheel_filename.ParsedWheelFilename) -> bool:
+        """Whether the wheel fulfills the filters, regardless of them being "in" or "out" filters. False if there are no filters."""
+
+        if len(self._fields) == 0:
+            return False
+
+        return self._concatFields(self.__fulfillsField(getattr(parsedWheel, fieldName), concatFilters, matchers) for fieldName, concatFilters, matchers in self._fields)
+
+    def __call__(self, wheelName: str) -> bool:
+        """Whether the wheel 'wheelName' is to be included. Raises wheel_filename.InvalidFilenameError if it is not a valid wheel name."""
+
+        return self.matches(wheel_filename.parse_wheel_filename(wheelName)) == self._filterIn
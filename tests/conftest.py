@@ -0,0 +1,32 @@
+import pytest
+
+import functools
+import http.server
+import threading
+
+#### Shared fixtures ####
+
+class QuietHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves a directory without logging every request."""
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def serveHTTP():
+    """Starts serving over HTTP from a background thread with the request handler class given (and the directory given, for those serving one). Returns the base URL. The servers are shut down after the test."""
+
+    servers = []
+
+    def serve(handler=QuietHTTPRequestHandler, directory=None):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=directory) if directory is not None else handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+        return "http://127.0.0.1:" + str(server.server_address[1]) + "/"
+
+    yield serve
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
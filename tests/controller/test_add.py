@@ -0,0 +1,149 @@
+import pytest
+import os
+
+import argparse
+import gc
+import http.server
+import tempfile
+import threading
+import time
+
+import sys
+sys.path.append(".")
+
+from pypickup.cmd.add import AddEP
+from pypickup.controller import Add
+from pypickup.utils.invalidInputError import InvalidInputError
+
+#### Parallel 'add' battery test ####
+
+fileNames = ["pkg-1.0.tar.gz", "pkg-1.1.tar.gz", "pkg-1.2.tar.gz", "pkg-1.3.tar.gz"]
+
+class SlowFileRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves a directory, taking a while with every file so parallel downloads overlap, and keeping track of how many of them are served at once."""
+
+    lock = threading.Lock()
+    activeDownloads = 0
+    maxActiveDownloads = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if not self.path.endswith(".tar.gz"):
+            return http.server.SimpleHTTPRequestHandler.do_GET(self)
+
+        with SlowFileRequestHandler.lock:
+            SlowFileRequestHandler.activeDownloads += 1
+            SlowFileRequestHandler.maxActiveDownloads = max(SlowFileRequestHandler.maxActiveDownloads, SlowFileRequestHandler.activeDownloads)
+        time.sleep(0.2)
+
+        http.server.SimpleHTTPRequestHandler.do_GET(self)
+        with SlowFileRequestHandler.lock:
+            SlowFileRequestHandler.activeDownloads -= 1
+
+@pytest.fixture
+def upstreamURL(serveHTTP):
+    """Serves a simple index with the package 'pkg' and its files over HTTP from a background thread."""
+
+    tempDir = tempfile.TemporaryDirectory()
+    os.makedirs(os.path.join(tempDir.name, "pkg"))
+    for fileName in fileNames:
+        with open(os.path.join(tempDir.name, "pkg", fileName), "wb") as file:
+            file.write(fileName.encode("utf-8") * 1000)
+    with open(os.path.join(tempDir.name, "pkg", "index.html"), "w") as file:
+        file.write("".join('<a href="./' + fileName + '">' + fileName + '</a>' for fileName in fileNames))
+
+    yield serveHTTP(SlowFileRequestHandler, tempDir.name)
+
+    tempDir.cleanup()
+
+def parseAddArguments(arguments):
+    parser = argparse.ArgumentParser(prog="pypickup add")
+    AddEP.init_subparser(parser)
+
+    return parser.parse_args(arguments)
+
+def test_addDownloadsFilesInParallel(upstreamURL):
+    tempDir = tempfile.TemporaryDirectory()
+
+    AddEP.run(parseAddArguments(["pkg", "-p", tempDir.name, "-u", upstreamURL, "-j", "4", "--retries", "1"]))
+
+    assert SlowFileRequestHandler.maxActiveDownloads > 1
+    assert sorted(fileName for fileName in os.listdir(os.path.join(tempDir.name, "pkg")) if fileName.endswith(".tar.gz")) == fileNames
+    with open(os.path.join(tempDir.name, "pkg", "index.html"), "r") as packageHTMLFile:
+        packageHTML = packageHTMLFile.read()
+        assert all('href="./' + fileName in packageHTML for fileName in fileNames)
+
+    tempDir.cleanup()
+
+@pytest.mark.parametrize("jobs", ["0", "-1", "x"])
+def test_incorrectJobsAreAUsageError(jobs, capsys):
+    with pytest.raises(SystemExit):
+        parseAddArguments(["pkg", "-j", jobs])
+
+    assert "argument -j/--jobs" in capsys.readouterr().err
+
+#### Pipelined 'add' battery test ####
+
+def getController(arguments):
+    args = parseAddArguments(arguments)
+    args.packageName = args.packageNameList[0]
+
+    controller = Add()
+    controller.parseScriptArguments(args)
+
+    return controller
+
+def test_addPackagesHonoursTheFiltersOfEachPackage(upstreamURL):
+    tempDir = tempfile.TemporaryDirectory()
+    options = ["-u", upstreamURL, "--retries", "1"]
+
+    controllers = [getController(["pkg==1.1", "-p", os.path.join(tempDir.name, "a")] + options), getController(["pkg==1.3", "-p", os.path.join(tempDir.name, "b")] + options)]
+    Add.addPackages(controllers)
+
+    assert [fileName for fileName in os.listdir(os.path.join(tempDir.name, "a", "pkg")) if fileName.endswith(".tar.gz")] == ["pkg-1.1.tar.gz"]
+    assert [fileName for fileName in os.listdir(os.path.join(tempDir.name, "b", "pkg")) if fileName.endswith(".tar.gz")] == ["pkg-1.3.tar.gz"]
+
+    with pytest.raises(InvalidInputError):
+        Add.addPackages([controllers[0], getController(["pkg", "-p", tempDir.name, "-j", "2"] + options)])
+
+    tempDir.cleanup()
+
+#### Dry run 'add' battery test ####
+
+def getDirectoryContents(path):
+    contents = {}
+    for root, _, fileNames in os.walk(path):
+        for fileName in fileNames:
+            with open(os.path.join(root, fileName), "rb") as file:
+                contents[os.path.relpath(os.path.join(root, fileName), path)] = file.read()
+
+    return contents
+
+def test_dryRunDoesNotChangeTheLocalRepository(upstreamURL, capsys):
+    tempDir = tempfile.TemporaryDirectory()
+    options = ["-p", tempDir.name, "-u", upstreamURL, "--retries", "1"]
+    AddEP.run(parseAddArguments(["pkg==1.0"] + options))
+    gc.collect()
+
+    contents = getDirectoryContents(tempDir.name)
+    AddEP.run(parseAddArguments(["pkg"] + options + ["--dry-run"]))
+    gc.collect()
+
+    assert getDirectoryContents(tempDir.name) == contents
+    assert "pkg-1.1.tar.gz" in capsys.readouterr().out
+
+    # A repository created before there was a catalog
+    for fileName in os.listdir(tempDir.name):
+        if fileName.startswith(".catalog.sqlite3"):
+            os.remove(os.path.join(tempDir.name, fileName))
+
+    contents = getDirectoryContents(tempDir.name)
+    AddEP.run(parseAddArguments(["pkg"] + options + ["--dry-run"]))
+    gc.collect()
+
+    assert getDirectoryContents(tempDir.name) == contents
+    assert "pkg-1.1.tar.gz" in capsys.readouterr().out
+
+    tempDir.cleanup()
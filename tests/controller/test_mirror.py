@@ -0,0 +1,99 @@
+import pytest
+import os
+
+import hashlib
+import tempfile
+import threading
+
+import sys
+sys.path.append(".")
+
+from pypickup import Mirror
+from pypickup.controller import Add
+
+#### 'Mirror' battery test ####
+
+fileContent = b"pkg" * 1000
+
+@pytest.fixture
+def upstreamURL(serveHTTP):
+    """Serves a simple index with the package 'pkg' (and its file 'pkg-1.0.tar.gz') over HTTP from a background thread."""
+
+    tempDir = tempfile.TemporaryDirectory()
+    os.makedirs(os.path.join(tempDir.name, "pkg"))
+    with open(os.path.join(tempDir.name, "pkg", "pkg-1.0.tar.gz"), "wb") as file:
+        file.write(fileContent)
+    with open(os.path.join(tempDir.name, "pkg", "index.html"), "w") as file:
+        file.write('<a href="./pkg-1.0.tar.gz#sha256=' + hashlib.sha256(fileContent).hexdigest() + '">pkg-1.0.tar.gz</a>')
+
+    yield serveHTTP(directory=tempDir.name)
+
+    tempDir.cleanup()
+
+def test_mirrorReturnsResults(upstreamURL):
+    tempDir = tempfile.TemporaryDirectory()
+
+    with Mirror(tempDir.name, upstreams=upstreamURL, retries=1) as mirror:
+        result = mirror.add(["pkg"], jobs=2)
+        assert result.ok and result["pkg"].status == "added"
+        assert result.downloaded == ["pkg-1.0.tar.gz"] and result.downloadedBytes == len(fileContent)
+        assert "Adding 'pkg'" in result.output
+
+        assert mirror.add(["pkg"])["pkg"].status == "up to date"
+        assert mirror.list() == ["pkg"] and mirror.list("pkg") == ["pkg-1.0.tar.gz"]
+        assert mirror.rebuildIndex(jobs=1)["pkg"].status in ["rebuilt", "unchanged"]
+
+        dryRun = mirror.remove(["pkg"], dryRun=True)
+        assert dryRun["pkg"].status == "planned" and mirror.list() == ["pkg"]
+
+        result = mirror.remove(["pkg"])
+        assert result.removed == ["pkg-1.0.tar.gz"] and mirror.list() == []
+
+    tempDir.cleanup()
+
+def test_mirrorsDoNotShareOptionsNorOutput(upstreamURL, capsys):
+    tempDir = tempfile.TemporaryDirectory()
+    sharedUpstreams = [upstream.baseURL for upstream in Add._networkManager.upstreams]
+
+    unreachableMirror = Mirror(os.path.join(tempDir.name, "a"), upstreams="http://127.0.0.1:9/", retries=1)
+    mirror = Mirror(os.path.join(tempDir.name, "b"), upstreams=upstreamURL, retries=1)
+    assert unreachableMirror.add(["pkg"])["pkg"].status == "not found"
+
+    # Other threads print while adding
+    stopPrinting = threading.Event()
+    def printUnrelated():
+        while not stopPrinting.is_set():
+            print("unrelated")
+            stopPrinting.wait(0.001)
+    printingThread = threading.Thread(target=printUnrelated)
+    printingThread.start()
+
+    result = mirror.add(["pkg"])
+
+    stopPrinting.set()
+    printingThread.join()
+
+    assert result["pkg"].status == "added"
+    assert "Adding 'pkg'" in result.output and "unrelated" not in result.output
+    assert "Adding" not in capsys.readouterr().out
+    assert [upstream.baseURL for upstream in Add._networkManager.upstreams] == sharedUpstreams
+
+    unreachableMirror.close()
+    mirror.close()
+    tempDir.cleanup()
+
+def test_mirrorRaisesOnIncorrectInput():
+    tempDir = tempfile.TemporaryDirectory()
+
+    with pytest.raises(ValueError):
+        Mirror(tempDir.name, notAnOption=True)
+
+    with Mirror(tempDir.name) as mirror:
+        with pytest.raises(ValueError):
+            mirror.add(["pkg=1.0"])
+        with pytest.raises(ValueError):
+            mirror.remove(["pkg"], notAnOption=True)
+        with pytest.raises(ValueError):
+            mirror.rebuildIndex()
+
+    tempDir.cleanup()
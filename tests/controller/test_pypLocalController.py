@@ -3,12 +3,14 @@ import os
 import time
 
 import argparse
+import subprocess
 import tempfile
 
 import sys
 sys.path.append(".")
 
-from pypickup.controller import LocalPyPIController, Add, Remove, List
+from pypickup.controller import LocalPyPIController, Add, Remove, RebuildIndex
+from pypickup.utils.fileRecord import FileRecord
 
 # GENERAL VARIABLES #
 htmlIndexName = "index.html"
@@ -57,20 +59,20 @@ testData = [
    Links for bs4\
   </h1>\
   <a href=\"./bs4-0.0.1.tar.gz\">bs4-0.0.1.tar.gz</a>\
-  <a href=\"./bs4-0.0.0.tar.gz\">bs4-0.0.0.tar.gz</a>\
+  <a href=\"./bs4-0.0.0.tar.gz#sha256=28408ebf82f66e2cf1e2a484c62f6e5d901fd6bdf1d9a6787207599538f0dbe6\">bs4-0.0.0.tar.gz</a>\
  </body>\
 </html>"
 )
 ]
 
-def getInitializedController():
+def getInitializedController(packageName: str = "pn"):
     """Creates a temp dir and an inicialized LocalPyPIController instance, both returned."""
 
     tempDir = tempfile.TemporaryDirectory()
     # tempFile = tempfile.TemporaryFile()
 
     args = argparse.ArgumentParser()
-    args.packageName = "pn"
+    args.packageName = packageName
     args.pypiLocalPath = tempDir.name
 
     instance = LocalPyPIController()
@@ -81,23 +83,100 @@ def getInitializedController():
 
 @pytest.mark.parametrize("packagesToDownload, currentHTML, expectedHTML", testData, ids=["1st"])
 def test_downloadFilesInLocalPath(packagesToDownload, currentHTML, expectedHTML):
-    instance, tempDir = getInitializedController()
+    instance, tempDir = getInitializedController("bs4")
 
     packageDirectory = os.path.join(tempDir.name, instance.packageName)
     os.makedirs(packageDirectory)
 
-    htmlFile = open(os.path.join(packageDirectory, htmlIndexName), "w+")
-    instance._downloadFilesInLocalPath(packagesToDownload, currentHTML, htmlFile)
+    # A repository created before the catalog existed, which is imported from its indices
+    with open(instance.baseHTMLFileFullName, "w") as baseHTMLFile:
+        baseHTMLFile.write("<!DOCTYPE html><html><body><a href=\"./bs4\">bs4</a></body></html>")
+
+    htmlFilePath = os.path.join(packageDirectory, htmlIndexName)
+    with open(htmlFilePath, "w") as htmlFile:
+        htmlFile.write(currentHTML)
+
+    instance._downloadFilesInLocalPath(packagesToDownload)
 
     # Check if the HTML index file has been properly updated:
-    htmlFile.seek(0)
-    assert htmlFile.read().replace("\n", "") == expectedHTML
+    with open(htmlFilePath, "r") as htmlFile:
+        assert htmlFile.read().replace("\n", "") == expectedHTML
 
     # Check if the files (.whl, .zip, ...) have been properly downloaded:
     # for fileName in packagesToDownload.keys():
     #     assert os.path.exists(fileName)
 
-    htmlFile.close()
+    tempDir.cleanup()
+
+#### 'rebuild-index' battery test ####
+
+def test_rebuildAllIndicesSkipsUnchangedPackages(capsys):
+    tempDir = tempfile.TemporaryDirectory()
+
+    for packageName in ["a", "b"]:
+        os.makedirs(os.path.join(tempDir.name, packageName))
+        with open(os.path.join(tempDir.name, packageName, packageName + "-1.0.tar.gz"), "w") as file:
+            file.write(packageName)
+
+    args = argparse.ArgumentParser()
+    args.packageName = ""
+    args.pypiLocalPath = tempDir.name
+    args.jobs = 2
+    args.force = False
+
+    instance = RebuildIndex()
+    instance.parseScriptArguments(args)
+
+    instance.rebuildAllIndices()
+    assert "2 indices rebuilt, 0 unchanged." in capsys.readouterr().out
+    assert sorted(instance.catalog.getPackages()) == ["a", "b"]
+    assert list(instance.catalog.getFiles("a").keys()) == ["a-1.0.tar.gz"]
+
+    instance.rebuildAllIndices()
+    assert "0 indices rebuilt, 2 unchanged." in capsys.readouterr().out
+
+    with open(os.path.join(tempDir.name, "b", "b-1.1.tar.gz"), "w") as file:
+        file.write("b")
+
+    instance.rebuildAllIndices()
+    assert "1 indices rebuilt, 1 unchanged." in capsys.readouterr().out
+    with open(os.path.join(tempDir.name, "b", htmlIndexName), "r") as htmlFile:
+        assert "b-1.1.tar.gz" in htmlFile.read()
+
+    tempDir.cleanup()
+
+#### 'rm' dry run battery test ####
+
+def test_removeDryRunOnlyPrintsThePlan(capsys):
+    tempDir = tempfile.TemporaryDirectory()
+
+    args = argparse.ArgumentParser()
+    args.packageName = "a==1.1"
+    args.pypiLocalPath = tempDir.name
+    args.dryRun = True
+
+    instance = Remove()
+    instance.parseScriptArguments(args)
+
+    os.makedirs(instance.packageLocalPath)
+    for version in ["1.0", "1.1"]:
+        with open(os.path.join(instance.packageLocalPath, "a-" + version + ".tar.gz"), "w") as file:
+            file.write("a" * 2048)
+
+    indexWriter = instance._getIndexWriter()
+    instance.catalog.addPackage("a")
+    instance.catalog.addFiles("a", [instance._getLocalFileRecord("a", FileRecord(fileName, "./" + fileName)) for fileName in ["a-1.0.tar.gz", "a-1.1.tar.gz"]])
+    indexWriter.writeBaseIndex()
+    indexWriter.writePackageIndex("a")
+
+    instance.removePackage()
+
+    output = capsys.readouterr().out
+    assert "Index entries to remove (1):\n    a-1.1.tar.gz" in output
+    assert "Files to delete (1, 2.0 KiB):" in output
+    assert list(instance.catalog.getFiles("a").keys()) == ["a-1.0.tar.gz", "a-1.1.tar.gz"]
+    assert os.path.exists(os.path.join(instance.packageLocalPath, "a-1.1.tar.gz"))
+
     tempDir.cleanup()
 
 #### 'list' battery test ####
@@ -134,4 +213,13 @@ class ListTest:
  </body>\
 </html>"
     )
-    ]
\ No newline at end of file
+    ]
+
+#### Lazy loading battery test ####
+
+def test_localCommandsDoNotLoadTheNetworkModules():
+    # In a new interpreter, since other tests may have loaded them already
+    code = "import sys; from pypickup.controller import List; List(); print(sorted(module for module in ['requests', 'tqdm', 'yaml', 'asyncio'] if module in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
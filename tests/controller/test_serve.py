@@ -0,0 +1,37 @@
+
+import argparse
+import tempfile
+
+import sys
+sys.path.append(".")
+
+from pypickup.cmd.serve import ServeEP
+from pypickup.controller import Serve
+
+#### Proxy 'serve' battery test ####
+
+def getProxyController(pypiLocalPath, cacheSize):
+    parser = argparse.ArgumentParser(prog="pypickup serve")
+    ServeEP.init_subparser(parser)
+
+    args = parser.parse_args(["-p", pypiLocalPath, "--proxy", "--cache-size", str(cacheSize), "--add-options=-u http://127.0.0.1:1/ --retries 1"])
+    args.packageName = ""
+    args.proxyArguments = ServeEP.getProxyArguments(args)
+
+    controller = Serve()
+    controller.parseScriptArguments(args)
+
+    return controller
+
+def test_proxyKeepsTrackOfTheLastRequestedProjectsOnly():
+    tempDir = tempfile.TemporaryDirectory()
+    controller = getProxyController(tempDir.name, 2)
+
+    for projectName in ["a", "b", "a", "c"]:
+        controller.getProxyController(projectName)
+        controller.getProxiedFileRecord(projectName, projectName + "-1.0.tar.gz")
+
+    assert list(controller._proxyControllers) == ["a", "c"]
+    assert sorted(controller._projectLocks) == ["a", "c"]
+
+    tempDir.cleanup()
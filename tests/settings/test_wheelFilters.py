@@ -0,0 +1,69 @@
+import pytest
+import os
+import shutil
+
+import tempfile
+import yaml
+
+import sys
+sys.path.append(".")
+
+from pypickup.settings.wheelFilters import WheelsConfig
+
+#### 'WheelsConfig' cache battery test ####
+
+@pytest.fixture
+def settingsFilePath(monkeypatch):
+    """A settings directory with the default settings file, through PYPICKUP_INDEX_PATH."""
+
+    tempDir = tempfile.TemporaryDirectory()
+    monkeypatch.setenv("PYPICKUP_INDEX_PATH", tempDir.name)
+
+    filePath = os.path.join(tempDir.name, "settings", "wheelFiltersSettings.yaml")
+    os.makedirs(os.path.dirname(filePath))
+    shutil.copyfile("./pypickup/settings/wheelFiltersSettings.yaml", filePath)
+
+    # Old enough not to be considered racy
+    os.utime(filePath, (1000000000, 1000000000))
+
+    yield filePath
+
+    tempDir.cleanup()
+
+def test_unchangedSettingsAreNotParsedAgain(settingsFilePath, monkeypatch):
+    validations = list()
+    assert WheelsConfig(validate=validations.append).inOrOut == "out"
+    assert len(validations) == 1
+
+    def failingSafeLoad(stream):
+        raise AssertionError("The settings should be loaded from the cache.")
+
+    monkeypatch.setattr(yaml, "safe_load", failingSafeLoad)
+    assert WheelsConfig(validate=validations.append).outFilters["platform_tags"] == ["~macos"]
+
+    # Same content, different modification time
+    os.utime(settingsFilePath, (1100000000, 1100000000))
+    assert WheelsConfig(validate=validations.append).inOrOut == "out"
+    assert len(validations) == 1
+
+def test_changedSettingsAreParsedAndValidatedAgain(settingsFilePath):
+    validations = list()
+    WheelsConfig(validate=validations.append)
+
+    with open(settingsFilePath, "r") as file:
+        settings = file.read()
+    with open(settingsFilePath, "w") as file:
+        file.write(settings.replace('"inOrOut_wheels": "out"', '"inOrOut_wheels": "in"'))
+    os.utime(settingsFilePath, (1100000000, 1100000000))
+
+    assert WheelsConfig(validate=validations.append).inOrOut == "in"
+    assert len(validations) == 2
+
+def test_invalidSettingsAreNotCached(settingsFilePath):
+    def failingValidation(wheelsConfig):
+        raise ValueError("Invalid filters.")
+
+    with pytest.raises(ValueError):
+        WheelsConfig(validate=failingValidation)
+    with pytest.raises(ValueError):
+        WheelsConfig(validate=failingValidation)
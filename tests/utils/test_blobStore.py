@@ -0,0 +1,38 @@
+import os
+
+import hashlib
+import tempfile
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.blobStore import BlobStore
+
+#### 'BlobStore' battery test ####
+
+def test_addFileAndLinkInto():
+    tempDir = tempfile.TemporaryDirectory()
+    for indexRoot in ["a", "b"]:
+        os.makedirs(os.path.join(tempDir.name, indexRoot))
+
+    content = b"wheel content"
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    firstFile = os.path.join(tempDir.name, "a", "pkg-0.0.0-py3-none-any.whl")
+    with open(firstFile, "wb") as file:
+        file.write(content)
+
+    blobStore = BlobStore(os.path.join(tempDir.name, "store"))
+    assert not blobStore.contains(sha256)
+
+    blobStore.addFile(firstFile, sha256)
+    assert blobStore.contains(sha256)
+
+    secondFile = os.path.join(tempDir.name, "b", "pkg-0.0.0-py3-none-any.whl")
+    blobStore.linkInto(sha256, secondFile)
+
+    assert os.path.samefile(firstFile, blobStore.getBlobPath(sha256))
+    assert os.path.samefile(secondFile, blobStore.getBlobPath(sha256))
+    assert os.listdir(os.path.join(tempDir.name, "b")) == ["pkg-0.0.0-py3-none-any.whl"]
+
+    tempDir.cleanup()
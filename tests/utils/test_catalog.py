@@ -0,0 +1,38 @@
+import os
+
+import tempfile
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.catalog import Catalog
+from pypickup.utils.fileRecord import FileRecord
+
+#### 'Catalog' battery test ####
+
+def test_catalogKeepsPackagesAndFiles():
+    tempDir = tempfile.TemporaryDirectory()
+    catalog = Catalog(os.path.join(tempDir.name, ".catalog.sqlite3"))
+
+    assert catalog.isEmpty()
+
+    catalog.setPackages(["b", "a"])
+    catalog.addFiles("a", [FileRecord("a-1.0.tar.gz", "./a-1.0.tar.gz", hashes={"sha256": "ab"}, yanked="broken"), FileRecord("a-1.1.tar.gz", "./a-1.1.tar.gz")])
+    assert catalog.getPackages() == ["b", "a"]
+
+    files = catalog.getFiles("a")
+    assert list(files.keys()) == ["a-1.0.tar.gz", "a-1.1.tar.gz"]
+    assert files["a-1.0.tar.gz"].link == "./a-1.0.tar.gz#sha256=ab"
+    assert files["a-1.0.tar.gz"].yanked == "broken"
+    assert files["a-1.1.tar.gz"].yanked is False
+
+    catalog.setFiles("a", [FileRecord("a-1.1.tar.gz", "./a-1.1.tar.gz", yanked=True)])
+    assert list(catalog.getFiles("a").keys()) == ["a-1.1.tar.gz"]
+    assert catalog.getFiles("a")["a-1.1.tar.gz"].yanked is True
+
+    catalog.setPackages(["b"])
+    assert not catalog.hasPackage("a")
+    assert catalog.getFiles("a") == {}
+
+    catalog.close()
+    tempDir.cleanup()
@@ -0,0 +1,24 @@
+import io
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.htmlManager import HTMLManager
+
+#### 'filterFileNames' battery test ####
+
+regexZIPAndTars = r"^(.*)\.(zip|tar.gz|tar.bz2|tar.xz|tar.Z|tar)$"
+
+def test_incorrectWheelsAreReportedToTheOutput(capsys):
+    htmlManager = HTMLManager()
+    htmlManager.printAllFileNames = False
+    htmlManager.onlySources = False
+    htmlManager.includeDevs = False
+    htmlManager.includeRCs = False
+    htmlManager.includePlatformSpecific = True
+    htmlManager.packageVersion = ""
+    htmlManager.output = io.StringIO()
+
+    assert htmlManager.filterFileNames(["pkg.whl", "pkg-1.0.tar.gz"], regexZIPAndTars) == ["pkg-1.0.tar.gz"]
+    assert 'Incorrect wheel format "pkg.whl"' in htmlManager.output.getvalue()
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,174 @@
+import pytest
+import os
+import asyncio
+import threading
+import time
+
+import tempfile
+import requests
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.catalog import Catalog
+from pypickup.utils.fileRecord import FileRecord
+from pypickup.utils.htmlManager import HTMLManager
+from pypickup.utils.indexServer import IndexServer
+from pypickup.utils.indexWriter import IndexWriter
+from pypickup.utils.jsonManager import JSONManager
+
+#### 'IndexServer' battery test ####
+
+fileContent = bytes(range(256)) * 64
+
+class FakeProxy:
+
+    """Proxies 'proxied_package-1.0.tar.gz' of 'proxied-package', writing it slowly, chunk by chunk, into its '.part' file."""
+
+    def __init__(self, pypiLocalPath):
+        self.pypiLocalPath = pypiLocalPath
+        self.fetches = 0
+
+    def getProxiedProjectPage(self, projectName, contentType):
+        return None
+
+    def getProxiedFileRecord(self, projectName, fileName):
+        return FileRecord(fileName, "https://upstream/" + fileName, size=len(fileContent)) if fileName == "proxied_package-1.0.tar.gz" else None
+
+    def fetchProxiedFile(self, projectName, fileName, onProgress):
+        self.fetches += 1
+
+        filePath = os.path.join(self.pypiLocalPath, projectName, fileName)
+        os.makedirs(os.path.dirname(filePath), exist_ok=True)
+        with open(filePath + ".part", "wb") as file:
+            for start in range(0, len(fileContent), 4096):
+                file.write(fileContent[start:start + 4096])
+                file.flush()
+                onProgress(filePath + ".part", file.tell())
+                time.sleep(0.01)
+        os.replace(filePath + ".part", filePath)
+
+        return True
+
+def createRepository(pypiLocalPath):
+    """Creates a local repository with the package 'Some_Package' (and its file 'some_package-1.0.tar.gz'). Returns the path of its catalog."""
+
+    catalogPath = os.path.join(pypiLocalPath, ".catalog.sqlite3")
+
+    catalog = Catalog(catalogPath)
+    indexWriter = IndexWriter(catalog, pypiLocalPath, HTMLManager(), JSONManager())
+    catalog.addPackage("Some_Package")
+    catalog.addFiles("Some_Package", [FileRecord("some_package-1.0.tar.gz", "./some_package-1.0.tar.gz", hashes={"sha256": "ab"}, size=len(fileContent))])
+    indexWriter.writeBaseIndex()
+    indexWriter.writePackageIndex("Some_Package")
+    catalog.close()
+
+    with open(os.path.join(pypiLocalPath, "Some_Package", "some_package-1.0.tar.gz"), "wb") as file:
+        file.write(fileContent)
+
+    return catalogPath
+
+def serveInThread(server):
+    started = threading.Event()
+    thread = threading.Thread(target=lambda: asyncio.run(server.serveForever(started.set)), daemon=True)
+    thread.start()
+    started.wait(5)
+
+    return thread
+
+@pytest.fixture
+def indexServer():
+    """Serves the repository of createRepository in a background thread."""
+
+    tempDir = tempfile.TemporaryDirectory()
+    server = IndexServer(tempDir.name, createRepository(tempDir.name), port=0)
+    thread = serveInThread(server)
+
+    yield server
+
+    server.stop()
+    thread.join(5)
+    tempDir.cleanup()
+
+@pytest.fixture
+def proxyServer():
+    """Serves the repository of createRepository in a background thread, with a FakeProxy."""
+
+    tempDir = tempfile.TemporaryDirectory()
+    server = IndexServer(tempDir.name, createRepository(tempDir.name), port=0, proxy=FakeProxy(tempDir.name))
+    thread = serveInThread(server)
+
+    yield server
+
+    server.stop()
+    thread.join(5)
+    tempDir.cleanup()
+
+def test_indexPagesAreNegotiated(indexServer, monkeypatch):
+    monkeypatch.setattr(IndexServer, "_minGzipSize", 0)
+
+    with requests.Session() as session:
+        root = session.get(indexServer.url + "simple/")
+        assert root.status_code == 200 and root.headers["Content-Type"] == "text/html"
+        assert '<a href="./Some_Package">Some_Package</a>' in root.text
+
+        # PEP 503 normalized name
+        project = session.get(indexServer.url + "simple/some-package/", headers={"Accept": "application/vnd.pypi.simple.v1+json, text/html;q=0.1", "Accept-Encoding": "gzip"})
+        assert project.headers["Content-Type"] == "application/vnd.pypi.simple.v1+json"
+        assert project.headers["Content-Encoding"] == "gzip"
+        assert project.json()["files"][0]["filename"] == "some_package-1.0.tar.gz"
+
+        notModified = session.get(indexServer.url + "simple/some-package/", headers={"Accept": "application/vnd.pypi.simple.v1+json", "If-None-Match": project.headers["ETag"]})
+        assert notModified.status_code == 304
+
+        assert session.get(indexServer.url + "simple/some-package/", headers={"Accept": "application/json"}).status_code == 406
+        assert session.get(indexServer.url + "simple/some-package", allow_redirects=False).headers["Location"] == "/simple/some-package/"
+        assert session.get(indexServer.url + "simple/other/").status_code == 404
+        assert session.get(indexServer.url + ".catalog.sqlite3").status_code == 404
+
+def test_filesSupportRanges(indexServer):
+    fileURL = indexServer.url + "Some_Package/some_package-1.0.tar.gz"
+
+    with requests.Session() as session:
+        whole = session.get(fileURL)
+        assert whole.content == fileContent and whole.headers["Accept-Ranges"] == "bytes"
+
+        partial = session.get(fileURL, headers={"Range": "bytes=100-", "If-Range": whole.headers["ETag"]})
+        assert partial.status_code == 206 and partial.content == fileContent[100:]
+        assert partial.headers["Content-Range"] == "bytes 100-" + str(len(fileContent) - 1) + "/" + str(len(fileContent))
+
+        assert session.get(fileURL, headers={"Range": "bytes=100-", "If-Range": '"other"'}).status_code == 200
+        assert session.get(fileURL, headers={"Range": "bytes=" + str(len(fileContent)) + "-"}).status_code == 416
+        assert session.head(fileURL).headers["Content-Length"] == str(len(fileContent))
+
+def test_proxiedFilesAreFetchedOnceAndStreamed(proxyServer):
+    fileURL = proxyServer.url + "simple/proxied-package/proxied_package-1.0.tar.gz"
+
+    responses = dict()
+    def get(index):
+        responses[index] = requests.get(fileURL)
+
+    threads = [threading.Thread(target=get, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert proxyServer._proxy.fetches == 1
+    assert all(response.status_code == 200 and response.content == fileContent for response in responses.values())
+
+    # Once fetched, it is a local file
+    assert requests.get(fileURL, headers={"Range": "bytes=100-"}).content == fileContent[100:]
+    assert proxyServer._proxy.fetches == 1
+
+    assert requests.get(proxyServer.url + "simple/proxied-package/other-1.0.tar.gz").status_code == 404
+    assert requests.get(proxyServer.url + "simple/some-package/").status_code == 200
+
+def test_proxyDoesNotServeTheSettings(proxyServer):
+    os.makedirs(os.path.join(proxyServer._pypiLocalPath, "settings"))
+    with open(os.path.join(proxyServer._pypiLocalPath, "settings", "wheelFiltersSettings.yaml"), "w") as file:
+        file.write("python_version: []\n")
+
+    assert requests.get(proxyServer.url + "simple/settings/wheelFiltersSettings.yaml").status_code == 404
+    assert requests.get(proxyServer.url + "simple/Settings/wheelFiltersSettings.yaml").status_code == 404
+    assert requests.get(proxyServer.url + "simple/settings/").status_code == 404
@@ -0,0 +1,50 @@
+import os
+import json
+
+import tempfile
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.catalog import Catalog
+from pypickup.utils.fileRecord import FileRecord
+from pypickup.utils.htmlManager import HTMLManager
+from pypickup.utils.indexWriter import IndexWriter
+from pypickup.utils.jsonManager import JSONManager
+
+#### 'IndexWriter' battery test ####
+
+def readIndex(filePath):
+    with open(filePath, "r") as indexFile:
+        return indexFile.read()
+
+def test_addFilesFlushesInBatches():
+    tempDir = tempfile.TemporaryDirectory()
+    indexPath = os.path.join(tempDir.name, "a", "index.html")
+
+    htmlManager = HTMLManager()
+    catalog = Catalog(os.path.join(tempDir.name, ".catalog.sqlite3"))
+    catalog.addPackage("a")
+
+    with IndexWriter(catalog, tempDir.name, htmlManager, JSONManager(), flushEvery=2, flushInterval=3600) as indexWriter:
+        indexWriter.writeBaseIndex()
+        indexWriter.writePackageIndex("a")
+
+        indexWriter.addFiles("a", [FileRecord("a-0.0.0.tar.gz", "./a-0.0.0.tar.gz")])
+        assert htmlManager.getHRefsList(readIndex(indexPath)) == {}
+
+        indexWriter.addFiles("a", [FileRecord("a-0.0.1.tar.gz", "./a-0.0.1.tar.gz", hashes={"sha256": "ab"})], {"a-0.0.1.tar.gz": "https://remote/a-0.0.1.tar.gz"})
+        assert htmlManager.getHRefsList(readIndex(indexPath)) == {"a-0.0.0.tar.gz": "./a-0.0.0.tar.gz", "a-0.0.1.tar.gz": "./a-0.0.1.tar.gz#sha256=ab"}
+
+        indexWriter.addFiles("a", [FileRecord("a-0.0.2.tar.gz", "./a-0.0.2.tar.gz", requiresPython=">=3.8")])
+
+    assert list(htmlManager.getHRefsList(readIndex(indexPath)).keys()) == ["a-0.0.0.tar.gz", "a-0.0.1.tar.gz", "a-0.0.2.tar.gz"]
+    assert htmlManager.getHRefsList(readIndex(os.path.join(tempDir.name, "index.html"))) == {"a": "./a"}
+
+    projectJSON = json.loads(readIndex(os.path.join(tempDir.name, "a", "index.json")))
+    assert [file["filename"] for file in projectJSON["files"]] == ["a-0.0.0.tar.gz", "a-0.0.1.tar.gz", "a-0.0.2.tar.gz"]
+    assert projectJSON["files"][2]["requires-python"] == ">=3.8"
+    assert sorted(os.listdir(os.path.join(tempDir.name, "a"))) == ["index.html", "index.json"]
+
+    catalog.close()
+    tempDir.cleanup()
@@ -0,0 +1,29 @@
+import pytest
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.jsonManager import JSONManager
+
+#### 'getFileRecords' battery test ####
+
+testData = [
+    (b'{"meta": {"api-version": "1.1"}, "name": "bs4", "files": [{"filename": "bs4-0.0.1.tar.gz", "url": "../../packages/10/ed/bs4-0.0.1.tar.gz", "hashes": {"sha256": "36ecea1fd7cc5c0c6e4a1ff075df26d50da647b75376626cc186e2212886dd3a"}, "requires-python": ">=3.6", "yanked": "broken", "size": 1257, "upload-time": "2016-08-22T13:41:43.000000Z"}]}',
+     "https://pypi.org/simple/bs4/",
+     ("bs4-0.0.1.tar.gz", "https://pypi.org/packages/10/ed/bs4-0.0.1.tar.gz#sha256=36ecea1fd7cc5c0c6e4a1ff075df26d50da647b75376626cc186e2212886dd3a", ">=3.6", "broken", 1257))
+]
+
+@pytest.mark.parametrize("jsonContent, pageURL, expected_record", testData, ids=["relative_url"])
+def test_getFileRecords(jsonContent, pageURL, expected_record):
+    fileRecords = JSONManager().getFileRecords(jsonContent, pageURL)
+
+    fileRecord = fileRecords[expected_record[0]]
+    assert fileRecord.link == expected_record[1]
+    assert fileRecord.requiresPython == expected_record[2]
+    assert fileRecord.yanked == expected_record[3]
+    assert fileRecord.size == expected_record[4]
+
+def test_isJSONContentType():
+    assert JSONManager().isJSONContentType("application/vnd.pypi.simple.v1+json; charset=utf-8")
+    assert not JSONManager().isJSONContentType("text/html")
+    assert not JSONManager().isJSONContentType(None)
@@ -0,0 +1,34 @@
+import pytest
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.htmlManager import HTMLManager
+from pypickup.utils.linkExtractor import LinkExtractor, LinkRecord
+
+#### 'LinkExtractor' battery test ####
+
+testData = [
+    ("<!DOCTYPE html><html><body><h1>Links for bs4</h1>\n<a href=\"../../packages/10/ed/bs4-0.0.1.tar.gz#sha256=36ec\" data-requires-python=\"&gt;=3.6\" data-yanked>bs4-0.0.1.tar.gz</a><br/>\n<a name=\"anchor\">not a link</a></body></html>",
+     "Links for bs4",
+     [("bs4-0.0.1.tar.gz", "../../packages/10/ed/bs4-0.0.1.tar.gz#sha256=36ec", "sha256", "36ec", {"data-requires-python": ">=3.6", "data-yanked": ""})]),
+    ("<a href=\"./pkg-0.0.0.tar.gz\">\n    pkg-0.0.0.tar.gz\n  </a>",
+     None,
+     [("pkg-0.0.0.tar.gz", "./pkg-0.0.0.tar.gz", None, None, {})]),
+]
+
+@pytest.mark.parametrize("htmlString, expected_title, expected_links", testData, ids=["pypi", "prettified"])
+def test_iterLinks(htmlString, expected_title, expected_links):
+    linkExtractor = LinkExtractor()
+    links = [(link.fileName, link.href, link.hashName, link.hashValue, link.dataAttributes) for link in linkExtractor.iterLinks(htmlString)]
+
+    assert links == expected_links
+    assert linkExtractor.title == expected_title
+
+def test_renderHTMLRoundTrip():
+    htmlManager = HTMLManager()
+
+    htmlString = htmlManager.renderHTML("Links for pkg", [LinkRecord("pkg-0.0.0.tar.gz", "./pkg-0.0.0.tar.gz#sha256=1234"), LinkRecord("pkg-0.0.1.tar.gz", "./pkg-0.0.1.tar.gz")])
+
+    assert htmlString == "<!DOCTYPE html>\n<html>\n <body>\n  <h1>\n   Links for pkg\n  </h1>\n  <a href=\"./pkg-0.0.0.tar.gz#sha256=1234\">pkg-0.0.0.tar.gz</a>\n  <a href=\"./pkg-0.0.1.tar.gz\">pkg-0.0.1.tar.gz</a>\n </body>\n</html>\n"
+    assert htmlManager.getHRefsList(htmlString) == {"pkg-0.0.0.tar.gz": "./pkg-0.0.0.tar.gz#sha256=1234", "pkg-0.0.1.tar.gz": "./pkg-0.0.1.tar.gz"}
@@ -0,0 +1,320 @@
+import pytest
+import os
+
+import hashlib
+import http.server
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.networkManager import NetworkManager, RetryPolicy, TokenBucket
+from pypickup.utils.httpCache import HTTPCache
+
+#### 'downloadLink' battery test ####
+
+def test_downloadLinkLeavesNothingOnFailure():
+    tempDir = tempfile.TemporaryDirectory()
+
+    ok, _, _ = NetworkManager().downloadLink("http://127.0.0.1:9/pkg-0.0.0.tar.gz", os.path.join(tempDir.name, "pkg-0.0.0.tar.gz"), retries=1)
+
+    assert not ok
+    assert os.listdir(tempDir.name) == []
+
+    tempDir.cleanup()
+
+#### 'getProjectPage' battery test ####
+
+def test_getProjectPageIfModified(serveHTTP):
+    tempDir = tempfile.TemporaryDirectory()
+    with open(os.path.join(tempDir.name, "index.html"), "w") as indexFile:
+        indexFile.write("<a href=\"./pkg-0.0.0.tar.gz\">pkg-0.0.0.tar.gz</a>")
+
+    baseURL = serveHTTP(directory=tempDir.name)
+    httpCache = HTTPCache(os.path.join(tempDir.name, "cache"))
+
+    ok, modified, _, content, _ = NetworkManager().getProjectPage(baseURL + "index.html", httpCache, retries=1)
+    assert ok and modified
+    assert httpCache.getSyncFingerprint(baseURL + "index.html") is None
+
+    httpCache.setSyncFingerprint(baseURL + "index.html", "fingerprint")
+
+    ok, modified, _, cachedContent, contentType = NetworkManager().getProjectPage(baseURL + "index.html", httpCache, retries=1)
+    assert ok and not modified
+    assert cachedContent == content
+    assert contentType == "text/html"
+    assert httpCache.getSyncFingerprint(baseURL + "index.html") == "fingerprint"
+
+    tempDir.cleanup()
+
+#### Resumable 'downloadLink' battery test ####
+
+class RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves a single in-memory file supporting 'Range' requests, as the PyPI CDN does."""
+
+    content = bytes(range(256)) * 4096
+    etag = "\"v1\""
+    requestedRanges = []
+
+    def log_message(self, *args):
+        pass
+
+    def getRange(self):
+        rangeHeader = self.headers.get("Range")
+        self.requestedRanges.append(rangeHeader)
+
+        if not rangeHeader or self.headers.get("If-Range") != self.etag:
+            return False, 0, len(self.content) - 1
+
+        start, end = rangeHeader[len("bytes="):].split("-")
+        return True, int(start), int(end) if end else len(self.content) - 1
+
+    def do_GET(self):
+        isPartial, start, end = self.getRange()
+
+        self.send_response(206 if isPartial else 200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end + 1 - start))
+        if isPartial:
+            self.send_header("Content-Range", "bytes " + str(start) + "-" + str(end) + "/" + str(len(self.content)))
+        self.end_headers()
+        self.wfile.write(self.content[start : end + 1])
+
+def test_downloadLinkResumesPartFile(serveHTTP):
+    tempDir = tempfile.TemporaryDirectory()
+    filePath = os.path.join(tempDir.name, "pkg-0.0.0.tar.gz")
+
+    linkURL = serveHTTP(RangeRequestHandler) + "pkg-0.0.0.tar.gz"
+
+    # Simulate a previously interrupted download:
+    with open(filePath + ".part", "wb") as partFile:
+        partFile.write(RangeRequestHandler.content[:1000])
+    with open(filePath + ".part.validators", "w") as validatorsFile:
+        validatorsFile.write("{\"url\": \"" + linkURL + "\", \"etag\": \"\\\"v1\\\"\", \"lastModified\": null}")
+
+    ok, _, sha256 = NetworkManager().downloadLink(linkURL + "#sha256=" + hashlib.sha256(RangeRequestHandler.content).hexdigest(), filePath, retries=1)
+
+    assert ok
+    assert sha256 == hashlib.sha256(RangeRequestHandler.content).hexdigest()
+    assert RangeRequestHandler.requestedRanges == ["bytes=1000-"]
+    with open(filePath, "rb") as file:
+        assert file.read() == RangeRequestHandler.content
+    assert os.listdir(tempDir.name) == ["pkg-0.0.0.tar.gz"]
+
+    tempDir.cleanup()
+
+class WrongOffsetRequestHandler(RangeRequestHandler):
+    """Answers 'Range' requests from half the requested offset, as a misbehaving proxy might."""
+
+    requestedRanges = []
+
+    def getRange(self):
+        isPartial, start, end = RangeRequestHandler.getRange(self)
+        return isPartial, start // 2, end
+
+def test_downloadLinkRestartsOnWrongContentRange(serveHTTP):
+    tempDir = tempfile.TemporaryDirectory()
+    filePath = os.path.join(tempDir.name, "pkg-0.0.0.tar.gz")
+
+    linkURL = serveHTTP(WrongOffsetRequestHandler) + "pkg-0.0.0.tar.gz"
+
+    with open(filePath + ".part", "wb") as partFile:
+        partFile.write(WrongOffsetRequestHandler.content[:1000])
+    with open(filePath + ".part.validators", "w") as validatorsFile:
+        validatorsFile.write("{\"url\": \"" + linkURL + "\", \"etag\": \"\\\"v1\\\"\", \"lastModified\": null}")
+
+    # No hash to catch a wrong content
+    ok, _, sha256 = NetworkManager().downloadLink(linkURL, filePath, retries=1)
+
+    assert ok
+    assert sha256 == hashlib.sha256(WrongOffsetRequestHandler.content).hexdigest()
+    assert WrongOffsetRequestHandler.requestedRanges == ["bytes=1000-", None]
+    assert os.listdir(tempDir.name) == ["pkg-0.0.0.tar.gz"]
+
+    tempDir.cleanup()
+
+#### Segmented 'downloadLink' battery test ####
+
+class FlakySegmentRequestHandler(RangeRequestHandler):
+    """Serves a file big enough to be downloaded in segments, cutting the connection in the middle of the third segment the first time it is requested."""
+
+    content = bytes(range(256)) * 4096 * 4
+    requestedRanges = []
+    failed = False
+
+    def do_GET(self):
+        if self.headers.get("Range") == "bytes=2097152-3145727" and not FlakySegmentRequestHandler.failed:
+            FlakySegmentRequestHandler.failed = True
+            self.requestedRanges.append(self.headers.get("Range"))
+
+            self.send_response(206)
+            self.send_header("Content-Length", "1048576")
+            self.send_header("Content-Range", "bytes 2097152-3145727/" + str(len(self.content)))
+            self.end_headers()
+            self.wfile.write(self.content[2097152:2097152 + 1000])
+            self.close_connection = True
+            return
+
+        RangeRequestHandler.do_GET(self)
+
+def test_downloadLinkInSegmentsRetriesOnlyTheFailedOne(serveHTTP):
+    tempDir = tempfile.TemporaryDirectory()
+    filePath = os.path.join(tempDir.name, "pkg-0.0.0.tar.gz")
+    linkURL = serveHTTP(FlakySegmentRequestHandler) + "pkg-0.0.0.tar.gz"
+
+    networkManager = NetworkManager(retryPolicy=RetryPolicy(retries=3, backoffFactor=0), segments=4, segmentThreshold=0)
+    ok, _, sha256 = networkManager.downloadLink(linkURL + "#sha256=" + hashlib.sha256(FlakySegmentRequestHandler.content).hexdigest(), filePath)
+
+    assert ok
+    assert sha256 == hashlib.sha256(FlakySegmentRequestHandler.content).hexdigest()
+    assert FlakySegmentRequestHandler.requestedRanges[0] is None
+    assert sorted(FlakySegmentRequestHandler.requestedRanges[1:]) == ["bytes=0-1048575", "bytes=1048576-2097151", "bytes=2097152-3145727", "bytes=2097152-3145727", "bytes=3145728-4194303"]
+    assert sorted(os.listdir(tempDir.name)) == ["pkg-0.0.0.tar.gz"]
+
+    tempDir.cleanup()
+
+#### 'RetryPolicy' battery test ####
+
+def getHTTPError(statusCode, headers={}):
+    response = requests.Response()
+    response.status_code = statusCode
+    response.headers.update(headers)
+
+    return requests.exceptions.HTTPError(response=response)
+
+testData = [
+    (getHTTPError(404), False),
+    (getHTTPError(429), True),
+    (getHTTPError(503), True),
+    (requests.exceptions.ConnectionError(), True),
+    (requests.exceptions.Timeout(), True),
+    (requests.exceptions.MissingSchema(), False),
+]
+
+@pytest.mark.parametrize("error, expected_retryable", testData, ids=["404", "429", "503", "connection", "timeout", "bad_url"])
+def test_isRetryable(error, expected_retryable):
+    assert RetryPolicy().isRetryable(error) == expected_retryable
+
+def test_getWaitTime():
+    retryPolicy = RetryPolicy(backoffFactor=0.5, maxBackoff=3.0, jitter=False)
+
+    assert [retryPolicy.getWaitTime(attempt) for attempt in range(5)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+    assert retryPolicy.getWaitTime(0, getHTTPError(429, {"Retry-After": "7"}).response) == 7.0
+    assert 0 <= RetryPolicy(backoffFactor=0.5).getWaitTime(2) <= 2.0
+
+#### Hash verification 'downloadLink' battery test ####
+
+def test_downloadLinkRejectsHashMismatch(serveHTTP):
+    tempDir = tempfile.TemporaryDirectory()
+    filePath = os.path.join(tempDir.name, "pkg-0.0.0.tar.gz")
+
+    linkURL = serveHTTP(RangeRequestHandler) + "pkg-0.0.0.tar.gz"
+
+    ok, status, _ = NetworkManager().downloadLink(linkURL + "#sha256=" + "0" * 64, filePath, retries=2)
+
+    assert not ok
+    assert status.startswith("Hash mismatch")
+    assert os.listdir(tempDir.name) == []
+
+    tempDir.cleanup()
+
+#### Upstreams battery test ####
+
+def test_getSortedUpstreams():
+    networkManager = NetworkManager()
+    networkManager.upstreams = ["https://a.example/simple", "https://b.example/simple/", "https://c.example/simple/"]
+
+    upstreamA, upstreamB, upstreamC = networkManager.upstreams
+    upstreamA.registerSuccess(0.5)
+    upstreamB.registerSuccess(0.1)
+    upstreamC.registerFailure()
+
+    assert [upstream.baseURL for upstream in networkManager.getSortedUpstreams()] == ["https://b.example/simple/", "https://a.example/simple/", "https://c.example/simple/"]
+    assert upstreamC.errorRate == 1.0
+
+def test_getUpstreamProjectPageFailsOver(serveHTTP):
+    tempDir = tempfile.TemporaryDirectory()
+    os.makedirs(os.path.join(tempDir.name, "pkg"))
+    with open(os.path.join(tempDir.name, "pkg", "index.html"), "w") as indexFile:
+        indexFile.write("<a href=\"./pkg-0.0.0.tar.gz\">pkg-0.0.0.tar.gz</a>")
+
+    baseURL = serveHTTP(directory=tempDir.name)
+
+    networkManager = NetworkManager(retryPolicy=RetryPolicy(retries=1))
+    networkManager.upstreams = ["http://127.0.0.1:9/", baseURL]
+
+    ok, _, _, _, _, pageURL = networkManager.getUpstreamProjectPage("pkg")
+
+    assert ok
+    assert pageURL == baseURL + "pkg/"
+    assert not networkManager.upstreams[0].isAvailable()
+
+    tempDir.cleanup()
+
+#### Memoized project pages battery test ####
+
+def test_getUpstreamProjectPageIsMemoized(serveHTTP):
+    tempDir = tempfile.TemporaryDirectory()
+    os.makedirs(os.path.join(tempDir.name, "pkg"))
+    with open(os.path.join(tempDir.name, "pkg", "index.html"), "w") as indexFile:
+        indexFile.write("<a href=\"./pkg-0.0.0.tar.gz\">pkg-0.0.0.tar.gz</a>")
+
+    baseURL = serveHTTP(directory=tempDir.name)
+    httpCache = HTTPCache(os.path.join(tempDir.name, "cache"))
+
+    networkManager = NetworkManager(retryPolicy=RetryPolicy(retries=1))
+    networkManager.upstreams = [baseURL]
+    ok, modified, _, content, _, _ = networkManager.getUpstreamProjectPage("pkg", httpCache)
+    assert ok and modified
+
+    shutil.rmtree(os.path.join(tempDir.name, "pkg"))
+
+    # Same run: not requested again
+    assert networkManager.getUpstreamProjectPage("pkg", httpCache) == (True, True, "200 OK", content, "text/html", baseURL + "pkg/")
+
+    # Only the pages of the project given are forgotten
+    networkManager.clearPageMemo("other")
+    assert networkManager.getUpstreamProjectPage("pkg", httpCache)[0]
+    networkManager.clearPageMemo("pkg")
+    assert not networkManager.getUpstreamProjectPage("pkg", httpCache)[0]
+
+    # Another run, within the TTL: served from the disk cache
+    networkManager = NetworkManager(retryPolicy=RetryPolicy(retries=1))
+    networkManager.upstreams = [baseURL]
+    networkManager.pageTTL = 60
+    ok, modified, _, cachedContent, _, _ = networkManager.getUpstreamProjectPage("pkg", httpCache)
+    assert ok and not modified
+    assert cachedContent == content
+
+    # Another run, without TTL: requested again
+    networkManager = NetworkManager(retryPolicy=RetryPolicy(retries=1))
+    networkManager.upstreams = [baseURL]
+    ok, _, _, _, _, _ = networkManager.getUpstreamProjectPage("pkg", httpCache)
+    assert not ok
+
+    tempDir.cleanup()
+
+#### 'TokenBucket' battery test ####
+
+def test_tokenBucketLimitsRateAcrossThreads():
+    tokenBucket = TokenBucket(rate=100, capacity=10)
+
+    def consumeTokens():
+        for _ in range(5):
+            tokenBucket.consume(10)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=consumeTokens) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 200 tokens at 100 tokens/s, the first 10 being already available:
+    assert time.monotonic() - start >= 1.8
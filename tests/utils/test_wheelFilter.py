@@ -0,0 +1,36 @@
+import pytest
+
+import sys
+sys.path.append(".")
+
+from pypickup.utils.wheelFilter import WheelFilter
+
+#### 'WheelFilter' battery test ####
+
+operators = {"version": "or", "python_tags": "or", "abi_tags": "or", "platform_tags": "or"}
+
+testData = [
+    ({"version": [], "python_tags": [">=3.8"], "abi_tags": [], "platform_tags": []}, operators, "and", "in",
+     {"a-1.0-cp310-cp310-manylinux_2_17_x86_64.whl": True, "a-1.0-cp37-cp37m-manylinux_2_17_x86_64.whl": False, "a-1.0-py3-none-any.whl": True, "a-1.0-py2-none-any.whl": False}),
+    ({"version": [], "python_tags": [], "abi_tags": ["~cp3"], "platform_tags": ["~manylinux", "~x86_64"]}, dict(operators, platform_tags="and"), "and", "in",
+     {"a-1.0-cp310-cp310-manylinux_2_17_x86_64.whl": True, "a-1.0-cp310-cp310-manylinux_2_17_aarch64.whl": False, "a-1.0-cp310-cp310-win_amd64.whl": False, "a-1.0-py3-none-any.whl": False}),
+    ({"version": [], "python_tags": [], "abi_tags": ["~cp3"], "platform_tags": ["~x86_64"]}, operators, "or", "in",
+     {"a-1.0-cp310-cp310-manylinux_2_17_aarch64.whl": True, "a-1.0-py3-none-any.whl": False, "a-1.0-py3-none-win_x86_64.whl": True}),
+    ({"version": ["~rc"], "python_tags": [], "abi_tags": [], "platform_tags": ["~macos", "win32"]}, operators, "or", "out",
+     {"a-1.0rc1-py3-none-any.whl": False, "a-1.0-py3-none-macosx_11_0_arm64.whl": False, "a-1.0-cp310-cp310-win32.whl": False, "a-1.0-cp310-cp310-win_amd64.whl": True}),
+    ({"version": [], "python_tags": [], "abi_tags": [], "platform_tags": []}, operators, "and", "out",
+     {"a-1.0-py3-none-any.whl": True}),
+]
+
+@pytest.mark.parametrize("filters, fieldConcatOperators, concatOperator, inOrOut, expected", testData, ids=["python_threshold", "and_attributes", "or_fields", "out_exact_and_contains", "no_filters"])
+def test_wheelFilter(filters, fieldConcatOperators, concatOperator, inOrOut, expected):
+    wheelFilter = WheelFilter(filters, fieldConcatOperators, concatOperator, inOrOut)
+
+    assert {wheelName: wheelFilter(wheelName) for wheelName in expected.keys()} == expected
+
+def test_wheelFilterRejectsIncorrectSettings():
+    with pytest.raises(ValueError):
+        WheelFilter({"platform_tags": [">3"]}, operators, "and", "in")
+
+    with pytest.raises(ValueError):
+        WheelFilter({"platform_tags": ["~x86_64"]}, operators, "xor", "in")